@@ -0,0 +1,57 @@
+from django.core.cache import caches
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication,\
+    JWTTokenUserAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+
+
+CACHE_ALIAS = 'users'
+
+
+def cache_key(user_id):
+    return f"user:{user_id}"
+
+
+def invalidate_user(user_id):
+    caches[CACHE_ALIAS].delete(cache_key(user_id))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """Verifies the token like JWTAuthentication, then reads the user from
+    the 'users' cache instead of the database. Entries are dropped when the
+    user is saved or deleted (see authentication/signals.py)."""
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            message = _("Token contained no recognizable user identification")
+            raise InvalidToken(message)
+        cache = caches[CACHE_ALIAS]
+        user = cache.get(cache_key(user_id))
+        if user is None:
+            # Raises if the user does not exist or is inactive: only active
+            # users are cached.
+            user = super().get_user(validated_token)
+            cache.set(cache_key(user_id), user)
+        return user
+
+
+class ClaimsUser(TokenUser):
+    """Lightweight user built from the token claims, with the `user_id`
+    attribute our views and permissions read."""
+    @cached_property
+    def user_id(self):
+        return self.id
+
+
+class StatelessJWTAuthentication(JWTTokenUserAuthentication):
+    """No database nor cache access: for read endpoints which only need the
+    user's id. A deactivated user keeps access until its token expires."""
+    def get_user(self, validated_token):
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            message = _("Token contained no recognizable user identification")
+            raise InvalidToken(message)
+        return ClaimsUser(validated_token)
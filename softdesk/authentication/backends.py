@@ -0,0 +1,22 @@
+from django.contrib.auth.backends import ModelBackend
+from authentication.hashing import set_password, verify_password
+from authentication.models import User
+
+
+class PooledModelBackend(ModelBackend):
+    """ModelBackend with the password hashing done by the hashing pool"""
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(User.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            user = User._default_manager.get_by_natural_key(username)
+        except User.DoesNotExist:
+            # Hash anyway to keep the timing of unknown emails (#20760).
+            set_password(User(), password)
+            return None
+        if verify_password(user, password) and \
+                self.user_can_authenticate(user):
+            return user
+        return None
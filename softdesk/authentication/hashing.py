@@ -0,0 +1,67 @@
+"""
+Password hashing off the request threads.
+
+Hashes are computed by a bounded thread pool (PASSWORD_HASHING_WORKERS),
+so at most that many CPU cores hash passwords at once whatever the number
+of signup/login requests, and the other endpoints keep their share of the
+CPU. hashlib and argon2 release the GIL while hashing. Requests waiting
+for the pool are bounded too (PASSWORD_HASHING_QUEUE): past that, they
+are answered 503 instead of piling up.
+Only pure hashing runs in the pool, database access stays on the request
+thread and its connection.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.contrib.auth.hashers import check_password
+from rest_framework.exceptions import APIException
+
+
+class HashingBusy(APIException):
+    status_code = 503
+    default_detail = "Too many authentication requests, retry later."
+    default_code = 'hashing_busy'
+
+
+_executor = None
+_slots = None
+_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor, _slots
+    with _lock:
+        if _executor is None:
+            workers = settings.PASSWORD_HASHING_WORKERS
+            _executor = ThreadPoolExecutor(max_workers=workers,
+                                           thread_name_prefix='hashing')
+            _slots = threading.BoundedSemaphore(
+                                workers + settings.PASSWORD_HASHING_QUEUE)
+    return _executor, _slots
+
+
+def run_hashing(function, *args):
+    executor, slots = get_executor()
+    if not slots.acquire(timeout=settings.PASSWORD_HASHING_TIMEOUT):
+        raise HashingBusy()
+    try:
+        return executor.submit(function, *args).result()
+    finally:
+        slots.release()
+
+
+def set_password(user, raw_password):
+    run_hashing(user.set_password, raw_password)
+
+
+def verify_password(user, raw_password):
+    """Same as user.check_password: when the password is valid but was
+    hashed with another hasher or other parameters than the current
+    profile's, it is hashed again and saved."""
+    outdated = []
+    valid = run_hashing(check_password, raw_password, user.password,
+                        outdated.append)
+    if valid and outdated:
+        set_password(user, raw_password)
+        user.save(update_fields=['password'])
+    return valid
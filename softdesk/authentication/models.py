@@ -45,9 +45,13 @@ class User(AbstractBaseUser):
     objects = UserManager()
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['first_name', 'last_name']
+    # str() of a user, also rendered from values() rows by projects/rows.py
+    STR_FIELDS = ('first_name', 'last_name', 'email')
+    STR_FORMAT = "{} {} couriel:{}"
 
     def __str__(self):
-        return f"{self.first_name} {self.last_name} couriel:{self.email}"
+        return self.STR_FORMAT.format(
+            *(getattr(self, field) for field in self.STR_FIELDS))
 
     def has_perm(self, perm, obj=None):
         return self.is_superuser
@@ -2,9 +2,12 @@ from rest_framework import serializers
 from authentication.models import User
 from rest_framework.validators import UniqueValidator
 from django.contrib.auth.password_validation import validate_password
+from authentication.hashing import set_password
+from softdesk.instrumentation import TimedSerializerMixin
 
 
-class SignupSerializer(serializers.ModelSerializer):
+class SignupSerializer(TimedSerializerMixin,
+                       serializers.ModelSerializer):
     email = serializers.EmailField(
             required=True,
             validators=[UniqueValidator(queryset=User.objects.all())]
@@ -25,11 +28,11 @@ class SignupSerializer(serializers.ModelSerializer):
         return attrs
 
     def create(self, validated_data):
-        user = User.objects.create(
+        user = User(
             email=validated_data['email'],
             first_name=validated_data['first_name'],
             last_name=validated_data['last_name']
             )
-        user.set_password(validated_data['password'])
+        set_password(user, validated_data['password'])
         user.save()
         return user
@@ -1,3 +1,86 @@
-from django.test import TestCase
+from unittest import mock
+from django.core.cache import caches
+from django.test import override_settings
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+from authentication.authentication import StatelessJWTAuthentication
+from authentication import hashing
+from authentication.models import User
 
-# Create your tests here.
+
+class CachedJWTAuthenticationTests(APITestCase):
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+        self.user = User.objects.create(email='ada@softdesk.fr',
+                                        first_name='Ada',
+                                        last_name='Lovelace')
+        token = AccessToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def test_user_is_loaded_once(self):
+        """User, memberships and count, then everything is cached"""
+        with self.assertNumQueries(3):
+            self.client.get('/projects/')
+        with self.assertNumQueries(0):
+            response = self.client.get('/projects/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_saved_user_is_reloaded(self):
+        self.client.get('/projects/')
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get('/projects/').status_code, 401)
+
+    def test_deleted_user_is_rejected(self):
+        self.client.get('/projects/')
+        self.user.delete()
+        self.assertEqual(self.client.get('/projects/').status_code, 401)
+
+    def test_stateless_user_from_claims(self):
+        token = AccessToken.for_user(self.user)
+        user = StatelessJWTAuthentication().get_user(token)
+        self.assertEqual(user.user_id, self.user.user_id)
+        self.assertTrue(user.is_authenticated)
+
+
+class PasswordHashingTests(APITestCase):
+    password = 'Sof7Desk-passw0rd'
+
+    def signup(self):
+        return self.client.post('/signup/', {'email': 'ada@softdesk.fr',
+                                             'password': self.password,
+                                             'password2': self.password,
+                                             'first_name': 'Ada',
+                                             'last_name': 'Lovelace'})
+
+    def login(self, password=None):
+        return self.client.post('/login/', {'email': 'ada@softdesk.fr',
+                                            'password': password
+                                            or self.password})
+
+    def test_signup_and_login(self):
+        self.assertEqual(self.signup().status_code, 201)
+        user = User.objects.get()
+        self.assertTrue(user.password.startswith('pbkdf2_sha256$'))
+        response = self.login()
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('access', response.data)
+        self.assertEqual(self.login('wrong-password').status_code, 401)
+
+    def test_login_rehashes_with_the_current_profile(self):
+        self.signup()
+        hashers = ['django.contrib.auth.hashers.ScryptPasswordHasher',
+                   'django.contrib.auth.hashers.PBKDF2PasswordHasher']
+        with override_settings(PASSWORD_HASHERS=hashers):
+            self.assertEqual(self.login().status_code, 200)
+            self.assertTrue(User.objects.get().password
+                            .startswith('scrypt$'))
+            self.assertEqual(self.login().status_code, 200)
+
+    def test_busy_pool_answers_503(self):
+        self.signup()
+        hashing.get_executor()
+        slots = mock.Mock(**{'acquire.return_value': False})
+        with mock.patch.object(hashing, '_slots', slots):
+            self.assertEqual(self.login().status_code, 503)
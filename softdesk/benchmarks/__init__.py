@@ -0,0 +1,72 @@
+"""
+Benchmarks for the SoftDesk API.
+
+Each module is a script to run from the folder holding manage.py, e.g.:
+
+    python -m benchmarks.counts --issues 10000 --comments 1000000
+
+Benchmarks never touch db.sqlite3: they run against a throwaway test
+database created and destroyed by `test_database`.
+"""
+import os
+import statistics
+import time
+from contextlib import contextmanager
+
+
+DUMMY_CACHE = {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}
+
+
+def benchmark_caches(caches):
+    """CACHES of the benchmarks. Repeated requests of an URL would be
+    answered by the response cache of projects/cache.py, which is replaced
+    by a dummy cache unless BENCHMARK_RESPONSE_CACHE=on."""
+    if os.environ.get('BENCHMARK_RESPONSE_CACHE') == 'on':
+        return caches
+    return {**caches, 'responses': DUMMY_CACHE}
+
+
+def uncached():
+    """Applies benchmark_caches to the benchmarks running in process."""
+    from django.conf import settings
+    from django.test import override_settings
+    return override_settings(CACHES=benchmark_caches(settings.CACHES))
+
+
+def setup():
+    """Configures Django the way manage.py does."""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'softdesk.settings')
+    import django
+    django.setup()
+
+
+@contextmanager
+def test_database(verbosity=0):
+    """Creates a migrated test database and destroys it on exit."""
+    from django.db import connection
+    from django.test.utils import setup_test_environment,\
+        teardown_test_environment
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=verbosity)
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=verbosity)
+        teardown_test_environment()
+
+
+def measure(function, repeat=5):
+    """Runs `function` `repeat` times and returns the timings in seconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def report(name, timings, **extra):
+    """Prints a one line summary of a measure."""
+    details = ' '.join(f"{key}={value}" for key, value in extra.items())
+    print(f"{name:<40} best={min(timings) * 1000:10.2f}ms "
+          f"median={statistics.median(timings) * 1000:10.2f}ms {details}")
@@ -0,0 +1,53 @@
+"""
+Authentication overhead per request: simplejwt's JWTAuthentication, the
+cached user loader and the stateless claims user.
+
+    python -m benchmarks.auth --requests 10000
+"""
+import argparse
+from benchmarks import setup, test_database, measure, report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    setup()
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    from rest_framework.request import Request
+    from rest_framework.test import APIRequestFactory
+    from rest_framework_simplejwt.authentication import JWTAuthentication
+    from rest_framework_simplejwt.tokens import AccessToken
+    from authentication.authentication import CachedJWTAuthentication,\
+        StatelessJWTAuthentication
+    from authentication.models import User
+
+    with test_database():
+        user = User.objects.create(email='bench@softdesk.fr',
+                                   first_name='Bench', last_name='Auth')
+        token = AccessToken.for_user(user)
+        request = Request(APIRequestFactory().get(
+            '/projects/', HTTP_AUTHORIZATION=f'Bearer {token}'))
+        print(f"Time per request, over {args.requests} requests")
+        for name, authentication in (
+                ('JWTAuthentication', JWTAuthentication()),
+                ('CachedJWTAuthentication', CachedJWTAuthentication()),
+                ('StatelessJWTAuthentication',
+                 StatelessJWTAuthentication())):
+
+            def authenticate():
+                for _ in range(args.requests):
+                    authentication.authenticate(request)
+
+            authenticate()
+            with CaptureQueriesContext(connection) as queries:
+                authentication.authenticate(request)
+            timings = [timing / args.requests
+                       for timing in measure(authenticate, args.repeat)]
+            report(name, timings, queries_per_request=len(queries))
+
+
+if __name__ == '__main__':
+    main()
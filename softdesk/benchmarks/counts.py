@@ -0,0 +1,48 @@
+"""
+Compares counting comments per issue with one COUNT query per issue
+(`issue_comment.count`) against the annotated subquery used by the views.
+
+    python -m benchmarks.counts --issues 10000 --comments 1000000
+"""
+import argparse
+from benchmarks import setup, test_database, measure, report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--issues', type=int, default=10000)
+    parser.add_argument('--comments', type=int, default=1000000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    setup()
+    from django.db import connection, reset_queries
+    from django.test.utils import CaptureQueriesContext
+    from benchmarks.fixtures import populate
+    from projects.models import Issue, Comment
+    from projects.views import count_subquery
+
+    with test_database():
+        populate(issues=args.issues, comments=args.comments)
+        print(f"{args.issues} issues, {args.comments} comments")
+
+        def per_object():
+            return [issue.issue_comment.count()
+                    for issue in Issue.objects.all()]
+
+        def annotated():
+            queryset = Issue.objects.annotate(
+                comment_count=count_subquery(Comment, 'issue_id'))
+            return [issue.comment_count for issue in queryset]
+
+        assert per_object() == annotated()
+        for name, function in (('per object .count()', per_object),
+                               ('annotated subquery', annotated)):
+            reset_queries()
+            with CaptureQueriesContext(connection) as queries:
+                function()
+            report(name, measure(function, args.repeat),
+                   queries=len(queries))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,161 @@
+"""
+Concurrent read and write load on each database profile: throughput,
+latency and the requests failed on a locked database.
+
+    python -m benchmarks.databases --clients 32 --requests 50 --writes 0.3
+
+Profiles:
+  sqlite-default  SQLite with the defaults of Django (rollback journal)
+  sqlite          SOFTDESK_DB_PROFILE=sqlite (WAL, busy timeout)
+  postgres        SOFTDESK_DB_PROFILE=postgres, on the empty database
+                  named by --postgres-database, flushed before the run
+
+Each profile gets its own runserver on a database filled with
+benchmarks.fixtures. Clients list the issues of a project and create
+issues in it, `--writes` being the share of creations.
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.load import free_port, wait_for, percentile
+
+PROFILES = {
+    'sqlite-default': {'SOFTDESK_DB_PROFILE': 'sqlite',
+                       'BENCHMARK_SQLITE_TUNING': 'off'},
+    'sqlite': {'SOFTDESK_DB_PROFILE': 'sqlite'},
+    'postgres': {'SOFTDESK_DB_PROFILE': 'postgres'},
+}
+
+LOCK_ERRORS = ('database is locked', 'deadlock detected',
+               'could not serialize access')
+
+
+def prepare(issues, comments):
+    """Runs in the profile's environment: fills its database and prints
+    the project and a token of its author."""
+    from benchmarks import setup
+    setup()
+    from django.core.management import call_command
+    from rest_framework_simplejwt.tokens import AccessToken
+    from benchmarks.fixtures import populate
+
+    call_command('migrate', verbosity=0)
+    call_command('flush', interactive=False, verbosity=0)
+    project = populate(issues=issues, comments=comments)[0]
+    print(json.dumps({
+        'project': project.project_id,
+        'token': str(AccessToken.for_user(project.author_user_id)),
+    }))
+
+
+def send(url, token, body=None):
+    """Returns the latency and the status code of a request."""
+    headers = {'Authorization': f'Bearer {token}'}
+    data = None
+    if body is not None:
+        headers['Content-Type'] = 'application/json'
+        data = json.dumps(body).encode()
+    request = urllib.request.Request(url, data=data, headers=headers)
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as error:
+        status = error.code
+    return time.perf_counter() - start, status
+
+
+def run_load(url, token, clients, requests, writes):
+    issue = {'title': 'Load', 'description': 'Concurrent write',
+             'tag': 'BUG', 'priority': 'FAIBLE', 'status': 'A faire'}
+    rng = random.Random(0)
+    jobs = [issue if rng.random() < writes else None
+            for _ in range(clients * requests)]
+    with ThreadPoolExecutor(clients) as pool:
+        start = time.perf_counter()
+        results = list(pool.map(lambda body: send(url, token, body), jobs))
+        elapsed = time.perf_counter() - start
+    latencies = [latency for latency, _ in results]
+    return {
+        'requests': len(jobs),
+        'throughput': len(jobs) / elapsed,
+        'p50_ms': percentile(latencies, 0.5) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'errors': sum(status >= 500 for _, status in results),
+    }
+
+
+def run_profile(name, args, directory):
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE='benchmarks.settings',
+               **PROFILES[name])
+    if name == 'postgres':
+        env['BENCHMARK_DATABASE'] = args.postgres_database
+    else:
+        env['BENCHMARK_DATABASE'] = os.path.join(directory, f'{name}.sqlite3')
+    output = subprocess.run(
+        [sys.executable, '-m', 'benchmarks.databases', '--prepare',
+         '--issues', str(args.issues), '--comments', str(args.comments)],
+        env=env, check=True, capture_output=True, text=True).stdout
+    fixture = json.loads(output.splitlines()[-1])
+    port = free_port()
+    log_path = os.path.join(directory, f'{name}.log')
+    with open(log_path, 'w') as log:
+        server = subprocess.Popen(
+            [sys.executable, 'manage.py', 'runserver', '--noreload',
+             f'127.0.0.1:{port}'],
+            env=env, stdout=subprocess.DEVNULL, stderr=log)
+        try:
+            wait_for(port)
+            url = (f"http://127.0.0.1:{port}/projects/"
+                   f"{fixture['project']}/issues/")
+            result = run_load(url, fixture['token'], args.clients,
+                              args.requests, args.writes)
+        finally:
+            server.terminate()
+            server.wait()
+    with open(log_path) as log:
+        result['locks'] = sum(error in line for line in log
+                              for error in LOCK_ERRORS)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('--profiles', nargs='+', choices=PROFILES,
+                        default=['sqlite-default', 'sqlite'])
+    parser.add_argument('--clients', type=int, default=32)
+    parser.add_argument('--requests', type=int, default=50,
+                        help="Requests per client")
+    parser.add_argument('--writes', type=float, default=0.3,
+                        help="Share of the requests creating an issue")
+    parser.add_argument('--issues', type=int, default=1000)
+    parser.add_argument('--comments', type=int, default=10000)
+    parser.add_argument('--postgres-database', default='softdesk_bench')
+    parser.add_argument('--prepare', action='store_true',
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.prepare:
+        return prepare(args.issues, args.comments)
+    directory = tempfile.mkdtemp()
+    print(f"{args.clients} clients x {args.requests} requests, "
+          f"{args.writes:.0%} writes")
+    for name in args.profiles:
+        result = run_profile(name, args, directory)
+        print(f"{name:<15} {result['throughput']:8.1f} req/s "
+              f"p50={result['p50_ms']:7.1f}ms p99={result['p99_ms']:7.1f}ms "
+              f"errors={result['errors']} locks={result['locks']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+"""
+Time and peak Python memory of deleting a large project through the
+deletion Collector and through the set-based FAST_DELETE path.
+
+    python -m benchmarks.deletion --issues 10000 --comments 200000
+"""
+import argparse
+import time
+import tracemalloc
+from benchmarks import setup, test_database
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--issues', type=int, default=10000)
+    parser.add_argument('--comments', type=int, default=200000)
+    args = parser.parse_args()
+    setup()
+    from django.test.utils import override_settings
+    from authentication.models import User
+    from benchmarks.fixtures import populate
+    from projects.deletion import delete_project
+
+    with test_database():
+        print(f"{args.issues} issues, {args.comments} comments")
+        for name, fast in (('collector', False), ('fast delete', True)):
+            project = populate(issues=args.issues,
+                               comments=args.comments)[0]
+            with override_settings(FAST_DELETE=fast):
+                tracemalloc.start()
+                start = time.perf_counter()
+                delete_project(project)
+                elapsed = time.perf_counter() - start
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+            print(f"{name:<20} {elapsed * 1000:10.2f}ms "
+                  f"peak={peak / 2 ** 20:8.2f}MiB")
+            User.objects.all().delete()
+
+
+if __name__ == '__main__':
+    main()
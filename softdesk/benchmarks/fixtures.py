@@ -0,0 +1,55 @@
+"""Bulk inserted data sets for the benchmarks."""
+from authentication.models import User
+from projects.models import Project, Contributor, Issue, Comment
+
+
+def chunks(total, size):
+    """Yields (start, stop) bounds splitting range(total) in chunks."""
+    for start in range(0, total, size):
+        yield start, min(start + size, total)
+
+
+def populate(users=10, projects=1, issues=100, comments=1000,
+             batch_size=5000):
+    """Creates `users` contributors of `projects` projects and spreads
+    `issues` and `comments` evenly over them. Returns the projects."""
+    user_list = User.objects.bulk_create(
+        User(email=f"bench{index}@softdesk.fr",
+             first_name='Bench',
+             last_name=str(index),
+             password='!')
+        for index in range(users))
+    project_list = Project.objects.bulk_create(
+        Project(title=f"Bench {index}",
+                description='Benchmark project',
+                type='back-end',
+                author_user_id=user_list[0])
+        for index in range(projects))
+    Contributor.objects.bulk_create(
+        Contributor(user_id=user,
+                    project_id=project,
+                    permission='Auteur' if rank == 0 else 'Contributeur',
+                    role='Chef de projet' if rank == 0 else 'Dev')
+        for project in project_list
+        for rank, user in enumerate(user_list))
+    for start, stop in chunks(issues, batch_size):
+        Issue.objects.bulk_create(
+            Issue(title=f"Issue {index}",
+                  description='Benchmark issue',
+                  tag='BUG',
+                  priority='FAIBLE',
+                  status='A faire',
+                  project_id=project_list[index % projects],
+                  author_user_id=user_list[index % users],
+                  assignee_user_id=user_list[(index + 1) % users])
+            for index in range(start, stop))
+    issue_ids = list(Issue.objects.order_by('id')
+                                  .values_list('id', 'project_id'))
+    for start, stop in chunks(comments, batch_size):
+        Comment.objects.bulk_create(
+            Comment(description=f"Comment {index}",
+                    author_user_id=user_list[index % users],
+                    project_id_id=issue_ids[index % issues][1],
+                    issue_id_id=issue_ids[index % issues][0])
+            for index in range(start, stop))
+    return project_list
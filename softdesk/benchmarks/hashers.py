@@ -0,0 +1,49 @@
+"""
+Login throughput of each password hasher profile: password verifications
+per second on one core, and through the hashing pool with concurrent
+clients.
+
+    python -m benchmarks.hashers --logins 50 --clients 8
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+from benchmarks import setup
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--logins', type=int, default=50)
+    parser.add_argument('--clients', type=int, default=8)
+    args = parser.parse_args()
+    setup()
+    from django.conf import settings
+    from django.contrib.auth.hashers import check_password, make_password
+    from django.test.utils import override_settings
+    from authentication.hashing import run_hashing
+
+    password = 'Sof7Desk-passw0rd'
+    print(f"{settings.PASSWORD_HASHING_WORKERS} hashing workers")
+    for profile, hasher in settings.PASSWORD_HASHER_PROFILES.items():
+        with override_settings(PASSWORD_HASHERS=[hasher]):
+            try:
+                encoded = make_password(password)
+            except ValueError as error:
+                print(f"{profile:<10} skipped: {error}")
+                continue
+            start = time.perf_counter()
+            for _ in range(args.logins):
+                check_password(password, encoded)
+            per_core = args.logins / (time.perf_counter() - start)
+            with ThreadPoolExecutor(args.clients) as clients:
+                start = time.perf_counter()
+                list(clients.map(
+                    lambda _: run_hashing(check_password, password, encoded),
+                    range(args.logins)))
+                pooled = args.logins / (time.perf_counter() - start)
+        print(f"{profile:<10} {per_core:8.1f} logins/s/core "
+              f"{pooled:8.1f} logins/s through the pool")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+"""
+Overhead of softdesk/instrumentation.py: the same requests through the
+test client without and with InstrumentationMiddleware.
+
+    python -m benchmarks.instrumentation --requests 2000
+"""
+import argparse
+from benchmarks import setup, test_database, uncached, measure, report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    setup()
+    from django.conf import settings
+    from django.test import override_settings
+    from rest_framework.test import APIClient
+    from benchmarks.fixtures import populate
+    from projects.models import Issue
+
+    with test_database(), uncached():
+        project = populate(issues=100, comments=1000)[0]
+        issue = Issue.objects.filter(project_id=project).first()
+        urls = [f'/projects/{project.project_id}/issues/',
+                f'/projects/{project.project_id}/issues/{issue.id}/',
+                f'/projects/{project.project_id}/issues/{issue.id}'
+                f'/comments/']
+        print(f"{args.requests} requests")
+        for name, middleware in (
+                ('without instrumentation', settings.MIDDLEWARE),
+                ('with instrumentation', [
+                    'softdesk.instrumentation.InstrumentationMiddleware',
+                    *settings.MIDDLEWARE])):
+            with override_settings(MIDDLEWARE=middleware,
+                                   INSTRUMENTATION=True):
+                client = APIClient()
+                client.force_authenticate(project.author_user_id)
+
+                def requests():
+                    for index in range(args.requests):
+                        client.get(urls[index % len(urls)])
+                timings = measure(requests, args.repeat)
+            per_request = min(timings) / args.requests * 1e6
+            report(name, timings, per_request=f"{per_request:.1f}us")
+
+
+if __name__ == '__main__':
+    main()
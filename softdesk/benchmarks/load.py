@@ -0,0 +1,133 @@
+"""
+Load test of a local server: throughput and latency percentiles of the
+read endpoints with concurrent clients, WSGI (runserver and the DRF
+viewsets) against ASGI (uvicorn or daphne and the /async/ endpoints).
+
+    python -m benchmarks.load --clients 64 --requests 20
+
+The servers run with benchmarks.settings on a temporary database filled
+with benchmarks.fixtures. ASGI is skipped when neither uvicorn nor daphne
+is installed. Both run without the response cache, which only the
+viewsets use, so that both sides query the database.
+"""
+import argparse
+import importlib.util
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def server_command(kind, port):
+    if kind == 'wsgi':
+        return [sys.executable, 'manage.py', 'runserver', '--noreload',
+                f'127.0.0.1:{port}']
+    if importlib.util.find_spec('uvicorn'):
+        return [sys.executable, '-m', 'uvicorn', 'softdesk.asgi:application',
+                '--port', str(port), '--log-level', 'warning']
+    if importlib.util.find_spec('daphne'):
+        return [sys.executable, '-m', 'daphne', '-p', str(port),
+                'softdesk.asgi:application']
+    return None
+
+
+def wait_for(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Server on port {port} did not start")
+
+
+def fetch(url, token):
+    request = urllib.request.Request(
+                url, headers={'Authorization': f'Bearer {token}'})
+    start = time.perf_counter()
+    with urllib.request.urlopen(request) as response:
+        response.read()
+    return time.perf_counter() - start
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def run_load(urls, token, clients, requests):
+    jobs = [urls[index % len(urls)] for index in range(clients * requests)]
+    with ThreadPoolExecutor(clients) as pool:
+        start = time.perf_counter()
+        latencies = list(pool.map(lambda url: fetch(url, token), jobs))
+        elapsed = time.perf_counter() - start
+    return {
+        'requests': len(jobs),
+        'throughput': len(jobs) / elapsed,
+        'p50_ms': statistics.median(latencies) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--clients', type=int, default=64)
+    parser.add_argument('--requests', type=int, default=20,
+                        help="Requests per client")
+    parser.add_argument('--issues', type=int, default=1000)
+    parser.add_argument('--comments', type=int, default=10000)
+    args = parser.parse_args()
+    directory = tempfile.mkdtemp()
+    os.environ['BENCHMARK_DATABASE'] = os.path.join(directory, 'db.sqlite3')
+    os.environ['DJANGO_SETTINGS_MODULE'] = 'benchmarks.settings'
+    os.environ['BENCHMARK_RESPONSE_CACHE'] = 'off'
+    from benchmarks import setup
+    setup()
+    from django.core.management import call_command
+    from rest_framework_simplejwt.tokens import AccessToken
+    from benchmarks.fixtures import populate
+    from projects.models import Issue
+
+    call_command('migrate', verbosity=0)
+    project = populate(issues=args.issues, comments=args.comments)[0]
+    issue = Issue.objects.filter(project_id=project).first()
+    token = str(AccessToken.for_user(project.author_user_id))
+    paths = [f'projects/{project.project_id}/',
+             f'projects/{project.project_id}/issues/',
+             f'projects/{project.project_id}/issues/{issue.id}/comments/']
+    print(f"{args.clients} clients x {args.requests} requests")
+    for kind, prefix in (('wsgi', ''), ('asgi', 'async/')):
+        port = free_port()
+        command = server_command(kind, port)
+        if command is None:
+            print(f"{kind}: skipped, install uvicorn or daphne")
+            continue
+        server = subprocess.Popen(command, env=os.environ,
+                                  stdout=subprocess.DEVNULL,
+                                  stderr=subprocess.DEVNULL)
+        try:
+            wait_for(port)
+            urls = [f'http://127.0.0.1:{port}/{prefix}{path}'
+                    for path in paths]
+            result = run_load(urls, token, args.clients, args.requests)
+        finally:
+            server.terminate()
+            server.wait()
+        print(f"{kind}: {result['throughput']:8.1f} req/s "
+              f"p50={result['p50_ms']:7.1f}ms p99={result['p99_ms']:7.1f}ms")
+
+
+if __name__ == '__main__':
+    main()
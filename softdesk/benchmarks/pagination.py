@@ -0,0 +1,58 @@
+"""
+Latency of the first and of a deep page of the issue list, with the default
+limit/offset pagination and with the keyset (cursor) pagination.
+
+    python -m benchmarks.pagination --issues 100000 --page 10000
+"""
+import argparse
+from benchmarks import setup, test_database, uncached, measure, report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--issues', type=int, default=100000)
+    parser.add_argument('--page', type=int, default=10000)
+    parser.add_argument('--limit', type=int, default=10)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    setup()
+    from rest_framework.pagination import Cursor
+    from rest_framework.test import APIClient
+    from benchmarks.fixtures import populate
+    from projects.models import Issue
+    from projects.pagination import KeysetPagination
+
+    with test_database(), uncached():
+        project = populate(issues=args.issues, comments=0)[0]
+        client = APIClient()
+        client.force_authenticate(project.author_user_id)
+        url = f"/projects/{project.project_id}/issues/?limit={args.limit}"
+        offset = (args.page - 1) * args.limit
+        # The cursor pointing at the deep page, as the previous page's
+        # `next` link would have returned it.
+        last = Issue.objects.filter(project_id=project)\
+                            .order_by('created_time', 'id')[offset - 1]
+        paginator = KeysetPagination()
+        paginator.ordering = ('created_time', 'id')
+        paginator.base_url = url
+        cursor = Cursor(offset=0, reverse=False,
+                        position=str(last.created_time))
+        deep_cursor = paginator.encode_cursor(cursor)
+        scenarios = (
+            ('limit/offset page 1', url),
+            (f'limit/offset page {args.page}', f"{url}&offset={offset}"),
+            ('limit/offset no count page 1', f"{url}&count=false"),
+            (f'limit/offset no count page {args.page}',
+             f"{url}&count=false&offset={offset}"),
+            ('cursor page 1', f"{url}&pagination=cursor"),
+            (f'cursor page {args.page}', deep_cursor),
+        )
+        print(f"{args.issues} issues, {args.limit} per page")
+        for name, page_url in scenarios:
+            response = client.get(page_url)
+            assert response.status_code == 200, response.data
+            report(name, measure(lambda: client.get(page_url), args.repeat))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""
+Serializes the issues of a project for the list endpoint: IssueListSerializer
+on model instances and DRF's JSONRenderer, against the values() rows of
+projects/rows.py and FastJSONRenderer. Both outputs are checked equal.
+
+    python -m benchmarks.serialization --issues 10000
+"""
+import argparse
+from benchmarks import setup, test_database, measure, report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--issues', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    setup()
+    from rest_framework.renderers import JSONRenderer
+    from benchmarks.fixtures import populate
+    from projects.models import Issue
+    from projects.renderers import FastJSONRenderer
+    from projects.rows import RowSerializer
+    from projects.serializers import IssueListSerializer
+
+    with test_database():
+        project = populate(issues=args.issues, comments=0)[0]
+        queryset = Issue.objects.filter(project_id=project)\
+                                .order_by('created_time', 'id')
+        fields = list(IssueListSerializer.Meta.fields)
+        print(f"{args.issues} issues")
+
+        def serializer():
+            instances = queryset.select_related('author_user_id',
+                                                'assignee_user_id')
+            data = IssueListSerializer(instances, many=True).data
+            return JSONRenderer().render(data)
+
+        def rows():
+            row_serializer = RowSerializer.for_fields(IssueListSerializer,
+                                                      fields)
+            data = row_serializer.render(row_serializer.values(queryset))
+            return FastJSONRenderer().render(data)
+
+        assert serializer() == rows()
+        for name, function in (
+                ('ModelSerializer + JSONRenderer', serializer),
+                ('values() rows + FastJSONRenderer', rows)):
+            report(name, measure(function, args.repeat))
+
+
+if __name__ == '__main__':
+    main()
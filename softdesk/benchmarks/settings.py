@@ -0,0 +1,29 @@
+"""Settings of the servers started by the benchmarks: the database is the
+one of SOFTDESK_DB_PROFILE, named by BENCHMARK_DATABASE, never db.sqlite3.
+BENCHMARK_SQLITE_TUNING=off runs SQLite with the defaults of Django.
+Responses are not cached, see benchmarks.benchmark_caches."""
+import os
+from softdesk.settings import *  # noqa: F401,F403
+from softdesk.settings import CACHES, DATABASES
+from benchmarks import benchmark_caches
+
+DEBUG = False
+
+ALLOWED_HOSTS = ['127.0.0.1', 'localhost']
+
+DATABASES['default']['NAME'] = os.environ['BENCHMARK_DATABASE']
+
+if os.environ.get('BENCHMARK_SQLITE_TUNING') == 'off':
+    DATABASES['default'].update(ENGINE='django.db.backends.sqlite3',
+                                OPTIONS={}, PRAGMAS={})
+
+CACHES = benchmark_caches(CACHES)
+
+# Server errors go to stderr, where benchmarks.databases counts the locks
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {'stderr': {'class': 'logging.StreamHandler'}},
+    'loggers': {'django.request': {'handlers': ['stderr'],
+                                   'level': 'ERROR'}},
+}
@@ -0,0 +1,402 @@
+"""
+Benchmark suite of the API routes: one scenario per route of
+softdesk/urls.py, from signup and login to the create, read, update and
+delete of nested comments.
+
+    python -m benchmarks.suite run --scale small --output before.json
+    python -m benchmarks.suite run --scale small --output after.json
+    python -m benchmarks.suite compare before.json after.json
+
+The data set is generated by benchmarks.fixtures at the chosen scale on a
+throwaway database, the same for every run. Requests go through the
+in-process test client, queries counted by CaptureQueriesContext, or with
+--server through HTTP to a local runserver with instrumentation on, queries
+read from its Server-Timing header. The objects that updates and deletes
+act on are created by untimed requests.
+
+The JSON report gives per scenario the throughput of a single client, the
+latency percentiles and the queries per request. `compare` lists the
+scenarios slower than --threshold or running more queries, and exits
+with status 1 if there are any.
+"""
+import argparse
+import json
+import os
+import platform
+import re
+import subprocess
+import sys
+import tempfile
+import urllib.error
+import urllib.request
+from time import perf_counter
+from benchmarks.load import free_port, wait_for, percentile, server_command
+
+
+SCALES = {
+    'small': dict(users=10, projects=2, issues=200, comments=2000),
+    'medium': dict(users=50, projects=10, issues=5000, comments=50000),
+    'large': dict(users=200, projects=50, issues=50000, comments=500000),
+}
+
+PASSWORD = 'Suite-Password-2022'
+
+PROJECT = {'title': 'Suite', 'description': 'Benchmark suite',
+           'type': 'back-end'}
+ISSUE = {'title': 'Suite', 'description': 'Benchmark suite', 'tag': 'BUG',
+         'priority': 'FAIBLE', 'status': 'A faire'}
+COMMENT = {'description': 'Benchmark suite'}
+
+
+class Scenario:
+    """A request to time. `path` and `body` are formatted with the ids of
+    the data set and, if `setup` is a (path, body, id key) request, with
+    `target`: the id of the object it created."""
+    def __init__(self, name, method, path, body=None, setup=None,
+                 status=200, auth=True, content_type='application/json'):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.body = body
+        self.setup = setup
+        self.status = status
+        self.auth = auth
+        self.content_type = content_type
+
+
+PROJECTS = '/projects/{project}'
+ISSUES = PROJECTS + '/issues'
+COMMENTS = ISSUES + '/{issue}/comments'
+
+SETUP_PROJECT = ('/projects/', PROJECT, 'project_id')
+SETUP_ISSUE = (ISSUES + '/', ISSUE, 'id')
+SETUP_COMMENT = (COMMENTS + '/', COMMENT, 'comment_id')
+
+SCENARIOS = [
+    Scenario('auth.signup', 'POST', '/signup/', auth=False, status=201,
+             body={'email': 'suite.signup{index}@softdesk.fr',
+                   'password': PASSWORD, 'password2': PASSWORD,
+                   'first_name': 'Suite', 'last_name': '{index}'}),
+    Scenario('auth.login', 'POST', '/login/', auth=False,
+             body={'email': '{login}', 'password': PASSWORD}),
+    Scenario('auth.refresh', 'POST', '/login/refresh/', auth=False,
+             body={'refresh': '{refresh}'}),
+    Scenario('projects.list', 'GET', '/projects/'),
+    Scenario('projects.create', 'POST', '/projects/', PROJECT, status=201),
+    Scenario('projects.retrieve', 'GET', PROJECTS + '/'),
+    Scenario('projects.update', 'PUT', '/projects/{target}/', PROJECT,
+             setup=SETUP_PROJECT),
+    Scenario('projects.destroy', 'DELETE', '/projects/{target}/',
+             setup=SETUP_PROJECT, status=204),
+    Scenario('contributors.list', 'GET', PROJECTS + '/contributors/'),
+    Scenario('contributors.create', 'POST', PROJECTS + '/contributors/',
+             {'email': 'suite.user{index}@softdesk.fr', 'role': 'Dev'},
+             status=201),
+    Scenario('contributors.retrieve', 'GET',
+             PROJECTS + '/contributors/{contributor}/'),
+    Scenario('contributors.destroy', 'DELETE',
+             PROJECTS + '/contributors/{target}/', status=202,
+             setup=(PROJECTS + '/contributors/',
+                    {'email': 'suite.removed{index}@softdesk.fr',
+                     'role': 'Dev'}, 'id')),
+    Scenario('issues.list', 'GET', ISSUES + '/'),
+    Scenario('issues.list_filtered', 'GET',
+             ISSUES + '/?status=a+faire&ordering=-created_time'),
+    Scenario('issues.list_cursor', 'GET', ISSUES + '/?cursor='),
+    Scenario('issues.create', 'POST', ISSUES + '/', ISSUE, status=201),
+    Scenario('issues.retrieve', 'GET', ISSUES + '/{issue}/'),
+    Scenario('issues.update', 'PUT', ISSUES + '/{target}/', ISSUE,
+             setup=SETUP_ISSUE),
+    Scenario('issues.destroy', 'DELETE', ISSUES + '/{target}/',
+             setup=SETUP_ISSUE, status=204),
+    Scenario('issues.bulk_export', 'GET', ISSUES + '/bulk/'),
+    Scenario('issues.bulk_import', 'POST', ISSUES + '/bulk/', status=201,
+             body='\n'.join(json.dumps(ISSUE) for _ in range(100)),
+             content_type='application/x-ndjson'),
+    Scenario('comments.list', 'GET', COMMENTS + '/'),
+    Scenario('comments.create', 'POST', COMMENTS + '/', COMMENT,
+             status=201),
+    Scenario('comments.retrieve', 'GET', COMMENTS + '/{comment}/'),
+    Scenario('comments.update', 'PUT', COMMENTS + '/{target}/', COMMENT,
+             setup=SETUP_COMMENT),
+    Scenario('comments.destroy', 'DELETE', COMMENTS + '/{target}/',
+             setup=SETUP_COMMENT, status=204),
+    Scenario('changes.list', 'GET', PROJECTS + '/changes/?since=0'),
+    Scenario('stats.list', 'GET', PROJECTS + '/stats/'),
+    Scenario('me.issues', 'GET', '/me/issues/'),
+    Scenario('me.comments', 'GET', '/me/comments/'),
+    Scenario('batch.issue_page', 'POST', '/batch/', {'requests': [
+        {'url': PROJECTS + '/'}, {'url': ISSUES + '/{issue}/'},
+        {'url': COMMENTS + '/'}, {'url': PROJECTS + '/contributors/'}]}),
+    Scenario('async.projects', 'GET', '/async/projects/'),
+    Scenario('async.project', 'GET', '/async' + PROJECTS + '/'),
+    Scenario('async.issues', 'GET', '/async' + ISSUES + '/'),
+    Scenario('async.issue', 'GET', '/async' + ISSUES + '/{issue}/'),
+    Scenario('async.comments', 'GET', '/async' + COMMENTS + '/'),
+    Scenario('async.comment', 'GET', '/async' + COMMENTS + '/{comment}/'),
+]
+
+
+def fill(value, values):
+    """Formats a path, or the strings of a JSON body, with `values`."""
+    if isinstance(value, dict):
+        return {key: fill(item, values) for key, item in value.items()}
+    if isinstance(value, list):
+        return [fill(item, values) for item in value]
+    return value.format(**values) if isinstance(value, str) else value
+
+
+class InProcessClient:
+    """The Django test client, in the benchmark's process."""
+    def __init__(self):
+        from rest_framework.test import APIClient
+        self.client = APIClient()
+
+    def request(self, method, path, body, token, content_type):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        headers = {'HTTP_AUTHORIZATION': f'Bearer {token}'} if token else {}
+        with CaptureQueriesContext(connection) as queries:
+            start = perf_counter()
+            response = self.client.generic(method, path, body or '',
+                                           content_type, **headers)
+            content = b''.join(response.streaming_content) \
+                if response.streaming else response.content
+            elapsed = perf_counter() - start
+        return response.status_code, elapsed, len(queries), content
+
+
+class HTTPClient:
+    """urllib against a local server, see InstrumentationMiddleware for
+    the query count of the Server-Timing header."""
+    def __init__(self, base):
+        self.base = base
+
+    def request(self, method, path, body, token, content_type):
+        headers = {'Content-Type': content_type}
+        if token:
+            headers['Authorization'] = f'Bearer {token}'
+        request = urllib.request.Request(
+            self.base + path, method=method, headers=headers,
+            data=body.encode() if body else None)
+        start = perf_counter()
+        try:
+            with urllib.request.urlopen(request) as response:
+                content = response.read()
+        except urllib.error.HTTPError as error:
+            content = error.read()
+            response = error
+        elapsed = perf_counter() - start
+        match = re.search(r'desc="(\d+) queries"',
+                          response.headers.get('Server-Timing', ''))
+        queries = int(match.group(1)) if match else None
+        return response.status, elapsed, queries, content
+
+
+def encode(body, values):
+    """JSON of a dict body, other bodies are sent as they are."""
+    if isinstance(body, dict):
+        return json.dumps(fill(body, values))
+    return body
+
+
+def dataset(scale, iterations):
+    """Generates the data set, returns the values the scenarios format
+    their paths and bodies with."""
+    from django.contrib.auth.hashers import make_password
+    from rest_framework_simplejwt.tokens import RefreshToken
+    from authentication.models import User
+    from benchmarks.fixtures import populate
+    from projects.models import Contributor, Issue, Comment
+
+    project = populate(**SCALES[scale])[0]
+    author = project.author_user_id
+    issue = Issue.objects.filter(project_id=project).order_by('id').first()
+    comment = Comment.objects.filter(issue_id=issue)\
+                             .order_by('comment_id').first()
+    contributor = Contributor.objects.filter(project_id=project)\
+                                     .exclude(user_id=author).first()
+    # Users to add as contributors, the login user
+    User.objects.bulk_create(
+        User(email=f'suite.{kind}{index}@softdesk.fr',
+             first_name='Suite', last_name=str(index), password='!')
+        for kind in ('user', 'removed') for index in range(iterations + 1))
+    User.objects.create(email='suite.login@softdesk.fr', first_name='Suite',
+                        last_name='Login', password=make_password(PASSWORD))
+    refresh = RefreshToken.for_user(author)
+    return {'project': project.project_id, 'issue': issue.id,
+            'comment': comment.comment_id,
+            'contributor': contributor.id,
+            'login': 'suite.login@softdesk.fr', 'refresh': str(refresh),
+            'token': str(refresh.access_token)}
+
+
+def run_scenario(client, scenario, values, iterations):
+    latencies, queries, errors = [], [], 0
+    # The first request warms up caches and is not counted
+    for index in range(iterations + 1):
+        current = dict(values, index=index)
+        token = values['token'] if scenario.auth else None
+        if scenario.setup:
+            path, body, key = scenario.setup
+            _, _, _, content = client.request(
+                'POST', fill(path, current), encode(body, current),
+                token, 'application/json')
+            current['target'] = json.loads(content)[key]
+        status, elapsed, count, _ = client.request(
+            scenario.method, fill(scenario.path, current),
+            encode(scenario.body, current), token,
+            scenario.content_type)
+        if index == 0:
+            continue
+        errors += status != scenario.status
+        latencies.append(elapsed)
+        if count is not None:
+            queries.append(count)
+    return {
+        'method': scenario.method,
+        'path': scenario.path,
+        'requests': iterations,
+        'errors': errors,
+        'throughput': iterations / sum(latencies),
+        'mean_ms': sum(latencies) / iterations * 1000,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p95_ms': percentile(latencies, 0.95) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'queries': max(queries) if queries else None,
+    }
+
+
+def revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'],
+                              capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_all(client, values, args):
+    pattern = re.compile(args.only) if args.only else None
+    results = {}
+    for scenario in SCENARIOS:
+        if pattern and not pattern.search(scenario.name):
+            continue
+        result = run_scenario(client, scenario, values, args.iterations)
+        results[scenario.name] = result
+        queries = result['queries'] if result['queries'] is not None \
+            else '-'
+        print(f"{scenario.name:<24} {result['throughput']:8.1f} req/s "
+              f"p50={result['p50_ms']:7.2f}ms p95={result['p95_ms']:7.2f}ms "
+              f"p99={result['p99_ms']:7.2f}ms queries={queries} "
+              f"errors={result['errors']}", file=sys.stderr)
+    return results
+
+
+def in_process(args):
+    from benchmarks import setup, test_database, uncached
+    setup()
+    with test_database(), uncached():
+        values = dataset(args.scale, args.iterations)
+        return run_all(InProcessClient(), values, args)
+
+
+def over_http(args):
+    directory = tempfile.mkdtemp()
+    os.environ['BENCHMARK_DATABASE'] = os.path.join(directory, 'db.sqlite3')
+    os.environ['DJANGO_SETTINGS_MODULE'] = 'benchmarks.settings'
+    os.environ['SOFTDESK_INSTRUMENTATION'] = 'on'
+    from benchmarks import setup
+    setup()
+    from django.core.management import call_command
+    call_command('migrate', verbosity=0)
+    values = dataset(args.scale, args.iterations)
+    port = free_port()
+    server = subprocess.Popen(server_command('wsgi', port), env=os.environ,
+                              stdout=subprocess.DEVNULL,
+                              stderr=subprocess.DEVNULL)
+    try:
+        wait_for(port)
+        return run_all(HTTPClient(f'http://127.0.0.1:{port}'), values, args)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def run(args):
+    results = over_http(args) if args.server else in_process(args)
+    report = {
+        'meta': {'scale': args.scale, **SCALES[args.scale],
+                 'iterations': args.iterations,
+                 'client': 'http' if args.server else 'in-process',
+                 'revision': revision(),
+                 'python': platform.python_version()},
+        'scenarios': results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as file:
+            file.write(output + '\n')
+    else:
+        print(output)
+    return 0
+
+
+def compare(args):
+    with open(args.baseline) as file:
+        baseline = json.load(file)
+    with open(args.current) as file:
+        current = json.load(file)
+    for key in ('scale', 'client'):
+        if baseline['meta'].get(key) != current['meta'].get(key):
+            print(f"warning: {key} differs: {baseline['meta'].get(key)} "
+                  f"!= {current['meta'].get(key)}")
+    regressions = 0
+    for name, new in current['scenarios'].items():
+        old = baseline['scenarios'].get(name)
+        if old is None:
+            print(f"{name:<24} new")
+            continue
+        change = new['p50_ms'] / old['p50_ms'] - 1
+        notes = []
+        if change > args.threshold:
+            notes.append(f"slower than {args.threshold:.0%}")
+        if None not in (old['queries'], new['queries']) and \
+                new['queries'] > old['queries']:
+            notes.append(f"queries {old['queries']} -> {new['queries']}")
+        if new['errors'] > old['errors']:
+            notes.append(f"errors {old['errors']} -> {new['errors']}")
+        regressions += bool(notes)
+        print(f"{name:<24} p50 {old['p50_ms']:8.2f}ms -> "
+              f"{new['p50_ms']:8.2f}ms {change:+7.1%} "
+              f"{'REGRESSION: ' + ', '.join(notes) if notes else ''}")
+    print(f"{regressions} regression(s)")
+    return 1 if regressions else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+    run_parser = commands.add_parser('run', help="Runs the scenarios")
+    run_parser.add_argument('--scale', choices=SCALES, default='small')
+    run_parser.add_argument('--iterations', type=int, default=50,
+                            help="Timed requests per scenario")
+    run_parser.add_argument('--only', help="Regex of the scenario names")
+    run_parser.add_argument('--server', action='store_true',
+                            help="Through HTTP to a local runserver")
+    run_parser.add_argument('--output', help="JSON report file, "
+                                             "printed otherwise")
+    compare_parser = commands.add_parser(
+        'compare', help="Compares two reports")
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=0.10,
+                                help="Tolerated p50 slowdown, 0.10: 10%%")
+    args = parser.parse_args()
+    command = run if args.command == 'run' else compare
+    sys.exit(command(args))
+
+
+if __name__ == '__main__':
+    main()
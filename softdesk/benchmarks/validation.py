@@ -0,0 +1,62 @@
+"""
+Validation throughput of bulk imported issues:
+- choices: the former ChoiceField loop, lowercasing every key for every
+  value, against the shared folded lookup of projects/validators.py;
+- rows: one IssueListSerializer per row, as the bulk import used to do,
+  against a RowValidator sharing one serializer for the whole batch.
+
+    python -m benchmarks.validation --rows 10000
+"""
+import argparse
+from benchmarks import setup, measure, report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    setup()
+    from projects.models import Issue
+    from projects.serializers import IssueListSerializer
+    from projects.validators import RowValidator, choice_validator
+
+    statuses = ['a faire', 'EN COURS', 'Terminé', 'termine']
+    values = [statuses[index % len(statuses)] for index in range(args.rows)]
+    rows = [{'title': f'Issue {index}', 'description': 'Imported',
+             'tag': 'bug', 'priority': 'Elevee', 'status': value,
+             'assignee_email': 'ada@softdesk.fr'}
+            for index, value in enumerate(values)]
+    choices = dict(Issue.Status.choices)
+
+    def loop_choice(value):
+        for key in choices.keys():
+            if key.lower() == value.lower():
+                return key
+        keys = list(choices.keys())
+        return f"status must be one of the following: {keys}"
+
+    validator = choice_validator(tuple(Issue.Status.choices), 'status')
+
+    def per_row_serializer():
+        for row in rows:
+            serializer = IssueListSerializer(data=row)
+            serializer.is_valid()
+
+    def row_validator():
+        shared = RowValidator(IssueListSerializer)
+        for row in rows:
+            shared.validate(row)
+
+    print(f"{args.rows} values / rows")
+    report('choices: key loop', measure(
+        lambda: [loop_choice(value) for value in values], args.repeat))
+    report('choices: folded lookup', measure(
+        lambda: [validator(value) for value in values], args.repeat))
+    report('rows: serializer per row',
+           measure(per_row_serializer, args.repeat))
+    report('rows: shared RowValidator', measure(row_validator, args.repeat))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,7 @@
 from django.contrib import admin
-from projects.models import Project, Contributor, Issue, Comment
+from projects.models import Project, Contributor, Issue, Comment,\
+                            ContributorRemoval
 
 
-admin.site.register([Project, Contributor, Issue, Comment])
+admin.site.register([Project, Contributor, Issue, Comment,
+                     ContributorRemoval])
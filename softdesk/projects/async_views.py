@@ -0,0 +1,171 @@
+"""
+Async read endpoints for ASGI deployments, under /async/.
+
+Same data and permissions as the list and retrieve actions of the
+viewsets. The token is checked on the event loop with the stateless JWT
+authentication, without any query. Django 4.0 has no async ORM, so each
+endpoint runs its queries and serialization in a single sync_to_async
+hop: the request holds a database connection only for that part, not
+while reading the request or writing the response to a slow client.
+"""
+from asgiref.sync import sync_to_async
+from django.db.models import Prefetch
+from django.http import HttpResponse, JsonResponse
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework_simplejwt.exceptions import InvalidToken
+from authentication.authentication import StatelessJWTAuthentication
+from projects.membership import get_memberships, get_permission
+from projects.models import Project, Contributor, Issue, Comment
+from projects.serializers import ProjectSerializerSelector,\
+                                 IssueSerializerSelector,\
+                                 CommentSerializerSelector
+from projects.views import count_subquery
+
+
+authentication = StatelessJWTAuthentication()
+FORBIDDEN = "You do not have permission to perform this action."
+
+
+def error(status, detail):
+    return JsonResponse({'detail': detail}, status=status)
+
+
+async def authenticate(request):
+    """Sets request.user from the JWT, returns an error response if the
+    request can not be served."""
+    if request.method != 'GET':
+        return error(405, f'Method "{request.method}" not allowed.')
+    try:
+        result = authentication.authenticate(request)
+    except (AuthenticationFailed, InvalidToken) as exception:
+        return error(401, str(exception.detail))
+    if result is None:
+        return error(401, "Authentication credentials were not provided.")
+    request.user = result[0]
+    return None
+
+
+async def is_contributor(request, project_id):
+    """Async counterpart of the IsContributor permission"""
+    permission = await sync_to_async(get_permission)(request, project_id)
+    return permission is not None
+
+
+def render(data):
+    return HttpResponse(JSONRenderer().render(data),
+                        content_type='application/json')
+
+
+def paginate(request, queryset, serializer_class):
+    """Same page format as the viewsets' default pagination"""
+    drf_request = Request(request)
+    paginator = LimitOffsetPagination()
+    page = paginator.paginate_queryset(queryset, drf_request)
+    data = serializer_class(page, many=True).data
+    return paginator.get_paginated_response(data).data
+
+
+def serialize_one(queryset, serializer_class, **lookup):
+    instance = queryset.filter(**lookup).first()
+    if instance is None:
+        return None
+    return serializer_class(instance).data
+
+
+async def respond_list(request, queryset, serializer_class):
+    data = await sync_to_async(paginate)(request, queryset, serializer_class)
+    return render(data)
+
+
+async def respond_detail(queryset, serializer_class, **lookup):
+    data = await sync_to_async(serialize_one)(queryset, serializer_class,
+                                              **lookup)
+    if data is None:
+        return error(404, "Not found.")
+    return render(data)
+
+
+def issues_of(project_id):
+    return Issue.objects.filter(project_id=project_id)\
+                        .select_related('author_user_id', 'assignee_user_id')
+
+
+def comments_of(project_id, issue_id):
+    return Comment.objects.filter(project_id=project_id, issue_id=issue_id)\
+                          .select_related('author_user_id')
+
+
+async def project_list(request):
+    failure = await authenticate(request)
+    if failure:
+        return failure
+    memberships = await sync_to_async(get_memberships)(request)
+    queryset = Project.objects.filter(project_id__in=list(memberships))\
+                              .select_related('author_user_id')\
+                              .order_by('project_id')
+    return await respond_list(request, queryset,
+                              ProjectSerializerSelector.list)
+
+
+async def project_detail(request, projects_pk):
+    failure = await authenticate(request)
+    if failure:
+        return failure
+    if not await is_contributor(request, projects_pk):
+        return error(404, "Not found.")
+    contributors = Contributor.objects.filter(pending_removal=False)\
+                                      .select_related('user_id')
+    queryset = Project.objects.select_related('author_user_id')\
+                              .prefetch_related(Prefetch('contributor_list',
+                                                         contributors))\
+                              .annotate(issue_count=count_subquery(
+                                                    Issue, 'project_id'))
+    return await respond_detail(queryset, ProjectSerializerSelector.detail,
+                                project_id=projects_pk)
+
+
+async def issue_list(request, projects_pk):
+    failure = await authenticate(request)
+    if failure:
+        return failure
+    if not await is_contributor(request, projects_pk):
+        return error(403, FORBIDDEN)
+    return await respond_list(request, issues_of(projects_pk).order_by('id'),
+                              IssueSerializerSelector.list)
+
+
+async def issue_detail(request, projects_pk, pk):
+    failure = await authenticate(request)
+    if failure:
+        return failure
+    if not await is_contributor(request, projects_pk):
+        return error(403, FORBIDDEN)
+    queryset = issues_of(projects_pk).annotate(
+                    comment_count=count_subquery(Comment, 'issue_id'))
+    return await respond_detail(queryset, IssueSerializerSelector.detail,
+                                id=pk)
+
+
+async def comment_list(request, projects_pk, issues_pk):
+    failure = await authenticate(request)
+    if failure:
+        return failure
+    if not await is_contributor(request, projects_pk):
+        return error(403, FORBIDDEN)
+    queryset = comments_of(projects_pk, issues_pk).order_by('comment_id')
+    return await respond_list(request, queryset,
+                              CommentSerializerSelector.list)
+
+
+async def comment_detail(request, projects_pk, issues_pk, pk):
+    failure = await authenticate(request)
+    if failure:
+        return failure
+    if not await is_contributor(request, projects_pk):
+        return error(403, FORBIDDEN)
+    return await respond_detail(comments_of(projects_pk, issues_pk),
+                                CommentSerializerSelector.detail,
+                                comment_id=pk)
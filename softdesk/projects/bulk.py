@@ -0,0 +1,120 @@
+"""Bulk import and streaming export of a project's issues."""
+import json
+from itertools import islice
+from django.db import transaction
+from rest_framework.utils.encoders import JSONEncoder
+from projects.models import Contributor, Issue, Comment, Change
+from projects.cache import bump_project
+from projects.changes import log_instances
+from projects import stats
+from projects.serializers import IssueListSerializer
+from projects.validators import RowValidator
+
+
+ISSUE_EXPORT_FIELDS = {
+    'id': 'id',
+    'title': 'title',
+    'description': 'description',
+    'tag': 'tag',
+    'priority': 'priority',
+    'status': 'status',
+    'assignee_email': 'assignee_user_id__email',
+    'author_email': 'author_user_id__email',
+    'created_time': 'created_time',
+}
+
+COMMENT_EXPORT_FIELDS = {
+    'comment_id': 'comment_id',
+    'issue_id': 'issue_id',
+    'description': 'description',
+    'author_email': 'author_user_id__email',
+    'created_time': 'created_time',
+}
+
+
+class RollbackImport(Exception):
+    pass
+
+
+def batches(iterable, size):
+    iterator = iter(iterable)
+    batch = list(islice(iterator, size))
+    while batch:
+        yield batch
+        batch = list(islice(iterator, size))
+
+
+def import_issues(lines, project_id, author, batch_size=1000):
+    """Validates the (line_number, data, error) lines of an NDJSON body
+    batch by batch and bulk creates the issues, all in one transaction.
+    Nothing is written if one line is invalid.
+    Returns the number of created issues and the list of line errors."""
+    contributors = Contributor.objects.filter(project_id=project_id,
+                                              pending_removal=False)
+    emails = dict(contributors.values_list('user_id__email', 'user_id'))
+    validator = RowValidator(IssueListSerializer)
+    created, errors = 0, []
+    try:
+        with transaction.atomic():
+            for batch in batches(lines, batch_size):
+                issues = validate_batch(batch, project_id, author, emails,
+                                        errors, validator)
+                if errors:
+                    continue
+                Issue.objects.bulk_create(issues, batch_size=batch_size)
+                log_instances(issues, project_id, Change.Action.CREATED)
+                stats.count_created(issues)
+                created += len(issues)
+            if errors:
+                raise RollbackImport
+            bump_project(project_id)
+    except RollbackImport:
+        created = 0
+    return created, errors
+
+
+def validate_batch(batch, project_id, author, emails, errors, validator):
+    """Appends the line errors of the batch to `errors` and returns the
+    valid issues, not saved. `validator` is the RowValidator of the issue
+    serializer, shared by all the lines."""
+    issues = []
+    for line_number, data, error in batch:
+        if error is not None:
+            errors.append({'line': line_number, 'errors': error})
+            continue
+        validated_data, error = validator.validate(data)
+        if error is not None:
+            errors.append({'line': line_number, 'errors': error})
+            continue
+        assignee_email = validated_data.pop('assignee_user_id', None)
+        if assignee_email is None:
+            assignee_id = author.user_id
+        elif assignee_email in emails:
+            assignee_id = emails[assignee_email]
+        else:
+            message = "assignee_email must be a valid contributor email"
+            errors.append({'line': line_number, 'errors': message})
+            continue
+        issues.append(Issue(**validated_data,
+                            project_id_id=project_id,
+                            author_user_id=author,
+                            assignee_user_id_id=assignee_id))
+    return issues
+
+
+def export_rows(queryset, fields, kind, chunk_size=2000):
+    """Yields one NDJSON line per row, reading the rows by chunks."""
+    rows = queryset.values_list(*fields.values())
+    for row in rows.iterator(chunk_size=chunk_size):
+        data = {'type': kind, **dict(zip(fields.keys(), row))}
+        yield json.dumps(data, cls=JSONEncoder, ensure_ascii=False) + '\n'
+
+
+def export_project(project_id):
+    """NDJSON lines of all the issues of the project, then of their
+    comments."""
+    issues = Issue.objects.filter(project_id=project_id).order_by('id')
+    comments = Comment.objects.filter(project_id=project_id)\
+                              .order_by('comment_id')
+    yield from export_rows(issues, ISSUE_EXPORT_FIELDS, 'issue')
+    yield from export_rows(comments, COMMENT_EXPORT_FIELDS, 'comment')
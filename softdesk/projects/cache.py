@@ -0,0 +1,121 @@
+"""
+Response cache of the read endpoints.
+
+Responses are stored under keys built from the request, the user and a
+version of every project they depend on. Saving or deleting a project,
+issue, comment or contributor bumps the version of its project, so stale
+responses are never read again and age out of the size-bounded cache.
+"""
+import hashlib
+import json
+import uuid
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+from projects.membership import get_memberships, parse_project_id
+from projects.routing import pin_project
+
+
+CACHE_ALIAS = 'responses'
+
+
+def version_key(project_id):
+    return f"version:project:{project_id}"
+
+
+def get_versions(project_ids):
+    """Current version of each project. A missing version (never set or
+    evicted) gets a new unique value, so it can not match older keys."""
+    cache = caches[CACHE_ALIAS]
+    keys = {version_key(project_id): project_id
+            for project_id in project_ids}
+    versions = cache.get_many(keys)
+    missing = {key: uuid.uuid4().hex for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing)
+        versions.update(missing)
+    return [versions[key] for key in keys]
+
+
+def bump_project(project_id):
+    """Invalidates the cached responses depending on the project. The
+    version is bumped again on commit: a response cached from a concurrent
+    request before the commit would otherwise hold the old rows. The
+    project is also pinned to the primary database, see projects/routing.py.
+    """
+    def bump():
+        caches[CACHE_ALIAS].set(version_key(project_id), uuid.uuid4().hex)
+        pin_project(project_id)
+    bump()
+    transaction.on_commit(bump)
+
+
+class CachedResponseMixin:
+    """
+    Caches list and retrieve responses per user and per project versions,
+    and answers 304 Not Modified when If-None-Match holds the ETag of the
+    current response. Permissions are still checked before the cache is
+    read. Views define `get_cache_projects` returning the ids of the
+    projects the response depends on.
+    """
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request,
+                                    *args, **kwargs)
+
+    def get_cache_key(self, request):
+        project_ids = sorted(self.get_cache_projects(request))
+        parts = [request.build_absolute_uri(),
+                 request.user.user_id,
+                 request.accepted_media_type,
+                 project_ids,
+                 get_versions(project_ids)]
+        digest = hashlib.md5(json.dumps(parts).encode()).hexdigest()
+        return f"response:{digest}"
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        cache = caches[CACHE_ALIAS]
+        key = self.get_cache_key(request)
+        cached = cache.get(key)
+        if cached is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            content = json.dumps(response.data, cls=JSONEncoder)
+            etag = f'"{hashlib.md5(content.encode()).hexdigest()}"'
+            cached = (etag, response.data)
+            cache.set(key, cached)
+        etag, data = cached
+        if_none_match = self.if_none_match(request)
+        if etag in if_none_match or '*' in if_none_match:
+            return Response(status=status.HTTP_304_NOT_MODIFIED,
+                            headers={'ETag': etag})
+        return Response(data, headers={'ETag': etag})
+
+    def if_none_match(self, request):
+        header = request.headers.get('If-None-Match', '')
+        return [tag.strip() for tag in header.split(',')]
+
+
+class ProjectCachedResponseMixin(CachedResponseMixin):
+    """The project list depends on every project of the user."""
+    def get_cache_projects(self, request):
+        if self.detail:
+            return [parse_project_id(self.kwargs['pk'])]
+        return list(get_memberships(request))
+
+
+class ProjectChildCachedResponseMixin(CachedResponseMixin):
+    """Nested routes only depend on their project."""
+    def get_cache_projects(self, request):
+        return [parse_project_id(self.kwargs['projects_pk'])]
+
+
+class MembershipsCachedResponseMixin(CachedResponseMixin):
+    """Responses spanning every project of the user."""
+    def get_cache_projects(self, request):
+        return list(get_memberships(request))
@@ -0,0 +1,180 @@
+"""
+Change log of the projects, read by /projects/{id}/changes/.
+
+Every write of an issue, comment or contributor appends a Change to the
+log of its project. Writes through the models are logged by the signals
+of projects/signals.py. The set-based updates and deletes of
+projects/deletion.py, projects/bulk.py and Contributor.delete send no
+signal and log their rows here themselves, with one INSERT ... SELECT.
+
+Clients keep their copy of a project in sync with
+
+    GET /projects/{id}/changes/?since=<last seq>&wait=<seconds>
+
+which returns the changes after `since` in order, with the current data
+of the objects still there. With `wait`, the request is held until a
+change comes or the time is up. Commits in this process wake the waiting
+requests at once; changes committed by other processes are seen by
+polling the (project_id, seq) index every CHANGES_POLL_INTERVAL seconds.
+
+`committed` is sent on commit with the project of the changes, for the
+push endpoint of projects/push.py.
+"""
+import threading
+import time
+from collections import defaultdict
+from datetime import timedelta
+from functools import partial
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.dispatch import Signal
+from django.utils import timezone
+from projects.models import Change, Comment, Contributor, Issue
+from projects.rows import RowSerializer
+from projects.serializers import CommentListSerializer,\
+                                 ContributorListSerializer,\
+                                 IssueListSerializer
+
+
+# kind, column of the parent, serializer of the data
+LOGGED = {
+    Issue: (Change.Kind.ISSUE, None, IssueListSerializer),
+    Comment: (Change.Kind.COMMENT, 'issue_id', CommentListSerializer),
+    Contributor: (Change.Kind.CONTRIBUTOR, None, ContributorListSerializer),
+}
+MODELS = {kind: model for model, (kind, _, _) in LOGGED.items()}
+
+condition = threading.Condition()
+committed = Signal()
+
+
+def notify(project_id):
+    """Wakes the waiting requests, on commit."""
+    with condition:
+        condition.notify_all()
+    committed.send(sender=Change, project_id=project_id)
+
+
+def log_instance(instance, action):
+    kind, parent, _ = LOGGED[type(instance)]
+    project_id = instance.project_id_id
+    Change.objects.create(
+        project_id=project_id, kind=kind, action=action,
+        object_id=instance.pk,
+        parent_id=getattr(instance, f'{parent}_id') if parent else None)
+    transaction.on_commit(partial(notify, project_id))
+
+
+def log_instances(instances, project_id, action):
+    """Logs objects written by bulk_create or bulk_update."""
+    changes = []
+    for instance in instances:
+        kind, parent, _ = LOGGED[type(instance)]
+        changes.append(Change(
+            project_id=project_id, kind=kind, action=action,
+            object_id=instance.pk,
+            parent_id=getattr(instance, f'{parent}_id') if parent else None))
+    Change.objects.bulk_create(changes)
+    transaction.on_commit(partial(notify, project_id))
+
+
+def log_rows(queryset, project_id, action):
+    """Logs every row of the queryset, all from the project, with one
+    INSERT ... SELECT, before a raw delete or an update changing the rows it
+    filters on."""
+    model = queryset.model
+    kind, parent, _ = LOGGED[model]
+    meta = model._meta
+    connection = connections[router.db_for_write(Change)]
+    quote = connection.ops.quote_name
+    ids, params = queryset.order_by().values('pk').query\
+                          .get_compiler(connection=connection).as_sql()
+    project = quote(meta.get_field('project_id').column)
+    parent = quote(meta.get_field(parent).column) if parent else 'NULL'
+    pk = quote(meta.pk.column)
+    created_time = connection.ops.adapt_datetimefield_value(timezone.now())
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {quote(Change._meta.db_table)} "
+            f"(project_id, kind, action, object_id, parent_id, "
+            f"created_time) "
+            f"SELECT {project}, %s, %s, {pk}, {parent}, %s "
+            f"FROM {quote(meta.db_table)} WHERE {pk} IN ({ids})",
+            [kind, action, created_time, *params])
+        count = cursor.rowcount
+    transaction.on_commit(partial(notify, project_id))
+    return count
+
+
+def forget_project(project_id):
+    """Deletes the log of a deleted project."""
+    return Change.objects.filter(project_id=project_id)._raw_delete(
+        router.db_for_write(Change))
+
+
+def last_seq(project_id):
+    return Change.objects.filter(project_id=project_id)\
+                         .order_by('-seq')\
+                         .values_list('seq', flat=True).first() or 0
+
+
+def changes_after(project_id, since, limit):
+    """Up to `limit` + 1 changes after `since`. With CHANGES_SETTLE_SECONDS,
+    changes newer than that are held back: on PostgreSQL a transaction can
+    commit a change after another one with a higher seq, which a client
+    already past it would miss. SQLite serializes the writers."""
+    changes = Change.objects.filter(project_id=project_id, seq__gt=since)
+    settle = getattr(settings, 'CHANGES_SETTLE_SECONDS', 0)
+    if settle:
+        changes = changes.filter(
+            created_time__lte=timezone.now() - timedelta(seconds=settle))
+    return list(changes.order_by('seq')[:limit + 1])
+
+
+def wait_for_changes(project_id, since, limit, timeout):
+    deadline = time.monotonic() + timeout
+    interval = getattr(settings, 'CHANGES_POLL_INTERVAL', 1)
+    while True:
+        changes = changes_after(project_id, since, limit)
+        remaining = deadline - time.monotonic()
+        if changes or remaining <= 0:
+            return changes
+        with condition:
+            condition.wait(min(interval, remaining))
+
+
+def snapshots(changes):
+    """{(kind, id): data} of the changed objects still there, rendered by
+    their list serializer, in one query per kind."""
+    wanted = defaultdict(set)
+    for change in changes:
+        if change.action != Change.Action.DELETED:
+            wanted[change.kind].add(change.object_id)
+    data = {}
+    for kind, ids in wanted.items():
+        model = MODELS[kind]
+        serializer_class = LOGGED[model][2]
+        fields = list(serializer_class.Meta.fields)
+        queryset = model.objects.filter(pk__in=ids)
+        rows = RowSerializer.for_fields(serializer_class, fields)
+        if rows is not None:
+            values = list(rows.values(queryset, ['pk']))
+            items = rows.render(values)
+            keys = [row['pk'] for row in values]
+        else:
+            instances = list(queryset)
+            items = serializer_class(instances, many=True).data
+            keys = [instance.pk for instance in instances]
+        data.update(((kind, key), item) for key, item in zip(keys, items))
+    return data
+
+
+def render(changes):
+    data = snapshots(changes)
+    return [{'seq': change.seq,
+             'type': change.kind,
+             'action': change.action,
+             'id': change.object_id,
+             'issue_id': change.parent_id,
+             'data': data.get((change.kind, change.object_id))}
+            for change in changes]
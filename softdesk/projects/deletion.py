@@ -0,0 +1,108 @@
+"""
+Set-based deletes for the project tree.
+
+Django's deletion Collector loads every cascaded row as a model instance to
+send the delete signals, which for a large project means all its issues,
+contributors and, as soon as Comment has receivers, all its comments. With
+FAST_DELETE enabled, projects and issues are deleted with one DELETE per
+table in dependency order, no instance is loaded and no signal is sent:
+whatever the receivers maintain is updated here instead: the response
+cache, the memberships, the change log of projects/changes.py and the
+issue counts of projects/stats.py. Each delete runs in one transaction,
+with its change log rows and counts.
+"""
+from django.conf import settings
+from django.db import transaction
+from projects.models import Project, Contributor, ContributorRemoval,\
+                            Issue, Comment, Change
+from projects.membership import invalidate_memberships
+from projects.cache import bump_project
+from projects.changes import log_rows, forget_project
+from projects import stats
+
+
+def fast_delete_enabled():
+    return getattr(settings, 'FAST_DELETE', False)
+
+
+def raw_delete(queryset):
+    """DELETE ... WHERE on the queryset's filters, returns the row count."""
+    return queryset._raw_delete(queryset.db)
+
+
+@transaction.atomic
+def delete_project(project):
+    if not fast_delete_enabled():
+        return project.delete()
+    project_id = project.project_id
+    user_ids = list(Contributor.objects.filter(project_id=project_id)
+                                       .values_list('user_id', flat=True))
+    deleted = {
+        Comment: raw_delete(Comment.objects.filter(project_id=project_id)),
+        Issue: raw_delete(Issue.objects.filter(project_id=project_id)),
+        ContributorRemoval: raw_delete(
+            ContributorRemoval.objects.filter(project_id=project_id)),
+        Contributor: raw_delete(
+            Contributor.objects.filter(project_id=project_id)),
+        Project: raw_delete(Project.objects.filter(project_id=project_id)),
+    }
+    forget_project(project_id)
+    stats.forget_project(project_id)
+    for user_id in user_ids:
+        invalidate_memberships(user_id)
+    bump_project(project_id)
+    return deleted_summary(deleted)
+
+
+@transaction.atomic
+def delete_issue(issue):
+    if not fast_delete_enabled():
+        return issue.delete()
+    stats.lock_counted(issue)
+    comments = Comment.objects.filter(issue_id=issue.id)
+    issues = Issue.objects.filter(id=issue.id)
+    log_rows(comments, issue.project_id_id, Change.Action.DELETED)
+    log_rows(issues, issue.project_id_id, Change.Action.DELETED)
+    stats.count_deleted(issue)
+    deleted = {
+        Comment: raw_delete(comments),
+        Issue: raw_delete(issues),
+    }
+    bump_project(issue.project_id_id)
+    return deleted_summary(deleted)
+
+
+@transaction.atomic
+def delete_comments(comments, project_id):
+    """Deletes the comments of the queryset, all from the project."""
+    if not fast_delete_enabled():
+        return comments.delete()
+    log_rows(comments, project_id, Change.Action.DELETED)
+    deleted = {Comment: raw_delete(comments)}
+    bump_project(project_id)
+    return deleted_summary(deleted)
+
+
+@transaction.atomic
+def delete_user_issues(issues, project_id):
+    """Deletes the issues of the queryset, all from the project, and the
+    comments on them."""
+    if not fast_delete_enabled():
+        return issues.delete()
+    comments = Comment.objects.filter(issue_id__in=issues.values('id'))
+    log_rows(comments, project_id, Change.Action.DELETED)
+    log_rows(issues, project_id, Change.Action.DELETED)
+    stats.count_deleted_rows(issues)
+    deleted = {
+        Comment: raw_delete(comments),
+        Issue: raw_delete(issues),
+    }
+    bump_project(project_id)
+    return deleted_summary(deleted)
+
+
+def deleted_summary(deleted):
+    """Same (total, {label: count}) value as QuerySet.delete()"""
+    counts = {model._meta.label: count for model, count in deleted.items()
+              if count}
+    return sum(counts.values()), counts
@@ -0,0 +1,111 @@
+"""
+Sparse responses of the read endpoints.
+
+    ?fields=id,title        only these fields
+    ?expand=comments        adds fields rendered on demand only
+
+Serializers list their on demand fields in `Meta.expandable`. Views read
+the same selection to skip the joins, prefetches, annotations and columns
+of the fields left out. Writes always use the full serializer.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.serializers import ValidationError
+
+
+def split(value):
+    return [name.strip() for name in value.split(',') if name.strip()]
+
+
+def check(param, names, available):
+    unknown = [name for name in names if name not in available]
+    if unknown:
+        message = f"{unknown} not among {available}"
+        raise ValidationError({param: message})
+
+
+def selected_fields(request, serializer_class):
+    """Names of the fields of `serializer_class` to render, in the order
+    the serializer declares them."""
+    meta = serializer_class.Meta
+    expandable = list(getattr(meta, 'expandable', []))
+    if request is None or request.method not in SAFE_METHODS:
+        return list(meta.fields)
+    available = list(meta.fields) + expandable
+    params = request.query_params
+    names = set(meta.fields)
+    if 'fields' in params:
+        names = set(split(params['fields']))
+        check('fields', names, available)
+    expand = split(params.get('expand', ''))
+    check('expand', expand, expandable)
+    names.update(expand)
+    return [name for name in available if name in names]
+
+
+def deferred_fields(serializer_class, names):
+    """Model fields only read by the serializer fields left out of
+    `names`, to pass to QuerySet.defer()."""
+    meta = serializer_class.Meta
+    declared = serializer_class._declared_fields
+
+    def source(name):
+        field = declared.get(name)
+        return field.source or name if field is not None else name
+
+    used = {source(name) for name in names}
+    unused = {source(name) for name in meta.fields if name not in names}
+    deferred = []
+    for name in sorted(unused - used):
+        try:
+            field = meta.model._meta.get_field(name)
+        except FieldDoesNotExist:
+            continue
+        if field.concrete and not field.primary_key:
+            deferred.append(name)
+    return deferred
+
+
+class SparseFieldsMixin:
+    """Renders the fields selected by ?fields= and ?expand= on the top
+    level serializer, nested serializers keep all their fields."""
+    def get_field_names(self, declared_fields, info):
+        root = self.root
+        if root is not self and getattr(root, 'child', None) is not self:
+            return list(self.Meta.fields)
+        return selected_fields(self.context.get('request'), type(self))
+
+
+class SparseQuerysetMixin:
+    """
+    For the views: `select_fields` shapes the queryset after the selected
+    fields. `related` maps serializer fields to select_related paths,
+    `get_prefetches` to Prefetch objects and `get_annotations` to
+    (alias, expression) pairs.
+    """
+    related = {}
+
+    def get_prefetches(self):
+        return {}
+
+    def get_annotations(self):
+        return {}
+
+    def select_fields(self, queryset):
+        serializer_class = self.get_serializer_class()
+        fields = selected_fields(self.request, serializer_class)
+        related = [path for name, path in self.related.items()
+                   if name in fields]
+        if related:
+            queryset = queryset.select_related(*related)
+        prefetches = [prefetch
+                      for name, prefetch in self.get_prefetches().items()
+                      if name in fields]
+        if prefetches:
+            queryset = queryset.prefetch_related(*prefetches)
+        annotations = dict(annotation for name, annotation
+                           in self.get_annotations().items()
+                           if name in fields)
+        if annotations:
+            queryset = queryset.annotate(**annotations)
+        return queryset.defer(*deferred_fields(serializer_class, fields))
@@ -0,0 +1,127 @@
+"""
+Query parameters of the issue list, each mapped to an indexed predicate.
+
+    ?status=a faire,en cours   ?priority=elevee   ?tag=bug
+    ?assignee_email=ada@softdesk.fr   ?author=ada@softdesk.fr (or user id)
+    ?created_after=2022-05-01   ?created_before=2022-06-01T12:00
+    ?search=crash login   ?ordering=-created_time
+
+Choices are matched without case nor accents and several values are
+separated by commas. `search` matches every word in the title or the
+description through the full-text index of migration 0016: FTS5 on
+SQLite, a tsvector column on PostgreSQL.
+"""
+from django.db import connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils.timezone import is_naive, make_aware
+from rest_framework.filters import BaseFilterBackend
+from rest_framework.serializers import ValidationError
+from projects.models import Issue
+from projects.validators import choice_validator
+
+
+FTS_TABLE = 'projects_issue_fts'
+# Largest id of a BigAutoField
+MAX_ID = 2 ** 63 - 1
+
+
+def parse_choices(param, value, choices):
+    validator = choice_validator(tuple(choices), param)
+    values = []
+    for item in value.split(','):
+        key = validator.get(item)
+        if key is None:
+            message = f"{param} must be among {list(validator.keys)}"
+            raise ValidationError({param: message})
+        values.append(key)
+    return values
+
+
+def parse_time(param, value):
+    try:
+        time = parse_datetime(value)
+        if time is None:
+            date = parse_date(value)
+            if date is None:
+                raise ValueError(value)
+            time = parse_datetime(f"{date.isoformat()}T00:00")
+    except ValueError:
+        raise ValidationError(
+            {param: "Expected a date or a datetime in ISO 8601"})
+    return make_aware(time) if is_naive(time) else time
+
+
+def parse_user(value):
+    """User id or email of ?author="""
+    if not value.isdecimal():
+        return {'author_user_id__email': value}
+    if int(value) > MAX_ID:
+        raise ValidationError({'author': "Unknown user id"})
+    return {'author_user_id': int(value)}
+
+
+def fts_query(text):
+    """FTS5 query matching every word, quoted so that user input can not
+    use (or break) the FTS5 query syntax."""
+    words = text.split()
+    return ' '.join('"{}"'.format(word.replace('"', '""')) for word in words)
+
+
+def search(queryset, text):
+    if not text.split():
+        return queryset
+    vendor = connections[queryset.db].vendor
+    if vendor == 'sqlite':
+        return queryset.filter(id__in=RawSQL(
+            f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s",
+            [fts_query(text)]))
+    if vendor == 'postgresql':
+        return queryset.extra(
+            where=["projects_issue.search_vector"
+                   " @@ plainto_tsquery('simple', %s)"],
+            params=[text])
+    condition = Q()
+    for word in text.split():
+        condition &= Q(title__icontains=word) | Q(description__icontains=word)
+    return queryset.filter(condition)
+
+
+class IssueFilterBackend(BaseFilterBackend):
+    choice_params = {
+        'status': Issue.Status.choices,
+        'priority': Issue.Priority.choices,
+        'tag': Issue.Tag.choices,
+    }
+    orderings = {
+        'created_time': ('created_time', 'id'),
+        '-created_time': ('-created_time', '-id'),
+    }
+
+    def filter_queryset(self, request, queryset, view):
+        params = request.query_params
+        for param, choices in self.choice_params.items():
+            if param in params:
+                values = parse_choices(param, params[param], choices)
+                queryset = queryset.filter(**{f'{param}__in': values})
+        if 'assignee_email' in params:
+            queryset = queryset.filter(
+                assignee_user_id__email=params['assignee_email'])
+        if 'author' in params:
+            queryset = queryset.filter(**parse_user(params['author']))
+        if 'created_after' in params:
+            queryset = queryset.filter(created_time__gte=parse_time(
+                'created_after', params['created_after']))
+        if 'created_before' in params:
+            queryset = queryset.filter(created_time__lt=parse_time(
+                'created_before', params['created_before']))
+        if 'search' in params:
+            queryset = search(queryset, params['search'])
+        if 'ordering' in params:
+            ordering = self.orderings.get(params['ordering'])
+            if ordering is None:
+                message = f"ordering must be among {list(self.orderings)}"
+                raise ValidationError({'ordering': message})
+            queryset = queryset.order_by(*ordering)
+        return queryset
@@ -0,0 +1,142 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIClient
+from authentication.models import User
+from projects.models import Project, Contributor, Issue, Comment
+
+
+EXPLAINED = ('SELECT', 'UPDATE', 'DELETE')
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = """Calls every API endpoint on a sample data set, runs EXPLAIN on
+    the queries they issue and flags full table scans and sorts which do not
+    use an index. The sample data is
+    created in a transaction which is always rolled back."""
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fail-on-scan', action='store_true',
+                            help="Exit with an error if a scan is found.")
+
+    def handle(self, *args, **options):
+        scans = []
+        allowed_hosts = [*settings.ALLOWED_HOSTS, 'testserver']
+        try:
+            with transaction.atomic(), override_settings(
+                                            ALLOWED_HOSTS=allowed_hosts):
+                for name, method, url in self.endpoints():
+                    scans += self.explain_endpoint(name, method, url)
+                raise Rollback
+        except Rollback:
+            pass
+        if not scans:
+            self.stdout.write(self.style.SUCCESS("No full scan found."))
+            return
+        self.stdout.write(self.style.WARNING(f"{len(scans)} full scan(s):"))
+        for name, detail in scans:
+            self.stdout.write(f"  {name}: {detail}")
+        if options['fail_on_scan']:
+            raise CommandError("Full table scans found.")
+
+    def endpoints(self):
+        """Builds the sample data set and yields (name, method, url)."""
+        author = User.objects.create(email='explain.author@softdesk.fr',
+                                     first_name='Explain',
+                                     last_name='Author')
+        member = User.objects.create(email='explain.member@softdesk.fr',
+                                     first_name='Explain',
+                                     last_name='Member')
+        project = Project.objects.create(title='Explain',
+                                         description='Explain',
+                                         type='back-end',
+                                         author_user_id=author)
+        Contributor.objects.create(user_id=author, project_id=project,
+                                   permission='Auteur', role='Chef')
+        contributor = Contributor.objects.create(user_id=member,
+                                                 project_id=project,
+                                                 permission='Contributeur',
+                                                 role='Dev')
+        issue = Issue.objects.create(title='Explain', description='Explain',
+                                     tag='BUG', priority='FAIBLE',
+                                     status='A faire', project_id=project,
+                                     author_user_id=member,
+                                     assignee_user_id=member)
+        comment = Comment.objects.create(description='Explain',
+                                         author_user_id=member,
+                                         project_id=project,
+                                         issue_id=issue)
+        self.client = APIClient()
+        self.client.force_authenticate(user=author)
+        projects = '/projects/'
+        project_url = f'{projects}{project.project_id}/'
+        contributors = f'{project_url}contributors/'
+        issues = f'{project_url}issues/'
+        comments = f'{issues}{issue.id}/comments/'
+        yield 'ProjectViewSet.list', 'get', projects
+        yield 'ProjectViewSet.retrieve', 'get', project_url
+        yield 'ContributorViewSet.list', 'get', contributors
+        yield ('ContributorViewSet.retrieve', 'get',
+               f'{contributors}{contributor.id}/')
+        yield 'IssueViewSet.list', 'get', issues
+        yield 'IssueViewSet.list (cursor)', 'get', \
+            f'{issues}?pagination=cursor'
+        for query in ('status=a%20faire', 'priority=faible,elevee',
+                      'tag=bug', f'assignee_email={member.email}',
+                      f'author={member.email}', 'created_after=2022-01-01',
+                      'search=explain', 'ordering=-created_time',
+                      'ordering=-created_time&pagination=cursor'):
+            yield f'IssueViewSet.list ({query})', 'get', f'{issues}?{query}'
+        yield 'IssueViewSet.retrieve', 'get', f'{issues}{issue.id}/'
+        yield 'CommentViewSet.list', 'get', comments
+        yield 'CommentViewSet.list (cursor)', 'get', \
+            f'{comments}?pagination=cursor'
+        yield ('CommentViewSet.retrieve', 'get',
+               f'{comments}{comment.comment_id}/')
+        yield 'MeIssueViewSet.list', 'get', '/me/issues/'
+        yield 'MeCommentViewSet.list', 'get', '/me/comments/'
+        yield 'ChangeViewSet.list', 'get', f'{project_url}changes/'
+        yield ('ChangeViewSet.list (since)', 'get',
+               f'{project_url}changes/?since=0')
+        yield 'StatsViewSet.list', 'get', f'{project_url}stats/'
+        yield ('ContributorViewSet.destroy', 'delete',
+               f'{contributors}{contributor.id}/')
+        yield 'ProjectViewSet.destroy', 'delete', project_url
+
+    def explain_endpoint(self, name, method, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(self.client, method)(url)
+        if response.status_code >= 400:
+            raise CommandError(f"{name} answered {response.status_code}")
+        scans = []
+        for query in queries.captured_queries:
+            sql = query['sql']
+            if not sql.lstrip().upper().startswith(EXPLAINED):
+                continue
+            for detail in self.full_scans(sql):
+                scans.append((name, detail))
+        self.stdout.write(f"{name}: {len(queries)} queries")
+        return scans
+
+    def full_scans(self, sql):
+        """Yields the plan lines reading a whole table."""
+        with connection.cursor() as cursor:
+            if connection.vendor == 'sqlite':
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+                for row in cursor.fetchall():
+                    detail = row[-1]
+                    if detail.startswith('SCAN') and 'INDEX' not in detail:
+                        yield f'{detail} in {sql}'
+                    elif detail.startswith('USE TEMP B-TREE'):
+                        yield f'{detail} in {sql}'
+            else:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+                cursor.execute(f'EXPLAIN {sql}')
+                for row in cursor.fetchall():
+                    if 'Seq Scan' in row[0] or 'Sort' in row[0]:
+                        yield f'{row[0].strip()} in {sql}'
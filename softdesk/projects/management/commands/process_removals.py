@@ -0,0 +1,39 @@
+import time
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from projects.models import ContributorRemoval
+
+
+class Command(BaseCommand):
+    help = """Worker cleaning up the contributions of removed contributors,
+    see ContributorRemoval."""
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--sleep', type=float, default=1.0,
+                            help="Seconds to wait when no job is pending.")
+        parser.add_argument('--stale-after', type=int, default=300,
+                            help="Seconds after which a running job without "
+                                 "progress is requeued.")
+        parser.add_argument('--once', action='store_true',
+                            help="Exit when no job is left.")
+
+    def handle(self, *args, **options):
+        stale_after = timedelta(seconds=options['stale_after'])
+        while True:
+            ContributorRemoval.requeue_stale(timezone.now() - stale_after)
+            job = ContributorRemoval.claim_next()
+            if job is None:
+                if options['once']:
+                    return
+                time.sleep(options['sleep'])
+                continue
+            try:
+                job.run(options['batch_size'])
+            except Exception as error:
+                self.stderr.write(f"{job} failed: {error!r}")
+                continue
+            self.stdout.write(f"{job}: {job.reassigned_issues} issues "
+                              f"reassigned, {job.deleted_issues} issues and "
+                              f"{job.deleted_comments} comments deleted")
@@ -0,0 +1,26 @@
+import time
+from django.core.management.base import BaseCommand
+from projects.stats import rebuild
+
+
+class Command(BaseCommand):
+    help = """Rebuilds the issue counts of /projects/{id}/stats/ from the
+    issues, in one set-based pass, see projects/stats.py. Needed after
+    writes bypassing the application, e.g. manual SQL."""
+
+    def add_arguments(self, parser):
+        parser.add_argument('--project', type=int, action='append',
+                            dest='projects',
+                            help="Only this project, can be repeated.")
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        counts, wrong = rebuild(options['projects'])
+        elapsed = time.perf_counter() - start
+        self.stdout.write(f"{counts} counts rebuilt in {elapsed:.1f}s")
+        if wrong:
+            ids = ', '.join(str(project_id) for project_id in sorted(wrong))
+            self.stdout.write(self.style.WARNING(
+                f"{len(wrong)} projects had wrong counts: {ids}"))
+        else:
+            self.stdout.write(self.style.SUCCESS("All counts were right."))
@@ -0,0 +1,245 @@
+import csv
+import io
+import random
+import time
+from datetime import timedelta
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+from authentication.models import User
+from projects.models import Project, Contributor, Issue, Comment
+from projects.stats import rebuild
+
+
+WORDS = ['login', 'signup', 'token', 'project', 'issue', 'comment', 'page',
+         'list', 'export', 'import', 'search', 'cache', 'database', 'mobile',
+         'android', 'ios', 'api', 'timeout', 'crash', 'layout', 'email',
+         'password', 'filter', 'pagination', 'upload', 'report']
+ROLES = ['Dev', 'Dev', 'Dev', 'QA', 'Designer', 'Product owner']
+
+
+def weighted(choices, weights):
+    """Population in which each choice appears `weight` times, for
+    random.choice."""
+    return [choice for choice, weight in zip(choices, weights)
+            for _ in range(weight)]
+
+
+TYPES = weighted(Project.Type.values, [4, 3, 2, 2])
+TAGS = weighted(Issue.Tag.values, [5, 3, 2])
+PRIORITIES = weighted(Issue.Priority.values, [10, 7, 3])
+STATUSES = weighted(Issue.Status.values, [3, 2, 5])
+
+
+class TableWriter:
+    """Buffers the rows of a model, as tuples of `fields` values, and
+    writes them `batch_size` at a time: COPY on PostgreSQL, a prepared
+    INSERT run by executemany elsewhere."""
+    def __init__(self, model, fields, batch_size):
+        self.table = model._meta.db_table
+        self.columns = [model._meta.get_field(name).column
+                        for name in fields]
+        self.batch_size = batch_size
+        self.rows = []
+        self.count = 0
+
+    def add(self, row):
+        self.rows.append(row)
+        if len(self.rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.rows:
+            return
+        quote = connection.ops.quote_name
+        columns = ', '.join(quote(column) for column in self.columns)
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                buffer = io.StringIO()
+                csv.writer(buffer).writerows(self.rows)
+                buffer.seek(0)
+                cursor.copy_expert(f"COPY {quote(self.table)} ({columns}) "
+                                   f"FROM STDIN WITH (FORMAT csv)", buffer)
+            else:
+                placeholders = ', '.join(['%s'] * len(self.columns))
+                cursor.executemany(
+                    f"INSERT INTO {quote(self.table)} ({columns}) "
+                    f"VALUES ({placeholders})", self.rows)
+        self.count += len(self.rows)
+        self.rows = []
+
+
+def next_id(model):
+    return (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+
+
+def spread(total, weights):
+    """Splits `total` in integers proportional to `weights`."""
+    scale = total / sum(weights)
+    counts = [int(weight * scale) for weight in weights]
+    for index in range(total - sum(counts)):
+        counts[index % len(counts)] += 1
+    return counts
+
+
+class Command(BaseCommand):
+    help = """Fills the database with generated users, projects,
+    contributors, issues and comments, e.g. for load tests. Rows are
+    written in batches with explicit ids, bypassing the models and their
+    signals: restart the servers afterwards to drop their caches. The issue
+    counts of /projects/{id}/stats/ are rebuilt at the end. All users
+    share one password hash. Issues per project follow a Pareto
+    distribution, comments per issue an exponential one. Memory use depends
+    on --batch-size, not on the number of rows."""
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--projects', type=int, default=100)
+        parser.add_argument('--contributors', type=int, default=8,
+                            help="Mean number of contributors per project, "
+                                 "author included.")
+        parser.add_argument('--issues', type=int, default=100000)
+        parser.add_argument('--comments', type=int, default=1000000)
+        parser.add_argument('--days', type=int, default=365,
+                            help="Issues are created over the last days.")
+        parser.add_argument('--password', default='softdesk',
+                            help="Password of all the users.")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=10000)
+
+    def handle(self, *args, **options):
+        if options['users'] < 1 and options['projects']:
+            raise CommandError("Projects need at least one user.")
+        if options['projects'] < 1 and options['issues']:
+            raise CommandError("Issues need at least one project.")
+        if options['issues'] < 1 and options['comments']:
+            raise CommandError("Comments need at least one issue.")
+        self.random = random.Random(options['seed'])
+        # Naive UTC, the way Django stores datetimes in SQLite and passes
+        # them to PostgreSQL connections set to UTC
+        self.now = timezone.now().replace(tzinfo=None)
+        self.texts = {words: [self.sentence(words) for _ in range(1000)]
+                      for words in (3, 4, 10, 12, 16)}
+        self.options = options
+        batch_size = options['batch_size']
+        self.writers = {
+            User: TableWriter(User, [
+                'user_id', 'password', 'first_name', 'last_name', 'email',
+                'is_active', 'is_staff', 'is_superuser'], batch_size),
+            Project: TableWriter(Project, [
+                'project_id', 'title', 'description', 'type',
+                'author_user_id'], batch_size),
+            Contributor: TableWriter(Contributor, [
+                'id', 'user_id', 'project_id', 'permission', 'role',
+                'pending_removal'], batch_size),
+            Issue: TableWriter(Issue, [
+                'id', 'title', 'description', 'tag', 'priority',
+                'project_id', 'status', 'author_user_id', 'assignee_user_id',
+                'created_time'], batch_size),
+            Comment: TableWriter(Comment, [
+                'comment_id', 'description', 'author_user_id', 'project_id',
+                'issue_id', 'created_time'], batch_size),
+        }
+        start = time.perf_counter()
+        with transaction.atomic():
+            self.ids = {model: next_id(model) for model in self.writers}
+            users = self.seed_users()
+            self.seed_projects(users)
+            for writer in self.writers.values():
+                writer.flush()
+            with connection.cursor() as cursor:
+                for sql in connection.ops.sequence_reset_sql(
+                        no_style(), list(self.writers)):
+                    cursor.execute(sql)
+            rebuild()
+        elapsed = time.perf_counter() - start
+        total = 0
+        for model, writer in self.writers.items():
+            total += writer.count
+            self.stdout.write(f"{model.__name__}: {writer.count} rows")
+        self.stdout.write(self.style.SUCCESS(
+            f"{total} rows in {elapsed:.1f}s, {total / elapsed:.0f} rows/s"))
+
+    def take_id(self, model):
+        value = self.ids[model]
+        self.ids[model] += 1
+        return value
+
+    def sentence(self, words):
+        return ' '.join(self.random.choices(WORDS, k=words)).capitalize()
+
+    def text(self, words):
+        return self.random.choice(self.texts[words])
+
+    def seed_users(self):
+        """Returns the range of the new user ids."""
+        password = make_password(self.options['password'])
+        first = self.ids[User]
+        for _ in range(self.options['users']):
+            user_id = self.take_id(User)
+            self.writers[User].add(
+                (user_id, password, 'Seed', str(user_id),
+                 f'seed.{user_id}@softdesk.fr', True, False, False))
+        return range(first, self.ids[User])
+
+    def seed_projects(self, users):
+        options = self.options
+        projects = options['projects']
+        if not projects:
+            return
+        weights = [self.random.paretovariate(1.16) for _ in range(projects)]
+        issue_counts = spread(options['issues'], weights)
+        comment_counts = spread(options['comments'], issue_counts) \
+            if options['issues'] else [0] * projects
+        mean_others = max(0, options['contributors'] - 1)
+        for issues, comments in zip(issue_counts, comment_counts):
+            others = min(len(users) - 1,
+                         round(self.random.expovariate(1 / mean_others))
+                         if mean_others else 0)
+            members = self.random.sample(users, others + 1)
+            project_id = self.seed_project(members)
+            self.seed_issues(project_id, members, issues, comments)
+
+    def seed_project(self, members):
+        """The first member is the author."""
+        project_id = self.take_id(Project)
+        self.writers[Project].add(
+            (project_id, self.text(3), self.text(12),
+             self.random.choice(TYPES), members[0]))
+        for rank, user_id in enumerate(members):
+            self.writers[Contributor].add(
+                (self.take_id(Contributor), user_id, project_id,
+                 Contributor.Permission.AUTHOR if rank == 0
+                 else Contributor.Permission.CONTRIBUTOR,
+                 'Chef de projet' if rank == 0
+                 else self.random.choice(ROLES), False))
+        return project_id
+
+    def seed_issues(self, project_id, members, issues, comments):
+        """Spreads `comments` over the issues, exponentially."""
+        days = self.options['days']
+        choice = self.random.choice
+        for index in range(issues):
+            issue_id = self.take_id(Issue)
+            created = self.now - timedelta(
+                days=self.random.uniform(0, days))
+            assignee = choice(members) \
+                if self.random.random() < 0.9 else None
+            self.writers[Issue].add(
+                (issue_id, self.text(4), self.text(16), choice(TAGS),
+                 choice(PRIORITIES), project_id, choice(STATUSES),
+                 choice(members), assignee, str(created)))
+            left = issues - index
+            count = comments if left == 1 else min(
+                comments, round(self.random.expovariate(left / comments))
+                if comments else 0)
+            comments -= count
+            for _ in range(count):
+                answered = min(self.now, created + timedelta(
+                    hours=self.random.expovariate(1 / 48)))
+                self.writers[Comment].add(
+                    (self.take_id(Comment), self.text(10), choice(members),
+                     project_id, issue_id, str(answered)))
@@ -0,0 +1,57 @@
+from django.core.cache import caches
+from projects.models import Contributor
+
+
+CACHE_ALIAS = 'memberships'
+
+
+def cache_key(user_id):
+    return f"memberships:{user_id}"
+
+
+def load_memberships(user_id):
+    """Returns the {project_id: permission} mapping of a user.
+    The mapping is kept in a process-local cache (see CACHES in settings)
+    and dropped whenever one of the user's Contributor rows changes."""
+    cache = caches[CACHE_ALIAS]
+    memberships = cache.get(cache_key(user_id))
+    if memberships is None:
+        contributors = Contributor.objects.filter(user_id=user_id,
+                                                  pending_removal=False)
+        memberships = dict(contributors.values_list('project_id',
+                                                    'permission'))
+        cache.set(cache_key(user_id), memberships)
+    return memberships
+
+
+def invalidate_memberships(user_id):
+    caches[CACHE_ALIAS].delete(cache_key(user_id))
+
+
+def get_memberships(request):
+    """The mapping is resolved once per request and shared by the
+    permission classes and the view."""
+    http_request = getattr(request, '_request', request)
+    memberships = getattr(http_request, 'memberships', None)
+    if memberships is None:
+        memberships = load_memberships(request.user.user_id)
+        http_request.memberships = memberships
+    return memberships
+
+
+def parse_project_id(value):
+    """Project id of an URL kwarg, e.g. 1 for '01', None if it is not a
+    number."""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def get_permission(request, project_id):
+    """Returns the user's permission on the project, None if the user is
+    not a contributor."""
+    project_id = parse_project_id(project_id)
+    if project_id is None:
+        return None
+    return get_memberships(request).get(project_id)
@@ -0,0 +1,27 @@
+# Generated by Django 4.0.4 on 2026-10-18 14:12
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('projects', '0012_alter_issue_project_id'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='contributor',
+            unique_together={('user_id', 'project_id')},
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['issue_id', 'created_time', 'comment_id'], name='comment_issue_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['project_id', 'created_time', 'id'], name='issue_project_created_idx'),
+        ),
+    ]
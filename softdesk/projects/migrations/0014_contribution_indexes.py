@@ -0,0 +1,25 @@
+# Generated by Django 4.0.4 on 2026-10-18 14:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0013_issue_comment_created_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['project_id', 'author_user_id'], name='comment_project_author_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['project_id', 'author_user_id'], name='issue_project_author_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['project_id', 'assignee_user_id'], name='issue_project_assignee_idx'),
+        ),
+    ]
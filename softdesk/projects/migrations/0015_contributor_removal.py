@@ -0,0 +1,40 @@
+# Generated by Django 4.0.4 on 2026-10-18 14:15
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('projects', '0014_contribution_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contributor',
+            name='pending_removal',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.CreateModel(
+            name='ContributorRemoval',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=16)),
+                ('reassigned_issues', models.PositiveIntegerField(default=0)),
+                ('deleted_issues', models.PositiveIntegerField(default=0)),
+                ('deleted_comments', models.PositiveIntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('created_time', models.DateTimeField(auto_now_add=True)),
+                ('updated_time', models.DateTimeField(auto_now=True)),
+                ('project_id', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='projects.project')),
+                ('user_id', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='contributorremoval',
+            index=models.Index(fields=['status', 'updated_time'], name='removal_status_idx'),
+        ),
+    ]
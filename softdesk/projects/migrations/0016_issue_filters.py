@@ -0,0 +1,88 @@
+# Generated by Django 4.0.4 on 2026-10-18 14:29
+
+from django.db import migrations, models
+
+
+SQLITE_FTS = [
+    """CREATE VIRTUAL TABLE projects_issue_fts USING fts5(
+           title, description,
+           content='projects_issue', content_rowid='id')""",
+    """CREATE TRIGGER projects_issue_fts_insert AFTER INSERT
+       ON projects_issue BEGIN
+           INSERT INTO projects_issue_fts(rowid, title, description)
+           VALUES (new.id, new.title, new.description);
+       END""",
+    """CREATE TRIGGER projects_issue_fts_delete AFTER DELETE
+       ON projects_issue BEGIN
+           INSERT INTO projects_issue_fts(projects_issue_fts, rowid,
+                                          title, description)
+           VALUES ('delete', old.id, old.title, old.description);
+       END""",
+    """CREATE TRIGGER projects_issue_fts_update AFTER UPDATE OF
+       title, description ON projects_issue BEGIN
+           INSERT INTO projects_issue_fts(projects_issue_fts, rowid,
+                                          title, description)
+           VALUES ('delete', old.id, old.title, old.description);
+           INSERT INTO projects_issue_fts(rowid, title, description)
+           VALUES (new.id, new.title, new.description);
+       END""",
+    "INSERT INTO projects_issue_fts(projects_issue_fts) VALUES ('rebuild')",
+]
+
+SQLITE_FTS_REVERSE = [
+    'DROP TRIGGER projects_issue_fts_update',
+    'DROP TRIGGER projects_issue_fts_delete',
+    'DROP TRIGGER projects_issue_fts_insert',
+    'DROP TABLE projects_issue_fts',
+]
+
+POSTGRESQL_FTS = [
+    """ALTER TABLE projects_issue ADD COLUMN search_vector tsvector
+       GENERATED ALWAYS AS (to_tsvector('simple',
+           title || ' ' || description)) STORED""",
+    """CREATE INDEX issue_search_vector_idx ON projects_issue
+       USING gin (search_vector)""",
+]
+
+POSTGRESQL_FTS_REVERSE = [
+    'ALTER TABLE projects_issue DROP COLUMN search_vector',
+]
+
+
+def run(statements):
+    """Full-text index of the issues, see projects/filters.py. The database
+    keeps it in sync on every write, bulk inserts and raw deletes included.
+    Other databases search with icontains. On SQLite, a later migration
+    remaking projects_issue drops the triggers and must create them again.
+    """
+    def operation(apps, schema_editor):
+        for statement in statements.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0015_contributor_removal'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['project_id', 'status', 'created_time'], name='issue_project_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['project_id', 'priority', 'created_time'], name='issue_project_priority_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['project_id', 'tag', 'created_time'], name='issue_project_tag_idx'),
+        ),
+        migrations.RunPython(
+            run({'sqlite': SQLITE_FTS, 'postgresql': POSTGRESQL_FTS}),
+            run({'sqlite': SQLITE_FTS_REVERSE,
+                 'postgresql': POSTGRESQL_FTS_REVERSE}),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.0.4 on 2026-10-18 14:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0016_issue_filters'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['author_user_id', 'created_time', 'comment_id'], name='comment_author_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['assignee_user_id', 'created_time', 'id'], name='issue_assignee_created_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.0.4 on 2026-10-18 14:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0017_inbox_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Change',
+            fields=[
+                ('seq', models.BigAutoField(primary_key=True, serialize=False)),
+                ('project_id', models.BigIntegerField()),
+                ('kind', models.CharField(choices=[('issue', 'Issue'), ('comment', 'Comment'), ('contributor', 'Contributor')], max_length=16)),
+                ('action', models.CharField(choices=[('created', 'Created'), ('updated', 'Updated'), ('deleted', 'Deleted')], max_length=16)),
+                ('object_id', models.BigIntegerField()),
+                ('parent_id', models.BigIntegerField(null=True)),
+                ('created_time', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='change',
+            index=models.Index(fields=['project_id', 'seq'], name='change_project_seq_idx'),
+        ),
+    ]
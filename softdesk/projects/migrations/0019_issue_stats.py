@@ -0,0 +1,36 @@
+# Generated by Django 4.0.4 on 2026-10-18 15:02
+
+from django.db import migrations, models
+
+
+# Counts the issues already there, see projects/stats.py
+BACKFILL = """INSERT INTO projects_issuestat
+                   (project_id, status, priority, tag, count)
+              SELECT project_id_id, status, priority, tag, COUNT(*)
+              FROM projects_issue
+              GROUP BY project_id_id, status, priority, tag"""
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0018_change_log'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IssueStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('project_id', models.BigIntegerField()),
+                ('status', models.CharField(choices=[('A faire', 'To Be Done'), ('En cours', 'In Progress'), ('Terminé', 'Done')], max_length=16)),
+                ('priority', models.CharField(choices=[('FAIBLE', 'Low'), ('MOYENNE', 'Medium'), ('ELEVEE', 'High')], max_length=16)),
+                ('tag', models.CharField(choices=[('BUG', 'Bug'), ('AMELIORER', 'Refactor'), ('TACHE', 'Todo')], max_length=16)),
+                ('count', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='issuestat',
+            constraint=models.UniqueConstraint(fields=('project_id', 'status', 'priority', 'tag'), name='issue_stat_unique'),
+        ),
+        migrations.RunSQL(BACKFILL, migrations.RunSQL.noop),
+    ]
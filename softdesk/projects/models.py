@@ -1,6 +1,7 @@
 from django.db import models, transaction
 from django.db.models import F
 from django.conf import settings
+from django.utils import timezone
 from authentication.models import User
 
 
@@ -43,6 +44,7 @@ class Contributor(models.Model):
                                    )
     permission = models.CharField(choices=Permission.choices, max_length=16)
     role = models.CharField(max_length=64)
+    pending_removal = models.BooleanField(default=False)
 
     class Meta:
         unique_together = ('user_id', 'project_id',)
@@ -50,6 +52,17 @@ class Contributor(models.Model):
     def __str__(self):
         return f"{self.user_id}:{self.permission} ({self.role})"
 
+    @transaction.atomic
+    def schedule_removal(self):
+        """
+        The contributor loses its access right away, the cleanup done by
+        delete() is left to the process_removals worker.
+        """
+        self.pending_removal = True
+        self.save(update_fields=['pending_removal'])
+        return ContributorRemoval.objects.create(project_id=self.project_id,
+                                                 user_id=self.user_id)
+
     @transaction.atomic
     def delete(self):
         """
@@ -62,9 +75,12 @@ class Contributor(models.Model):
                                                author_user_id=self.user_id)
         assignements = Issue.objects.filter(project_id=self.project_id,
                                             assignee_user_id=self.user_id)
+        from projects.changes import log_rows
+        from projects.deletion import delete_user_issues, delete_comments
+        log_rows(assignements, self.project_id_id, Change.Action.UPDATED)
         assignements.update(assignee_user_id=F('author_user_id'))
-        user_issues.delete()
-        user_comments.delete()
+        delete_user_issues(user_issues, self.project_id_id)
+        delete_comments(user_comments, self.project_id_id)
         return super().delete()
 
 
@@ -107,6 +123,39 @@ class Issue(models.Model):
                                          )
     created_time = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # cursor pagination of IssueViewSet
+            models.Index(fields=['project_id', 'created_time', 'id'],
+                         name='issue_project_created_idx'),
+            # Contributor.delete: contributions and assignments of a user
+            models.Index(fields=['project_id', 'author_user_id'],
+                         name='issue_project_author_idx'),
+            models.Index(fields=['project_id', 'assignee_user_id'],
+                         name='issue_project_assignee_idx'),
+            # filters of the issue list, see projects/filters.py
+            models.Index(fields=['project_id', 'status', 'created_time'],
+                         name='issue_project_status_idx'),
+            models.Index(fields=['project_id', 'priority', 'created_time'],
+                         name='issue_project_priority_idx'),
+            models.Index(fields=['project_id', 'tag', 'created_time'],
+                         name='issue_project_tag_idx'),
+            # /me/issues/ across projects
+            models.Index(fields=['assignee_user_id', 'created_time', 'id'],
+                         name='issue_assignee_created_idx'),
+        ]
+
+    @transaction.atomic(savepoint=False)
+    def save(self, *args, **kwargs):
+        """With the update of the issue counts, see projects/stats.py"""
+        super().save(*args, **kwargs)
+
+    @transaction.atomic(savepoint=False)
+    def delete(self, *args, **kwargs):
+        from projects.stats import lock_counted
+        lock_counted(self)
+        return super().delete(*args, **kwargs)
+
 
 class Comment(models.Model):
     comment_id = models.BigAutoField(primary_key=True)
@@ -127,3 +176,197 @@ class Comment(models.Model):
                                  related_name='issue_comment'
                                  )
     created_time = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # cursor pagination of CommentViewSet
+            models.Index(fields=['issue_id', 'created_time', 'comment_id'],
+                         name='comment_issue_created_idx'),
+            # Contributor.delete: contributions of a user
+            models.Index(fields=['project_id', 'author_user_id'],
+                         name='comment_project_author_idx'),
+            # /me/comments/ across projects
+            models.Index(fields=['author_user_id', 'created_time',
+                                 'comment_id'],
+                         name='comment_author_created_idx'),
+        ]
+
+
+class ContributorRemoval(models.Model):
+    """
+    Job table of the process_removals worker: the contributions of a
+    removed contributor are cleaned up by bounded batches, each in its own
+    short transaction, so a prolific contributor never locks the project
+    for long. Counters track the progress.
+    """
+    class Status(models.TextChoices):
+        PENDING = 'pending'
+        RUNNING = 'running'
+        DONE = 'done'
+        FAILED = 'failed'
+
+    project_id = models.ForeignKey(to=Project, on_delete=models.CASCADE)
+    user_id = models.ForeignKey(to=settings.AUTH_USER_MODEL,
+                                on_delete=models.CASCADE)
+    status = models.CharField(choices=Status.choices,
+                              default=Status.PENDING,
+                              max_length=16)
+    reassigned_issues = models.PositiveIntegerField(default=0)
+    deleted_issues = models.PositiveIntegerField(default=0)
+    deleted_comments = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_time = models.DateTimeField(auto_now_add=True)
+    updated_time = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'updated_time'],
+                                name='removal_status_idx')]
+
+    def __str__(self):
+        return f"{self.user_id} from {self.project_id}: {self.status}"
+
+    @classmethod
+    def claim_next(cls):
+        """Marks the oldest pending job as running and returns it. The
+        conditional update lets several workers share the table."""
+        pending = cls.objects.filter(status=cls.Status.PENDING)
+        for job in pending.order_by('id')[:10]:
+            claimed = cls.objects.filter(pk=job.pk,
+                                         status=cls.Status.PENDING)\
+                                 .update(status=cls.Status.RUNNING,
+                                         updated_time=timezone.now())
+            if claimed:
+                job.status = cls.Status.RUNNING
+                return job
+        return None
+
+    @classmethod
+    def requeue_stale(cls, before):
+        """Jobs left running by a dead worker are pending again."""
+        return cls.objects.filter(status=cls.Status.RUNNING,
+                                  updated_time__lt=before)\
+                          .update(status=cls.Status.PENDING)
+
+    def run(self, batch_size=500):
+        """Same cleanup as Contributor.delete, by batches."""
+        try:
+            while self.run_batch(batch_size):
+                pass
+        except Exception as error:
+            self.status = self.Status.FAILED
+            self.error = repr(error)
+            self.save(update_fields=['status', 'error', 'updated_time'])
+            raise
+        with transaction.atomic():
+            Contributor.objects.filter(project_id=self.project_id,
+                                       user_id=self.user_id).delete()
+            self.status = self.Status.DONE
+            self.save(update_fields=['status', 'updated_time'])
+
+    @transaction.atomic
+    def run_batch(self, batch_size):
+        """Processes one batch and returns False once nothing is left.
+        Assignments go back to the issue's author, then the user's comments
+        are deleted, then the user's issues with their comments."""
+        from projects.deletion import delete_user_issues, delete_comments
+        from projects.cache import bump_project
+        from projects.changes import log_rows
+        issues = Issue.objects.filter(project_id=self.project_id)
+        assigned = issues.filter(assignee_user_id=self.user_id)\
+                         .exclude(author_user_id=self.user_id)
+        ids = list(assigned.values_list('id', flat=True)[:batch_size])
+        if ids:
+            reassigned = Issue.objects.filter(id__in=ids)
+            log_rows(reassigned, self.project_id_id,
+                     Change.Action.UPDATED)
+            reassigned.update(assignee_user_id=F('author_user_id'))
+            bump_project(self.project_id_id)
+            self.reassigned_issues += len(ids)
+            return self.save_progress()
+        comments = Comment.objects.filter(project_id=self.project_id,
+                                          author_user_id=self.user_id)
+        ids = list(comments.values_list('comment_id', flat=True)[:batch_size])
+        if ids:
+            delete_comments(Comment.objects.filter(comment_id__in=ids),
+                            self.project_id_id)
+            self.deleted_comments += len(ids)
+            return self.save_progress()
+        user_issues = issues.filter(author_user_id=self.user_id)
+        ids = list(user_issues.values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return False
+        comments = Comment.objects.filter(issue_id__in=ids)\
+                                  .values_list('comment_id', flat=True)
+        comment_ids = list(comments[:batch_size])
+        if comment_ids:
+            delete_comments(Comment.objects.filter(
+                                            comment_id__in=comment_ids),
+                            self.project_id_id)
+            self.deleted_comments += len(comment_ids)
+            return self.save_progress()
+        delete_user_issues(Issue.objects.filter(id__in=ids),
+                           self.project_id_id)
+        self.deleted_issues += len(ids)
+        return self.save_progress()
+
+    def save_progress(self):
+        self.save(update_fields=['reassigned_issues',
+                                 'deleted_issues',
+                                 'deleted_comments',
+                                 'updated_time'])
+        return True
+
+
+class Change(models.Model):
+    """
+    Append-only log of the writes to the issues, comments and contributors
+    of a project, read in `seq` order by /projects/{id}/changes/, see
+    projects/changes.py. `project_id` is a plain column, not a foreign key:
+    the deletes cascading from a project log their rows before the project
+    is gone, and its changes are then deleted with it.
+    """
+    class Kind(models.TextChoices):
+        ISSUE = 'issue'
+        COMMENT = 'comment'
+        CONTRIBUTOR = 'contributor'
+
+    class Action(models.TextChoices):
+        CREATED = 'created'
+        UPDATED = 'updated'
+        DELETED = 'deleted'
+
+    seq = models.BigAutoField(primary_key=True)
+    project_id = models.BigIntegerField()
+    kind = models.CharField(choices=Kind.choices, max_length=16)
+    action = models.CharField(choices=Action.choices, max_length=16)
+    object_id = models.BigIntegerField()
+    # Issue of a comment
+    parent_id = models.BigIntegerField(null=True)
+    created_time = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['project_id', 'seq'],
+                                name='change_project_seq_idx')]
+
+
+class IssueStat(models.Model):
+    """
+    Number of issues of a project per status, priority and tag, read by
+    /projects/{id}/stats/ and kept up to date by the writes, see
+    projects/stats.py. `project_id` is a plain column like in Change: the
+    issues deleted with a project are counted out before it is gone.
+    """
+    project_id = models.BigIntegerField()
+    status = models.CharField(choices=Issue.Status.choices, max_length=16)
+    priority = models.CharField(choices=Issue.Priority.choices,
+                                max_length=16)
+    tag = models.CharField(choices=Issue.Tag.choices, max_length=16)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            # Target of the upserts of projects/stats.py
+            models.UniqueConstraint(
+                fields=['project_id', 'status', 'priority', 'tag'],
+                name='issue_stat_unique'),
+        ]
@@ -0,0 +1,76 @@
+from django.core.exceptions import ValidationError
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import LimitOffsetPagination, CursorPagination
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(CursorPagination):
+    """Cursor on the queryset's ordering, if any (it must end with a unique
+    field), or else on the view's `cursor_ordering`, e.g. (created_time, id).
+    Each page is an index range scan: its cost does not depend on depth and
+    no COUNT is run."""
+    page_size_query_param = 'limit'
+    max_page_size = 100
+
+    def get_ordering(self, request, queryset, view):
+        return tuple(queryset.query.order_by or view.cursor_ordering)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """A tampered cursor whose position does not fit the ordering field
+        is invalid, as one which can not be decoded."""
+        try:
+            return super().paginate_queryset(queryset, request, view)
+        except (ValidationError, ValueError, OverflowError):
+            raise NotFound(self.invalid_cursor_message)
+
+
+class OptionalCursorPagination(LimitOffsetPagination):
+    """
+    Limit/offset by default, as for the other endpoints.
+    - `?pagination=cursor` (or a `cursor` from a previous page) switches to
+    keyset pagination.
+    - `?count=false` skips the COUNT(*) of the limit/offset pages; `count` is
+    then null and the next link is found by fetching one extra row.
+    """
+    cursor_paginator = None
+
+    def use_cursor(self, request):
+        return ('cursor' in request.query_params
+                or request.query_params.get('pagination') == 'cursor')
+
+    def use_count(self, request):
+        count = request.query_params.get('count', '')
+        return count.lower() not in ('false', '0')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.use_cursor(request):
+            self.cursor_paginator = KeysetPagination()
+            return self.cursor_paginator.paginate_queryset(queryset,
+                                                           request,
+                                                           view)
+        if self.use_count(request):
+            return super().paginate_queryset(queryset, request, view)
+        self.limit = self.get_limit(request)
+        if self.limit is None:
+            return None
+        self.count = None
+        self.offset = self.get_offset(request)
+        self.request = request
+        page = list(queryset[self.offset:self.offset + self.limit + 1])
+        self.has_next = len(page) > self.limit
+        return page[:self.limit]
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def get_next_link(self):
+        if self.count is not None:
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.limit_query_param, self.limit)
+        offset = self.offset + self.limit
+        return replace_query_param(url, self.offset_query_param, offset)
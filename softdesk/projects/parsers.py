@@ -0,0 +1,30 @@
+import json
+from django.conf import settings
+from rest_framework.parsers import BaseParser
+
+
+class NDJSONParser(BaseParser):
+    """Newline delimited JSON. The body is not loaded at once: `data` is a
+    generator of (line_number, object, error) read from the stream, `error`
+    being set when the line is not a JSON object. Blank lines are skipped."""
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        return self.read_lines(stream or [], encoding)
+
+    def read_lines(self, stream, encoding):
+        for line_number, line in enumerate(stream, start=1):
+            line = line.decode(encoding).strip()
+            if not line:
+                continue
+            try:
+                data = json.loads(line)
+            except ValueError as error:
+                yield line_number, None, f"Invalid JSON: {error}"
+                continue
+            if not isinstance(data, dict):
+                yield line_number, None, "Each line must be a JSON object"
+                continue
+            yield line_number, data, None
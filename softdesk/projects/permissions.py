@@ -1,18 +1,13 @@
 from rest_framework.permissions import BasePermission, SAFE_METHODS
 from .models import Contributor
+from .membership import get_permission
 
 
 class IsContributor(BasePermission):
-    """We check the Contributor table for a user-project pair"""
+    """We check the user's memberships for the project"""
     def has_permission(self, request, view):
-        try:
-            Contributor.objects.get(
-                                    user_id=request.user.user_id,
-                                    project_id=view.kwargs['projects_pk']
-                                    )
-            return True
-        except Exception:
-            return False
+        project_id = view.kwargs['projects_pk']
+        return get_permission(request, project_id) is not None
 
 
 class IsAuthorOrReadOnly(BasePermission):
@@ -35,7 +30,5 @@ class IsProjectAuthorOrReadOnly(BasePermission):
         if request.method in SAFE_METHODS:
             return True
         project_id = view.kwargs['projects_pk']
-        author_user_id = Contributor.objects.get(project_id=project_id,
-                                                 permission="Auteur"
-                                                 ).user_id
-        return author_user_id == request.user
+        permission = get_permission(request, project_id)
+        return permission == Contributor.Permission.AUTHOR
@@ -0,0 +1,466 @@
+"""
+Push endpoint of the ASGI application, see softdesk/asgi.py.
+
+    GET /events/?projects=1,2&since=<seq>         Server-Sent Events
+    WebSocket /events/?projects=1,2&since=<seq>   same events, as JSON text
+
+streams the changes of the change log (projects/changes.py) of projects the
+user contributes to, in the format of /projects/{id}/changes/ plus the
+project_id. `projects` defaults to all of them, `since` to now. The JWT
+comes in the Authorization header or, for browsers which can not set it on
+an EventSource or a WebSocket, in the access_token parameter. Membership is
+checked with the rules of IsContributor on connection and again before
+each batch: a client removed from a project gets a 'revoked' event and
+nothing more from it.
+
+Fan-out: the Broker of each process keeps a Topic per project its clients
+watch. A commit wakes the topic, which reads the new changes once and keeps
+the last PUSH_BACKLOG of them for its clients. Backends tell the broker
+which projects changed: LocalBackend hears the commits of this process,
+DatabaseBackend also polls the log every PUSH_POLL_INTERVAL seconds for the
+commits of the other processes. Another transport, e.g. a pub/sub server,
+is a class with the same start() and stop(), named by PUSH_BACKEND.
+
+Backpressure: a client holds no queue, only its position in each project
+and the set of projects with news. It takes at most PUSH_BATCH events at a
+time, and only once the server has taken the previous ones, so a slow
+client falls behind instead of buffering. Past the backlog of the topic, it
+catches up from the log, PUSH_BATCH changes per query.
+
+The id of each event is a resume point: reconnecting with it, as
+Last-Event-ID or since, misses nothing, but can replay events received
+while several projects were catching up. Clients deduplicate on seq.
+"""
+import asyncio
+import json
+import logging
+from bisect import bisect_right
+from urllib.parse import parse_qsl
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import Max
+from django.utils.module_loading import import_string
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.utils.encoders import JSONEncoder
+from authentication.authentication import StatelessJWTAuthentication
+from projects.changes import changes_after, committed, render
+from projects.membership import load_memberships
+from projects.models import Change
+
+
+PATH = '/events/'
+FORBIDDEN = "You do not have permission to perform this action."
+
+authentication = StatelessJWTAuthentication()
+logger = logging.getLogger(__name__)
+
+
+def fetch(project_id, since, limit):
+    """Up to `limit` events of the project after `since`."""
+    changes = changes_after(project_id, since, limit)[:limit]
+    return [dict(event, project_id=project_id) for event in render(changes)]
+
+
+def last_seqs(project_ids):
+    """{project_id: seq of its last change}, for the projects with one."""
+    return dict(Change.objects.filter(project_id__in=project_ids)
+                              .order_by()
+                              .values('project_id')
+                              .annotate(last=Max('seq'))
+                              .values_list('project_id', 'last'))
+
+
+class Topic:
+    """Last events of a project, shared by the clients watching it."""
+    def __init__(self, broker, project_id):
+        self.broker = broker
+        self.project_id = project_id
+        self.clients = set()
+        # Seq of the last change read, None until known
+        self.cursor = None
+        # The backlog holds every event after `start`
+        self.start = None
+        self.backlog = []
+        self.seqs = []
+        self.dirty = False
+        self.task = None
+
+    def open(self, cursor):
+        if self.cursor is None:
+            self.cursor = self.start = cursor
+            if self.dirty:
+                self.wake()
+
+    def wake(self):
+        if self.cursor is None or self.task is not None:
+            self.dirty = True
+            return
+        self.task = asyncio.ensure_future(self.refresh())
+
+    async def refresh(self):
+        batch = self.broker.batch
+        try:
+            more = True
+            while more or self.dirty:
+                self.dirty = False
+                events = await sync_to_async(fetch)(self.project_id,
+                                                    self.cursor, batch)
+                more = len(events) == batch
+                if events:
+                    self.append(events)
+                    for client in self.clients:
+                        client.wake(self.project_id)
+        except Exception:
+            # Retried on the next wake
+            self.dirty = True
+            logger.exception("Reading the changes of project %s failed",
+                             self.project_id)
+        finally:
+            self.task = None
+
+    def append(self, events):
+        self.backlog.extend(events)
+        self.seqs.extend(event['seq'] for event in events)
+        self.cursor = self.seqs[-1]
+        excess = len(self.backlog) - self.broker.backlog
+        if excess > 0:
+            self.start = self.seqs[excess - 1]
+            del self.backlog[:excess]
+            del self.seqs[:excess]
+
+    def since(self, seq, limit):
+        """Up to `limit` events after `seq`, None if the backlog does not
+        go back that far."""
+        if self.cursor is None or seq < self.start:
+            return None
+        index = bisect_right(self.seqs, seq)
+        return self.backlog[index:index + limit]
+
+
+class Subscription:
+    """A client: its position in each project it watches, and the projects
+    with news."""
+    def __init__(self, broker, user_id):
+        self.broker = broker
+        self.user_id = user_id
+        self.positions = {}
+        self.pending = set()
+        self.ready = asyncio.Event()
+        self.closed = False
+
+    def wake(self, project_id):
+        self.pending.add(project_id)
+        self.ready.set()
+
+    def close(self):
+        self.closed = True
+        self.ready.set()
+
+    async def messages(self, heartbeat):
+        """Yields lists of (event, id, data) as news come, and an empty
+        list after `heartbeat` seconds without any."""
+        while not self.closed:
+            try:
+                await asyncio.wait_for(self.ready.wait(), heartbeat)
+            except asyncio.TimeoutError:
+                yield []
+                continue
+            self.ready.clear()
+            memberships = await sync_to_async(load_memberships)(self.user_id)
+            while self.pending and not self.closed:
+                project_id = self.pending.pop()
+                if project_id not in self.positions:
+                    continue
+                if project_id not in memberships:
+                    self.broker.leave(self, [project_id])
+                    del self.positions[project_id]
+                    yield [('revoked', None, {'project_id': project_id})]
+                    continue
+                events = await self.read(project_id)
+                if events:
+                    floor = min((self.positions[other]
+                                 for other in self.pending
+                                 if other in self.positions), default=None)
+                    yield [('change',
+                            event['seq'] if floor is None
+                            else min(event['seq'], floor),
+                            event) for event in events]
+
+    async def read(self, project_id):
+        batch = self.broker.batch
+        position = self.positions[project_id]
+        events = self.broker.topics[project_id].since(position, batch)
+        if events is None:
+            events = await sync_to_async(fetch)(project_id, position, batch)
+        if len(events) == batch:
+            self.pending.add(project_id)
+        if events:
+            self.positions[project_id] = events[-1]['seq']
+        return events
+
+
+class LocalBackend:
+    """Wakes the topics on the commits of this process."""
+    def __init__(self, broker):
+        self.broker = broker
+
+    def start(self):
+        committed.connect(self.broker.notify, dispatch_uid=PATH)
+
+    def stop(self):
+        committed.disconnect(dispatch_uid=PATH)
+
+
+class DatabaseBackend(LocalBackend):
+    """Also polls the log for the commits of the other processes, with one
+    query for all the topics."""
+    def start(self):
+        super().start()
+        self.task = asyncio.ensure_future(self.poll())
+
+    def stop(self):
+        super().stop()
+        if not self.task.done():
+            self.task.cancel()
+
+    async def poll(self):
+        while True:
+            await asyncio.sleep(settings.PUSH_POLL_INTERVAL)
+            topics = [topic for topic in self.broker.topics.values()
+                      if topic.cursor is not None]
+            if not topics:
+                continue
+            try:
+                lasts = await sync_to_async(last_seqs)(
+                    [topic.project_id for topic in topics])
+            except Exception:
+                logger.exception("Polling the change log failed")
+                continue
+            for topic in topics:
+                if lasts.get(topic.project_id, 0) > topic.cursor:
+                    topic.wake()
+
+
+class Broker:
+    """Topics of the projects watched by the clients of this process."""
+    def __init__(self):
+        self.loop = None
+        self.backend = None
+        self.topics = {}
+
+    def bind(self):
+        """Binds the broker to the running event loop on first use: once
+        per process under an ASGI server, once per loop in tests."""
+        loop = asyncio.get_running_loop()
+        if self.loop is loop:
+            return
+        if self.backend is not None:
+            self.backend.stop()
+        self.loop = loop
+        self.topics = {}
+        self.batch = settings.PUSH_BATCH
+        self.backlog = settings.PUSH_BACKLOG
+        self.backend = import_string(settings.PUSH_BACKEND)(self)
+        self.backend.start()
+
+    def notify(self, sender, project_id, **kwargs):
+        """Receiver of `committed`, called from any thread."""
+        loop = self.loop
+        if loop is None:
+            return
+        try:
+            loop.call_soon_threadsafe(self.wake, project_id)
+        except RuntimeError:
+            # Closed loop
+            pass
+
+    def wake(self, project_id, settled=False):
+        topic = self.topics.get(project_id)
+        if topic is None:
+            return
+        topic.wake()
+        settle = getattr(settings, 'CHANGES_SETTLE_SECONDS', 0)
+        if settle and not settled:
+            # changes_after holds the change back until then
+            self.loop.call_later(settle, self.wake, project_id, True)
+
+    async def subscribe(self, user_id, project_ids, since):
+        """Positions the client at `since` in each project, or at the last
+        change if None."""
+        self.bind()
+        subscription = Subscription(self, user_id)
+        unknown = []
+        for project_id in project_ids:
+            topic = self.topics.get(project_id)
+            if topic is None:
+                topic = self.topics[project_id] = Topic(self, project_id)
+            topic.clients.add(subscription)
+            if topic.cursor is None:
+                unknown.append(topic)
+        if unknown:
+            cursors = await sync_to_async(last_seqs)(
+                [topic.project_id for topic in unknown])
+            for topic in unknown:
+                topic.open(cursors.get(topic.project_id, 0))
+        for project_id in project_ids:
+            if since is None:
+                subscription.positions[project_id] = \
+                    self.topics[project_id].cursor
+            else:
+                subscription.positions[project_id] = since
+                subscription.wake(project_id)
+        return subscription
+
+    def leave(self, subscription, project_ids):
+        for project_id in project_ids:
+            topic = self.topics.get(project_id)
+            if topic is None:
+                continue
+            topic.clients.discard(subscription)
+            if not topic.clients:
+                del self.topics[project_id]
+
+
+broker = Broker()
+
+
+class Refused(Exception):
+    def __init__(self, status, detail):
+        super().__init__(detail)
+        self.status = status
+        self.detail = detail
+
+
+def get_int(value, name):
+    try:
+        value = int(value)
+    except ValueError:
+        raise Refused(400, {name: "must be an integer"})
+    if value < 0:
+        raise Refused(400, {name: "must be positive"})
+    return value
+
+
+def authenticate(headers, params):
+    """Id of the user of the JWT, from the header or the parameter."""
+    header = headers.get(b'authorization')
+    if header is not None:
+        raw_token = authentication.get_raw_token(header)
+    else:
+        raw_token = params.get('access_token', '').encode() or None
+    if raw_token is None:
+        raise Refused(401, "Authentication credentials were not provided.")
+    try:
+        validated_token = authentication.get_validated_token(raw_token)
+        return authentication.get_user(validated_token).user_id
+    except AuthenticationFailed as exception:
+        raise Refused(401, str(exception.detail))
+
+
+async def subscribe(scope):
+    """Subscription of the client, raises Refused if it can not have one."""
+    headers = dict(scope['headers'])
+    params = dict(parse_qsl(scope['query_string'].decode('latin-1')))
+    user_id = authenticate(headers, params)
+    since = params.get('since') or \
+        headers.get(b'last-event-id', b'').decode('latin-1') or None
+    if since is not None:
+        since = get_int(since, 'since')
+    memberships = await sync_to_async(load_memberships)(user_id)
+    if params.get('projects'):
+        project_ids = {get_int(value, 'projects')
+                       for value in params['projects'].split(',')}
+        if not project_ids <= memberships.keys():
+            raise Refused(403, FORBIDDEN)
+    else:
+        project_ids = set(memberships)
+    return await broker.subscribe(user_id, project_ids, since)
+
+
+async def stream(subscription, receive, disconnect, emit):
+    """Emits the messages of the subscription until the client leaves."""
+    async def watch():
+        while (await receive())['type'] != disconnect:
+            pass
+        subscription.close()
+    watcher = asyncio.ensure_future(watch())
+    try:
+        async for messages in subscription.messages(settings.PUSH_HEARTBEAT):
+            await emit(messages)
+    finally:
+        watcher.cancel()
+        broker.leave(subscription, list(subscription.positions))
+
+
+def encode(data):
+    return json.dumps(data, cls=JSONEncoder)
+
+
+async def serve_events(scope, receive, send):
+    """Server-Sent Events"""
+    try:
+        if scope['method'] != 'GET':
+            raise Refused(405, f'Method "{scope["method"]}" not allowed.')
+        subscription = await subscribe(scope)
+    except Refused as refusal:
+        await send({'type': 'http.response.start',
+                    'status': refusal.status,
+                    'headers': [(b'content-type', b'application/json')]})
+        await send({'type': 'http.response.body',
+                    'body': encode({'detail': refusal.detail}).encode()})
+        return
+    await send({'type': 'http.response.start', 'status': 200,
+                'headers': [(b'content-type', b'text/event-stream'),
+                            (b'cache-control', b'no-cache'),
+                            (b'x-accel-buffering', b'no')]})
+
+    async def emit(messages):
+        if not messages:
+            body = ': ping\n\n'
+        else:
+            body = ''.join(
+                (f'id: {id}\n' if id is not None else '') +
+                f'event: {event}\ndata: {encode(data)}\n\n'
+                for event, id, data in messages)
+        await send({'type': 'http.response.body', 'body': body.encode(),
+                    'more_body': True})
+    await emit([])
+    await stream(subscription, receive, 'http.disconnect', emit)
+
+
+async def serve_websocket(scope, receive, send):
+    if (await receive())['type'] != 'websocket.connect':
+        return
+    if scope['path'] != PATH:
+        await send({'type': 'websocket.close', 'code': 4404})
+        return
+    try:
+        subscription = await subscribe(scope)
+    except Refused as refusal:
+        await send({'type': 'websocket.close',
+                    'code': 4000 + refusal.status})
+        return
+    await send({'type': 'websocket.accept'})
+
+    async def emit(messages):
+        if not messages:
+            messages = [('ping', None, None)]
+        for event, id, data in messages:
+            await send({'type': 'websocket.send',
+                        'text': encode({'event': event, 'id': id,
+                                        'data': data})})
+    await stream(subscription, receive, 'websocket.disconnect', emit)
+
+
+class PushApplication:
+    """Serves PATH, as Server-Sent Events or over a WebSocket, and hands
+    the other requests to `application`."""
+    def __init__(self, application):
+        self.application = application
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'websocket':
+            return await serve_websocket(scope, receive, send)
+        if scope['type'] == 'http' and scope['path'] == PATH:
+            return await serve_events(scope, receive, send)
+        return await self.application(scope, receive, send)
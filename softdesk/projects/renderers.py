@@ -0,0 +1,31 @@
+"""
+JSON renderer writing the same bytes as DRF's JSONRenderer (compact,
+UTF-8, \u2028 and \u2029 escaped) with orjson when it is installed.
+Dates and times are left to DRF's encoder. Indented output and data orjson
+can not encode go through DRF. Floats may differ in their exponent, e.g.
+1e16 for 1e+16: the API serves none.
+"""
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (orjson is None or data is None or not self.compact
+                or self.ensure_ascii
+                or self.get_indent(accepted_media_type,
+                                   renderer_context or {}) is not None):
+            return super().render(data, accepted_media_type,
+                                  renderer_context)
+        try:
+            ret = orjson.dumps(data, default=self.encoder_class().default,
+                               option=orjson.OPT_PASSTHROUGH_DATETIME)
+        except (orjson.JSONEncodeError, TypeError):
+            return super().render(data, accepted_media_type,
+                                  renderer_context)
+        return ret.replace('\u2028'.encode(), b'\\u2028')\
+                  .replace('\u2029'.encode(), b'\\u2029')
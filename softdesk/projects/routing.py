@@ -0,0 +1,91 @@
+"""
+Read replica routing of the API viewsets.
+
+Safe requests read from one of the aliases of settings.DATABASE_REPLICAS,
+everything else goes to the primary. A write pins its user and its
+project to the primary for REPLICA_PIN_SECONDS: users read their own
+writes, and a replica lagging behind a write can not fill the response
+cache under the new project version.
+"""
+import random
+from contextvars import ContextVar
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.permissions import SAFE_METHODS
+from projects.membership import get_memberships, parse_project_id
+
+
+CACHE_ALIAS = 'replication'
+
+read_alias = ContextVar('read_alias', default=None)
+# Replica read by all the requests of a batch, see softdesk/batch.py
+batch_replica = ContextVar('batch_replica', default=None)
+
+
+def pin_key(kind, pk):
+    return f"pin:{kind}:{pk}"
+
+
+def pin(kind, pk):
+    if settings.DATABASE_REPLICAS:
+        caches[CACHE_ALIAS].set(pin_key(kind, pk), True,
+                                settings.REPLICA_PIN_SECONDS)
+
+
+def pin_user(user_id):
+    pin('user', user_id)
+
+
+def pin_project(project_id):
+    pin('project', project_id)
+
+
+def choose_replica():
+    return batch_replica.get() or random.choice(settings.DATABASE_REPLICAS)
+
+
+def is_pinned(user_id, project_ids):
+    keys = [pin_key('user', user_id)]
+    keys += [pin_key('project', project_id) for project_id in project_ids]
+    return bool(caches[CACHE_ALIAS].get_many(keys))
+
+
+class ReplicaRouter:
+    """Reads go to the replica chosen for the current request, if any."""
+    def db_for_read(self, model, **hints):
+        return read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+
+class ReplicaReadMixin:
+    """Routes the reads of the safe requests to a replica once the user is
+    authenticated and allowed, so the membership checks see the primary."""
+    def dispatch(self, request, *args, **kwargs):
+        token = read_alias.set(None)
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            read_alias.reset(token)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if not settings.DATABASE_REPLICAS:
+            return
+        user_id = request.user.user_id
+        if request.method not in SAFE_METHODS:
+            pin_user(user_id)
+        elif not is_pinned(user_id, self.get_routing_projects(request)):
+            read_alias.set(choose_replica())
+
+    def get_routing_projects(self, request):
+        """Ids of the projects the response reads."""
+        if 'projects_pk' in self.kwargs:
+            return [parse_project_id(self.kwargs['projects_pk'])]
+        if 'pk' in self.kwargs:
+            return [parse_project_id(self.kwargs['pk'])]
+        return list(get_memberships(request))
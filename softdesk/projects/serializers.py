@@ -1,20 +1,28 @@
+from django.utils.functional import cached_property
 from rest_framework import serializers
-from projects.models import Project, Issue, Comment, Contributor
+from projects.fields import SparseFieldsMixin
+from projects.rows import Column, UserString, DateTime
+from projects.validators import choice_validator
+from softdesk.instrumentation import TimedSerializerMixin
+from projects.models import Project, Issue, Comment, Contributor,\
+                            ContributorRemoval
 
 
 class ChoiceField(serializers.ChoiceField):
-    """For all choice fields we make sure not to be case sensitive and provide
-    adequate feedback."""
+    """For all choice fields we make sure not to be case nor accent
+    sensitive and provide adequate feedback. The lookup table is shared by
+    all the fields with the same choices, see projects/validators.py"""
+    @cached_property
+    def validator(self):
+        return choice_validator(tuple(self._choices.items()), self.field_name)
+
     def to_internal_value(self, data):
-        for key in self._choices.keys():
-            if key.lower() == data.lower():
-                return key
-        keys = list(self.choices.keys())
-        message = f"{self.field_name} must be one of the following: {keys}"
-        raise serializers.ValidationError({'ValueError': message})
+        return self.validator(data)
 
 
-class ContributorListSerializer(serializers.ModelSerializer):
+class ContributorListSerializer(SparseFieldsMixin,
+                                TimedSerializerMixin,
+                                serializers.ModelSerializer):
     """We only send user (user full name, email) and role.
     Permission field is auto-added, author is identified by his role:
     'Chef de projet'."""
@@ -25,8 +33,13 @@ class ContributorListSerializer(serializers.ModelSerializer):
         fields = ['id', 'user', 'role']
         read_only_fields = ['user']
 
+    row_fields = {'id': Column('id'),
+                  'user': UserString('user_id'),
+                  'role': Column('role')}
+
 
-class ContributorCreateSerializer(serializers.ModelSerializer):
+class ContributorCreateSerializer(TimedSerializerMixin,
+                                  serializers.ModelSerializer):
     """Project authors can add new contributors via their email only."""
     email = serializers.EmailField(source='user_id', max_length=140)
 
@@ -44,6 +57,22 @@ class ContributorDetailSerializer(ContributorListSerializer):
         read_only_fields = ['user', 'project_id', 'permission', 'role']
 
 
+class ContributorRemovalSerializer(TimedSerializerMixin,
+                                   serializers.ModelSerializer):
+    """Progress of the background cleanup of a removed contributor"""
+    class Meta:
+        model = ContributorRemoval
+        fields = ['id',
+                  'project_id',
+                  'user_id',
+                  'status',
+                  'reassigned_issues',
+                  'deleted_issues',
+                  'deleted_comments',
+                  'created_time']
+        read_only_fields = fields
+
+
 class ContributorSerializerSelector:
     """Import container for the view and it's get_serializer method"""
     list = ContributorListSerializer
@@ -51,24 +80,33 @@ class ContributorSerializerSelector:
     create = ContributorCreateSerializer
 
 
-class ProjectListSerializer(serializers.ModelSerializer):
+class ProjectListSerializer(SparseFieldsMixin,
+                            TimedSerializerMixin,
+                            serializers.ModelSerializer):
     author = serializers.StringRelatedField(
                                             source='author_user_id',
                                             read_only=True
                                             )
     type = ChoiceField(choices=Project.Type.choices)
+    contributor_list = ContributorListSerializer(many=True, read_only=True)
+    issues = serializers.IntegerField(source='issue_count', read_only=True)
 
     class Meta:
         model = Project
         fields = ['project_id', 'title', 'description', 'type', 'author']
+        expandable = ['contributor_list', 'issues']
 
+    row_fields = {'project_id': Column('project_id'),
+                  'title': Column('title'),
+                  'description': Column('description'),
+                  'type': Column('type'),
+                  'author': UserString('author_user_id'),
+                  'issues': Column('issue_count')}
 
-class ProjectDetailSerializer(ProjectListSerializer):
-    """Inhérits author and type from the list serializer """
-    contributor_list = ContributorListSerializer(many=True, read_only=True)
-    issues = serializers.IntegerField(source='project_issue.count',
-                                      read_only=True)
 
+class ProjectDetailSerializer(ProjectListSerializer):
+    """Inhérits all its fields from the list serializer.
+    The issue count is annotated by the view's queryset."""
     class Meta:
         model = Project
         fields = ['project_id',
@@ -86,7 +124,9 @@ class ProjectSerializerSelector:
     detail = ProjectDetailSerializer
 
 
-class IssueListSerializer(serializers.ModelSerializer):
+class IssueListSerializer(SparseFieldsMixin,
+                          TimedSerializerMixin,
+                          serializers.ModelSerializer):
     """We use a custom ChoiceField to provider feedback to user and
     make sure inputs are not case sensitive"""
     author = serializers.StringRelatedField(source='author_user_id',
@@ -96,6 +136,8 @@ class IssueListSerializer(serializers.ModelSerializer):
     tag = ChoiceField(choices=Issue.Tag.choices)
     priority = ChoiceField(choices=Issue.Priority.choices)
     status = ChoiceField(choices=Issue.Status.choices)
+    comments = serializers.IntegerField(source='comment_count',
+                                        read_only=True)
 
     class Meta:
         model = Issue
@@ -109,13 +151,24 @@ class IssueListSerializer(serializers.ModelSerializer):
                   'project_id',
                   'author']
         read_only_fields = ['project_id']
+        expandable = ['created_time', 'comments']
 
+    row_fields = {'id': Column('id'),
+                  'title': Column('title'),
+                  'description': Column('description'),
+                  'tag': Column('tag'),
+                  'priority': Column('priority'),
+                  'status': Column('status'),
+                  'assignee_email': UserString('assignee_user_id'),
+                  'project_id': Column('project_id'),
+                  'author': UserString('author_user_id'),
+                  'created_time': DateTime('created_time'),
+                  'comments': Column('comment_count')}
 
-class IssueDetailSerializer(IssueListSerializer):
-    """Inhérits from the issue list serializer with few fields added"""
-    comments = serializers.IntegerField(source='issue_comment.count',
-                                        read_only=True)
 
+class IssueDetailSerializer(IssueListSerializer):
+    """Inhérits from the issue list serializer with few fields added.
+    The comment count is annotated by the view's queryset."""
     class Meta:
         model = Issue
         fields = ['id',
@@ -139,7 +192,9 @@ class IssueSerializerSelector:
     detail = IssueDetailSerializer
 
 
-class CommentListSerializer(serializers.ModelSerializer):
+class CommentListSerializer(SparseFieldsMixin,
+                            TimedSerializerMixin,
+                            serializers.ModelSerializer):
     author = serializers.StringRelatedField(source='author_user_id',
                                             read_only=True)
 
@@ -151,9 +206,19 @@ class CommentListSerializer(serializers.ModelSerializer):
                   'issue_id',
                   'author']
         read_only_fields = ['project_id', 'issue_id']
+        expandable = ['created_time']
+
+    row_fields = {'comment_id': Column('comment_id'),
+                  'description': Column('description'),
+                  'project_id': Column('project_id'),
+                  'issue_id': Column('issue_id'),
+                  'author': UserString('author_user_id'),
+                  'created_time': DateTime('created_time')}
 
 
-class CommentDetailSerializer(serializers.ModelSerializer):
+class CommentDetailSerializer(SparseFieldsMixin,
+                              TimedSerializerMixin,
+                              serializers.ModelSerializer):
     author = serializers.StringRelatedField(source='author_user_id',
                                             read_only=True)
 
@@ -0,0 +1,75 @@
+from django.conf import settings
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from projects.models import Project, Contributor, Issue, Comment, Change
+from projects.membership import invalidate_memberships
+from projects.cache import bump_project
+from projects.changes import log_instance, forget_project
+from projects import stats
+
+
+@receiver([post_save, post_delete], sender=Contributor)
+def contributor_changed(sender, instance, **kwargs):
+    invalidate_memberships(instance.user_id_id)
+    bump_project(instance.project_id_id)
+
+
+@receiver([post_save, post_delete], sender=Project)
+def project_changed(sender, instance, **kwargs):
+    bump_project(instance.project_id)
+
+
+@receiver(post_delete, sender=Project)
+def project_deleted(sender, instance, **kwargs):
+    """Sent after the deletes cascading from the project were logged and
+    counted"""
+    forget_project(instance.project_id)
+    stats.forget_project(instance.project_id)
+
+
+@receiver(post_save, sender=Issue)
+@receiver(post_save, sender=Comment)
+@receiver(post_save, sender=Contributor)
+def log_save(sender, instance, created, **kwargs):
+    log_instance(instance, Change.Action.CREATED if created
+                 else Change.Action.UPDATED)
+
+
+@receiver(post_delete, sender=Issue)
+@receiver(post_delete, sender=Comment)
+@receiver(post_delete, sender=Contributor)
+def log_delete(sender, instance, **kwargs):
+    log_instance(instance, Change.Action.DELETED)
+
+
+@receiver(pre_save, sender=Issue)
+def remember_counts(sender, instance, update_fields, **kwargs):
+    stats.remember(instance, update_fields)
+
+
+@receiver(post_save, sender=Issue)
+def count_save(sender, instance, created, **kwargs):
+    stats.count_saved(instance, created)
+
+
+@receiver(post_delete, sender=Issue)
+def count_delete(sender, instance, **kwargs):
+    stats.count_deleted(instance)
+
+
+@receiver([post_save, post_delete], sender=Issue)
+@receiver([post_save, post_delete], sender=Comment)
+def contribution_changed(sender, instance, **kwargs):
+    bump_project(instance.project_id_id)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def user_changed(sender, instance, created, update_fields, **kwargs):
+    """Responses show the names of the users of a project, not their
+    passwords, rehashed on login"""
+    if created or update_fields == {'password'}:
+        return
+    project_ids = Contributor.objects.filter(user_id=instance.user_id)\
+                                     .values_list('project_id', flat=True)
+    for project_id in project_ids:
+        bump_project(project_id)
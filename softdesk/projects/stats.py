@@ -0,0 +1,156 @@
+"""
+Issue counts of the projects, read by /projects/{id}/stats/.
+
+IssueStat holds the number of issues of each project per status, priority
+and tag. Every write of issues adds its deltas to it, in its transaction,
+with one upsert. Writes through the models are counted by the signals of
+projects/signals.py. The bulk inserts of projects/bulk.py and the raw
+deletes of projects/deletion.py count their rows here themselves.
+Reassigning issues, as Contributor.delete and ContributorRemoval do,
+changes no count.
+
+An update moves the issue from the counts stored for it, read before the
+UPDATE in the same transaction with its row locked, so that concurrent
+updates of an issue move it one after the other. Issue.save and
+Issue.delete are atomic for this. The reconcile_issue_stats command
+recounts the issues in one set-based pass.
+"""
+from collections import Counter
+from django.db import connections, router, transaction
+from django.db.models import Count
+from projects.cache import bump_project
+from projects.models import Issue, IssueStat
+
+
+# Fields of IssueStat and Issue making the key of the counts, and the
+# attributes of an issue holding them
+COLUMNS = ('project_id', 'status', 'priority', 'tag')
+KEY = ('project_id_id', 'status', 'priority', 'tag')
+DIMENSIONS = {'status': Issue.Status, 'priority': Issue.Priority,
+              'tag': Issue.Tag}
+
+
+def key_of(issue):
+    return tuple(getattr(issue, name) for name in KEY)
+
+
+def upsert_sql(connection):
+    quote = connection.ops.quote_name
+    table = quote(IssueStat._meta.db_table)
+    count = quote('count')
+    columns = ', '.join(quote(column) for column in COLUMNS)
+    return (f"INSERT INTO {table} ({columns}, {count}) "
+            f"VALUES (%s, %s, %s, %s, %s) "
+            f"ON CONFLICT ({columns}) "
+            f"DO UPDATE SET {count} = {table}.{count} + excluded.{count}")
+
+
+def add(deltas):
+    """Adds {(project_id, status, priority, tag): delta} to the counts."""
+    rows = [(*key, delta) for key, delta in deltas.items() if delta]
+    if not rows:
+        return
+    connection = connections[router.db_for_write(IssueStat)]
+    with connection.cursor() as cursor:
+        if len(rows) == 1:
+            cursor.execute(upsert_sql(connection), rows[0])
+        else:
+            cursor.executemany(upsert_sql(connection), rows)
+
+
+def lock_counted(issue):
+    """Reads the counts the issue is in, None if its row is gone, and locks
+    the row until the end of the transaction."""
+    issue.counted = Issue.objects.select_for_update().filter(pk=issue.pk)\
+                                 .values_list(*COLUMNS).first()
+
+
+def remember(issue, update_fields=None):
+    """Before the save of an issue, in its transaction."""
+    if issue._state.adding or (update_fields is not None
+                               and set(COLUMNS).isdisjoint(update_fields)):
+        return
+    lock_counted(issue)
+
+
+def count_saved(issue, created):
+    counted = vars(issue).pop('counted', None)
+    if not created and counted is None:
+        return
+    deltas = Counter({key_of(issue): 1})
+    if not created:
+        deltas[counted] -= 1
+    add(deltas)
+
+
+def count_deleted(issue):
+    """After the delete of an issue, locked by lock_counted unless it was
+    loaded by a cascading delete."""
+    counted = vars(issue).pop('counted', key_of(issue))
+    if counted is not None:
+        add({counted: -1})
+
+
+def count_created(issues):
+    """Counts issues written by bulk_create."""
+    add(Counter(key_of(issue) for issue in issues))
+
+
+def count_deleted_rows(queryset):
+    """Counts out the issues of the queryset, before a raw delete."""
+    rows = queryset.order_by().values_list(*COLUMNS)\
+                   .annotate(total=Count('*'))
+    add({tuple(row[:-1]): -row[-1] for row in rows})
+
+
+def forget_project(project_id):
+    """Deletes the counts of a deleted project."""
+    return IssueStat.objects.filter(project_id=project_id)._raw_delete(
+        router.db_for_write(IssueStat))
+
+
+def summary(project_id):
+    counts = {name: dict.fromkeys(choices.values, 0)
+              for name, choices in DIMENSIONS.items()}
+    total = 0
+    rows = IssueStat.objects.filter(project_id=project_id)\
+                            .values_list('status', 'priority', 'tag', 'count')
+    for status, priority, tag, count in rows:
+        total += count
+        counts['status'][status] += count
+        counts['priority'][priority] += count
+        counts['tag'][tag] += count
+    return {'issues': total, **counts}
+
+
+def rebuild(project_ids=None):
+    """Recounts the issues of the projects, all by default, with one DELETE
+    and one INSERT ... SELECT ... GROUP BY. Returns the number of counts
+    and the ids of the projects whose counts were wrong, whose cached
+    responses are dropped."""
+    alias = router.db_for_write(IssueStat)
+    stats = IssueStat.objects.using(alias)
+    issues = Issue.objects.using(alias)
+    if project_ids is not None:
+        stats = stats.filter(project_id__in=project_ids)
+        issues = issues.filter(project_id__in=project_ids)
+    connection = connections[alias]
+    quote = connection.ops.quote_name
+    counts = stats.exclude(count=0).values_list(*COLUMNS, 'count')
+    select, params = issues.order_by().values(*COLUMNS)\
+                           .annotate(total=Count('*'))\
+                           .query.get_compiler(connection=connection)\
+                           .as_sql()
+    with transaction.atomic(using=alias):
+        before = set(counts)
+        stats._raw_delete(alias)
+        columns = ', '.join(quote(column) for column in COLUMNS)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {quote(IssueStat._meta.db_table)} "
+                f"({columns}, {quote('count')}) {select}", params)
+        after = set(counts.all())
+        wrong = {row[0] for row in before ^ after}
+        for project_id in wrong:
+            bump_project(project_id)
+    return len(after), wrong
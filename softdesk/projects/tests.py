@@ -1,3 +1,1423 @@
-from django.test import TestCase
+import asyncio
+import json
+from io import StringIO
+from unittest import mock
+from copy import deepcopy
+from datetime import date, datetime, time, timezone
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection, connections
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+from authentication.models import User
+from projects.models import Project, Issue, Comment, Contributor,\
+                            ContributorRemoval, Change, IssueStat
+from projects import membership
+from projects.cache import get_versions
+from projects.push import PushApplication
+from projects.renderers import FastJSONRenderer
+from softdesk.instrumentation import REGISTRY
 
-# Create your tests here.
+
+class SoftDeskTestCase(APITestCase):
+    """Builds a project owned by `self.author` with `self.member` as
+    contributor. `populate` adds rows so tests can check that the cost of
+    an endpoint does not depend on the amount of data."""
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+        self.author = User.objects.create(email='author@softdesk.fr',
+                                          first_name='Ada',
+                                          last_name='Lovelace')
+        self.member = User.objects.create(email='member@softdesk.fr',
+                                          first_name='Alan',
+                                          last_name='Turing')
+        self.project = Project.objects.create(title='SoftDesk',
+                                              description='Issue tracker',
+                                              type='back-end',
+                                              author_user_id=self.author)
+        Contributor.objects.create(user_id=self.author,
+                                   project_id=self.project,
+                                   permission='Auteur',
+                                   role='Chef de projet')
+        Contributor.objects.create(user_id=self.member,
+                                   project_id=self.project,
+                                   permission='Contributeur',
+                                   role='Dev')
+        self.issue = self.create_issue(self.project)
+        self.comment = self.create_comment(self.issue)
+        self.client.force_authenticate(user=self.author)
+
+    def create_issue(self, project, author=None):
+        author = author or self.author
+        return Issue.objects.create(title='Bug', description='It crashes',
+                                    tag='BUG', priority='ELEVEE',
+                                    status='A faire', project_id=project,
+                                    author_user_id=author,
+                                    assignee_user_id=self.member)
+
+    def create_comment(self, issue, author=None):
+        return Comment.objects.create(description='Reproduced',
+                                      author_user_id=author or self.member,
+                                      project_id=issue.project_id,
+                                      issue_id=issue)
+
+    def populate(self, size=5):
+        for index in range(size):
+            user = User.objects.create(email=f'user{index}@softdesk.fr',
+                                       first_name='User',
+                                       last_name=str(index))
+            project = Project.objects.create(title=f'Project {index}',
+                                             description='Populated',
+                                             type='iOS',
+                                             author_user_id=user)
+            Contributor.objects.create(user_id=self.author,
+                                       project_id=project,
+                                       permission='Contributeur',
+                                       role='Dev')
+            Contributor.objects.create(user_id=user,
+                                       project_id=self.project,
+                                       permission='Contributeur',
+                                       role='Dev')
+            issue = self.create_issue(self.project, author=user)
+            self.create_comment(issue, author=user)
+            self.create_comment(self.issue, author=user)
+
+
+class QueryCountTests(SoftDeskTestCase):
+    """Every read endpoint runs a fixed number of queries."""
+    def assertConstantQueries(self, url, expected):
+        """Memberships are not cached yet: expected counts include the
+        membership query of the nested routes."""
+        with self.assertNumQueries(expected):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.populate()
+        caches['memberships'].clear()
+        with self.assertNumQueries(expected):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_project_list(self):
+        self.assertConstantQueries('/projects/', 3)
+
+    def test_project_detail(self):
+        url = f'/projects/{self.project.project_id}/'
+        response = self.assertConstantQueries(url, 2)
+        self.assertEqual(response.data['issues'], 6)
+        self.assertEqual(len(response.data['contributor_list']), 7)
+
+    def test_contributor_list(self):
+        url = f'/projects/{self.project.project_id}/contributors/'
+        self.assertConstantQueries(url, 3)
+
+    def test_contributor_detail(self):
+        contributor = Contributor.objects.get(user_id=self.member)
+        url = (f'/projects/{self.project.project_id}/contributors/'
+               f'{contributor.id}/')
+        self.assertConstantQueries(url, 2)
+
+    def test_issue_list(self):
+        url = f'/projects/{self.project.project_id}/issues/'
+        self.assertConstantQueries(url, 3)
+
+    def test_issue_detail(self):
+        url = f'/projects/{self.project.project_id}/issues/{self.issue.id}/'
+        response = self.assertConstantQueries(url, 2)
+        self.assertEqual(response.data['comments'], 6)
+
+    def test_comment_list(self):
+        url = (f'/projects/{self.project.project_id}/issues/'
+               f'{self.issue.id}/comments/')
+        self.assertConstantQueries(url, 3)
+
+    def test_comment_detail(self):
+        url = (f'/projects/{self.project.project_id}/issues/'
+               f'{self.issue.id}/comments/{self.comment.comment_id}/')
+        self.assertConstantQueries(url, 2)
+
+
+class MembershipTests(SoftDeskTestCase):
+    """Permission checks share one cached membership lookup."""
+    def setUp(self):
+        super().setUp()
+        self.issues_url = f'/projects/{self.project.project_id}/issues/'
+
+    def test_cached_memberships_cost_no_query(self):
+        url = f'{self.issues_url}{self.issue.id}/comments/'
+        self.client.get(url)
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+    def test_create_issue_resolves_assignee_in_one_query(self):
+        self.client.get(self.issues_url)
+        data = {'title': 'New', 'description': 'Issue', 'tag': 'bug',
+                'priority': 'faible', 'status': 'a faire',
+                'assignee_email': self.member.email}
+        # assignee, issue, change log and issue counts
+        with self.assertNumQueries(4):
+            response = self.client.post(self.issues_url, data)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['project_id'], self.project.project_id)
+        issue = Issue.objects.get(id=response.data['id'])
+        self.assertEqual(issue.assignee_user_id, self.member)
+
+    def test_assignee_must_be_contributor(self):
+        data = {'title': 'New', 'description': 'Issue', 'tag': 'bug',
+                'priority': 'faible', 'status': 'a faire',
+                'assignee_email': 'nobody@softdesk.fr'}
+        response = self.client.post(self.issues_url, data)
+        self.assertEqual(response.status_code, 400)
+
+    def test_removed_contributor_loses_access(self):
+        self.client.force_authenticate(user=self.member)
+        self.assertEqual(self.client.get(self.issues_url).status_code, 200)
+        Contributor.objects.get(user_id=self.member).delete()
+        self.assertEqual(self.client.get(self.issues_url).status_code, 403)
+
+    def test_added_contributor_gains_access(self):
+        outsider = User.objects.create(email='outsider@softdesk.fr',
+                                       first_name='Grace',
+                                       last_name='Hopper')
+        self.client.force_authenticate(user=outsider)
+        self.assertEqual(self.client.get(self.issues_url).status_code, 403)
+        Contributor.objects.create(user_id=outsider,
+                                   project_id=self.project,
+                                   permission='Contributeur',
+                                   role='Dev')
+        self.assertEqual(self.client.get(self.issues_url).status_code, 200)
+
+    def test_only_project_author_removes_contributors(self):
+        contributor = Contributor.objects.get(user_id=self.member)
+        url = (f'/projects/{self.project.project_id}/contributors/'
+               f'{contributor.id}/')
+        self.client.force_authenticate(user=self.member)
+        self.assertEqual(self.client.delete(url).status_code, 403)
+        self.client.force_authenticate(user=self.author)
+        self.assertEqual(self.client.delete(url).status_code, 202)
+
+
+class PaginationTests(SoftDeskTestCase):
+    def setUp(self):
+        super().setUp()
+        self.populate(size=12)
+        self.url = f'/projects/{self.project.project_id}/issues/'
+
+    def test_cursor_pages_cover_every_issue_once(self):
+        url, seen = f'{self.url}?pagination=cursor&limit=5', []
+        while url:
+            response = self.client.get(url)
+            self.assertNotIn('count', response.data)
+            seen += [issue['id'] for issue in response.data['results']]
+            url = response.data['next']
+        issues = Issue.objects.filter(project_id=self.project)\
+                              .order_by('created_time', 'id')
+        self.assertEqual(seen, [issue.id for issue in issues])
+
+    def test_cursor_page_skips_count(self):
+        self.client.get(self.url)
+        with self.assertNumQueries(1):
+            self.client.get(f'{self.url}?pagination=cursor')
+
+    def test_tampered_cursor(self):
+        comments = f'{self.url}{self.issue.id}/comments/'
+        for url in [self.url, comments, '/me/issues/']:
+            for cursor in ['cD0yMDI1', 'garbage']:
+                response = self.client.get(f'{url}?cursor={cursor}')
+                self.assertEqual(response.status_code, 404, url)
+
+    def test_limit_offset_without_count(self):
+        response = self.client.get(f'{self.url}?count=false&limit=10')
+        self.assertIsNone(response.data['count'])
+        self.assertEqual(len(response.data['results']), 10)
+        response = self.client.get(response.data['next'])
+        self.assertEqual(len(response.data['results']), 3)
+        self.assertIsNone(response.data['next'])
+
+
+class IssueFilterTests(SoftDeskTestCase):
+    def setUp(self):
+        super().setUp()
+        self.url = f'/projects/{self.project.project_id}/issues/'
+        self.other = Issue.objects.create(title='Login page',
+                                          description='Slow rendering',
+                                          tag='TACHE', priority='FAIBLE',
+                                          status='En cours',
+                                          project_id=self.project,
+                                          author_user_id=self.member,
+                                          assignee_user_id=self.author)
+
+    def ids(self, query):
+        response = self.client.get(f'{self.url}?{query}')
+        self.assertEqual(response.status_code, 200)
+        return [issue['id'] for issue in response.data['results']]
+
+    def test_choices(self):
+        self.assertEqual(self.ids('status=en cours'), [self.other.id])
+        self.assertEqual(self.ids('tag=bug&priority=ELEVEE'),
+                         [self.issue.id])
+        self.assertEqual(len(self.ids('priority=faible,elevee')), 2)
+        response = self.client.get(f'{self.url}?status=closed')
+        self.assertEqual(response.status_code, 400)
+
+    def test_accents(self):
+        self.other.status = 'Terminé'
+        self.other.save()
+        self.assertEqual(self.ids('status=TERMINE'), [self.other.id])
+
+    def test_users(self):
+        self.assertEqual(self.ids(f'assignee_email={self.author.email}'),
+                         [self.other.id])
+        self.assertEqual(self.ids(f'author={self.author.email}'),
+                         [self.issue.id])
+        self.assertEqual(self.ids(f'author={self.member.pk}'),
+                         [self.other.id])
+
+    def test_created_time_range_and_ordering(self):
+        Issue.objects.filter(pk=self.issue.pk)\
+                     .update(created_time='2022-01-01T00:00Z')
+        self.assertEqual(self.ids('created_before=2022-01-02'),
+                         [self.issue.id])
+        self.assertEqual(self.ids('created_after=2022-01-02'),
+                         [self.other.id])
+        self.assertEqual(self.ids('ordering=-created_time'),
+                         [self.other.id, self.issue.id])
+        self.assertEqual(self.ids('ordering=-created_time&limit=1'
+                                  '&pagination=cursor'), [self.other.id])
+        response = self.client.get(f'{self.url}?created_after=yesterday')
+        self.assertEqual(response.status_code, 400)
+
+    def test_out_of_range_values(self):
+        for query in ['created_after=2022-13-45',
+                      'created_before=2022-02-30T10:00',
+                      f'author={10 ** 20}']:
+            response = self.client.get(f'{self.url}?{query}')
+            self.assertEqual(response.status_code, 400, query)
+
+    def test_search_index_follows_writes(self):
+        self.assertEqual(self.ids('search=slow login'), [self.other.id])
+        self.assertEqual(self.ids('search="crash OR'), [])
+        self.other.title = 'It crashes on login'
+        self.other.save()
+        self.assertEqual(len(self.ids('search=crashes')), 2)
+        self.client.force_authenticate(self.member)
+        response = self.client.delete(f'{self.url}{self.other.id}/')
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.ids('search=crashes'), [self.issue.id])
+
+
+class InboxTests(SoftDeskTestCase):
+    def setUp(self):
+        super().setUp()
+        self.populate(size=3)
+        other = Project.objects.create(title='Other', description='Other',
+                                       type='iOS', author_user_id=self.author)
+        self.create_issue(other)
+        self.client.force_authenticate(self.member)
+
+    def test_issues_assigned_in_my_projects(self):
+        mine = Issue.objects.filter(assignee_user_id=self.member,
+                                    project_id__contributor_list__user_id=(
+                                        self.member))
+        with self.assertNumQueries(2):
+            response = self.client.get('/me/issues/')
+        self.assertEqual([issue['id'] for issue in response.data['results']],
+                         list(mine.order_by('created_time', 'id')
+                                  .values_list('id', flat=True)))
+        self.assertIn('next', response.data)
+        self.assertNotIn('count', response.data)
+
+    def test_comments_written_in_my_projects(self):
+        response = self.client.get('/me/comments/')
+        self.assertEqual([comment['comment_id']
+                          for comment in response.data['results']],
+                         [self.comment.comment_id])
+
+    def test_etag_follows_writes(self):
+        response = self.client.get('/me/issues/')
+        etag, count = response['ETag'], len(response.data['results'])
+        response = self.client.get('/me/issues/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.create_issue(self.project)
+        response = self.client.get('/me/issues/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), count + 1)
+
+
+class SparseFieldsTests(SoftDeskTestCase):
+    def setUp(self):
+        super().setUp()
+        self.url = f'/projects/{self.project.project_id}/'
+
+    def test_issue_list_fields(self):
+        url = f'{self.url}issues/?fields=id,title'
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.data['results'],
+                         [{'id': self.issue.id, 'title': 'Bug'}])
+        page = queries.captured_queries[-1]['sql']
+        self.assertNotIn('description', page)
+        self.assertNotIn('authentication_user', page)
+
+    def test_expand(self):
+        response = self.client.get(f'{self.url}issues/'
+                                   '?fields=id&expand=comments')
+        self.assertEqual(response.data['results'],
+                         [{'id': self.issue.id, 'comments': 1}])
+        response = self.client.get('/projects/?expand=issues')
+        self.assertEqual(response.data['results'][0]['issues'], 1)
+        self.assertIn('author', response.data['results'][0])
+
+    def test_project_detail_skips_unselected_prefetch(self):
+        self.client.get(self.url)
+        with self.assertNumQueries(1):
+            response = self.client.get(f'{self.url}?fields=title')
+        self.assertEqual(response.data, {'title': self.project.title})
+        response = self.client.get(f'{self.url}?fields=contributor_list')
+        self.assertEqual(set(response.data['contributor_list'][0]),
+                         {'id', 'user', 'role'})
+
+    def test_unknown_field(self):
+        response = self.client.get(f'{self.url}issues/?fields=secret')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get(f'{self.url}issues/?expand=title')
+        self.assertEqual(response.status_code, 400)
+
+    def test_writes_use_every_field(self):
+        response = self.client.post(f'{self.url}issues/?fields=id', {
+                        'title': 'New', 'description': 'Bug',
+                        'tag': 'bug', 'priority': 'faible',
+                        'status': 'a faire'})
+        self.assertEqual(response.status_code, 201)
+        self.assertIn('description', response.data)
+
+
+class RowSerializationTests(SoftDeskTestCase):
+    """The values() fast path of the lists answers the same bytes as the
+    serializers."""
+    def setUp(self):
+        super().setUp()
+        self.populate(size=3)
+        Issue.objects.create(title='Accents é \u2028', description='"Quoted"',
+                             tag='TACHE', priority='MOYENNE',
+                             status='Terminé', project_id=self.project,
+                             author_user_id=self.member,
+                             assignee_user_id=None)
+
+    def assertSameBytes(self, url):
+        fast = self.client.get(url)
+        caches['responses'].clear()
+        with override_settings(FAST_LIST_SERIALIZATION=False):
+            slow = self.client.get(url)
+        caches['responses'].clear()
+        self.assertEqual(fast.status_code, 200)
+        self.assertEqual(fast.content, slow.content)
+        self.assertEqual(fast.get('ETag'), slow.get('ETag'))
+
+    def test_lists(self):
+        project = f'/projects/{self.project.project_id}/'
+        for url in ('/projects/', '/projects/?expand=issues',
+                    f'{project}contributors/',
+                    f'{project}issues/',
+                    f'{project}issues/?expand=created_time,comments',
+                    f'{project}issues/?fields=id,author&tag=tache',
+                    f'{project}issues/?pagination=cursor&limit=1',
+                    f'{project}issues/{self.issue.id}/comments/'
+                    '?expand=created_time',
+                    '/me/issues/', '/me/comments/'):
+            with self.subTest(url=url):
+                self.assertSameBytes(url)
+
+    def test_cursor_pages(self):
+        url = (f'/projects/{self.project.project_id}/issues/'
+               '?pagination=cursor&limit=1')
+        next_url = self.client.get(url).data['next']
+        self.assertSameBytes(next_url)
+
+    def test_fallback_for_nested_fields(self):
+        response = self.client.get('/projects/?expand=contributor_list')
+        self.assertIn('contributor_list', response.data['results'][0])
+
+
+@override_settings(INSTRUMENTATION=True, MIDDLEWARE=[
+    'softdesk.instrumentation.InstrumentationMiddleware',
+    *settings.MIDDLEWARE])
+class InstrumentationTests(SoftDeskTestCase):
+    """Server-Timing headers and Prometheus histograms per endpoint"""
+    def setUp(self):
+        super().setUp()
+        REGISTRY.clear()
+
+    def test_server_timing_header(self):
+        url = f'/projects/{self.project.project_id}/issues/'
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        header = response['Server-Timing']
+        self.assertIn(f'desc="{len(queries)} queries"', header)
+        for phase in ('total', 'db', 'serializer', 'permissions'):
+            self.assertIn(f'{phase};dur=', header)
+
+    def test_metrics_per_endpoint(self):
+        url = f'/projects/{self.project.project_id}/issues/'
+        self.client.get(url)
+        self.client.get(url)
+        self.client.get(f'{url}{self.issue.id}/')
+        body = self.client.get('/metrics').content.decode()
+        self.assertIn('softdesk_request_duration_seconds_count'
+                      '{endpoint="IssueViewSet.list"} 2', body)
+        self.assertIn('softdesk_db_queries_bucket'
+                      '{endpoint="IssueViewSet.retrieve",le="+Inf"} 1', body)
+        self.assertIn('# TYPE softdesk_response_size_bytes histogram', body)
+        self.assertIn('softdesk_permission_duration_seconds_sum'
+                      '{endpoint="IssueViewSet.list"}', body)
+
+    def test_metrics_restricted(self):
+        with override_settings(METRICS_ALLOWED_IPS=['10.0.0.1']):
+            response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 403)
+
+    @override_settings(INSTRUMENTATION=False)
+    def test_disabled(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 404)
+
+
+class SeedCommandTests(SoftDeskTestCase):
+    """seed_softdesk writes consistent rows next to the existing ones"""
+    def seed(self, **options):
+        call_command('seed_softdesk', users=20, projects=4, issues=60,
+                     comments=300, batch_size=16, stdout=StringIO(),
+                     **options)
+
+    def test_counts_and_invariants(self):
+        users, issues = User.objects.count(), Issue.objects.count()
+        self.seed()
+        self.seed(seed=1)
+        self.assertEqual(User.objects.count(), users + 40)
+        self.assertEqual(Issue.objects.count(), issues + 120)
+        self.assertEqual(Comment.objects.count(), 1 + 600)
+        seeded = Project.objects.exclude(project_id=self.project.project_id)
+        for project in seeded:
+            contributors = Contributor.objects.filter(project_id=project)
+            author = contributors.get(permission='Auteur')
+            self.assertEqual(author.user_id_id, project.author_user_id_id)
+            members = set(contributors.values_list('user_id', flat=True))
+            issues = Issue.objects.filter(project_id=project)
+            self.assertTrue(set(issues.values_list('author_user_id',
+                                                   flat=True)) <= members)
+            comments = Comment.objects.filter(issue_id__in=issues)
+            self.assertFalse(comments.exclude(project_id=project).exists())
+            self.assertTrue(set(comments.values_list('author_user_id',
+                                                     flat=True)) <= members)
+
+    def test_shared_password(self):
+        self.seed(password='seeded-password')
+        users = User.objects.filter(email__startswith='seed.')
+        self.assertEqual(users.values('password').distinct().count(), 1)
+        self.assertTrue(users.first().check_password('seeded-password'))
+
+    def test_new_rows_after_seed(self):
+        self.seed()
+        response = self.client.post(
+            f'/projects/{self.project.project_id}/issues/',
+            {'title': 'New', 'description': 'After seeding', 'tag': 'BUG',
+             'priority': 'FAIBLE', 'status': 'A faire'})
+        self.assertEqual(response.status_code, 201)
+
+
+class ChangeLogTests(SoftDeskTestCase):
+    """/projects/{id}/changes/ returns what was written after a seq"""
+    def setUp(self):
+        super().setUp()
+        self.url = f'/projects/{self.project.project_id}/changes/'
+        self.issues_url = f'/projects/{self.project.project_id}/issues/'
+        self.since = self.client.get(self.url).data['last']
+
+    def changes(self, **params):
+        response = self.client.get(self.url, {'since': self.since, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def summary(self, changes):
+        return [(change['type'], change['action'], change['id'])
+                for change in changes]
+
+    def test_last_seq(self):
+        self.assertEqual(self.since, Change.objects.latest('seq').seq)
+        self.assertEqual(self.changes()['changes'], [])
+
+    def test_deltas(self):
+        issue = {'title': 'New', 'description': 'Logged', 'tag': 'BUG',
+                 'priority': 'FAIBLE', 'status': 'A faire'}
+        issue_id = self.client.post(self.issues_url, issue).data['id']
+        self.client.put(f'{self.issues_url}{issue_id}/',
+                        dict(issue, status='En cours'))
+        comments_url = f'{self.issues_url}{issue_id}/comments/'
+        comment_id = self.client.post(comments_url, {'description': 'Hi'})\
+                                .data['comment_id']
+        self.client.delete(f'{comments_url}{comment_id}/')
+        data = self.changes()
+        self.assertEqual(self.summary(data['changes']), [
+            ('issue', 'created', issue_id),
+            ('issue', 'updated', issue_id),
+            ('comment', 'created', comment_id),
+            ('comment', 'deleted', comment_id)])
+        self.assertEqual(data['changes'][0]['data']['status'], 'En cours')
+        self.assertEqual(data['changes'][2]['issue_id'], issue_id)
+        self.assertIsNone(data['changes'][2]['data'])
+        self.assertEqual(data['last'], data['changes'][-1]['seq'])
+        self.since = data['last']
+        self.assertEqual(self.changes()['changes'], [])
+
+    def test_limit(self):
+        for _ in range(3):
+            self.create_issue(self.project)
+        data = self.changes(limit=2)
+        self.assertEqual(len(data['changes']), 2)
+        self.assertTrue(data['more'])
+        self.since = data['last']
+        data = self.changes(limit=2)
+        self.assertEqual(len(data['changes']), 1)
+        self.assertFalse(data['more'])
+
+    @override_settings(CHANGES_POLL_INTERVAL=0.01)
+    def test_wait_without_change(self):
+        data = self.changes(wait=1)
+        self.assertEqual(data, {'changes': [], 'last': self.since,
+                                'more': False})
+
+    def test_since_beyond_the_last_seq(self):
+        data = self.changes(since=10 ** 23)
+        self.assertEqual(data['changes'], [])
+        self.assertFalse(data['more'])
+
+    def test_fast_delete_logs_rows(self):
+        self.populate(2)
+        comment_ids = set(Comment.objects.filter(issue_id=self.issue)
+                                         .values_list('pk', flat=True))
+        self.since = self.client.get(self.url).data['last']
+        self.client.delete(f'{self.issues_url}{self.issue.id}/')
+        changes = self.summary(self.changes()['changes'])
+        self.assertEqual({change[2] for change in changes[:-1]}, comment_ids)
+        self.assertEqual(changes[-1], ('issue', 'deleted', self.issue.id))
+
+    def test_bulk_import_logs_rows(self):
+        body = '\n'.join(json.dumps({'title': f'Bulk {index}',
+                                     'description': 'Imported',
+                                     'tag': 'BUG', 'priority': 'FAIBLE',
+                                     'status': 'A faire'})
+                         for index in range(3))
+        self.client.post(f'{self.issues_url}bulk/', body,
+                         content_type='application/x-ndjson')
+        changes = self.changes()['changes']
+        self.assertEqual([change['data']['title'] for change in changes],
+                         ['Bulk 0', 'Bulk 1', 'Bulk 2'])
+
+    def test_contributor_delete_logs_reassignments(self):
+        Contributor.objects.get(user_id=self.member).delete()
+        self.assertEqual(self.summary(self.changes()['changes'])[:2], [
+            ('issue', 'updated', self.issue.id),
+            ('comment', 'deleted', self.comment.comment_id)])
+
+    def test_project_delete_forgets_log(self):
+        for fast_delete in (True, False):
+            with self.subTest(fast_delete=fast_delete), \
+                    override_settings(FAST_DELETE=fast_delete):
+                project = Project.objects.create(title='Other',
+                                                 description='Deleted',
+                                                 type='iOS',
+                                                 author_user_id=self.author)
+                Contributor.objects.create(user_id=self.author,
+                                           project_id=project,
+                                           permission='Auteur',
+                                           role='Chef de projet')
+                self.create_comment(self.create_issue(project))
+                self.client.delete(f'/projects/{project.project_id}/')
+                log = Change.objects.filter(project_id=project.project_id)
+                self.assertFalse(log.exists())
+
+    def test_contributors_only(self):
+        self.client.force_authenticate(user=User.objects.create(
+            email='outsider@softdesk.fr', first_name='Eve', last_name='X'))
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+
+class ASGIClient:
+    """Drives an ASGI application like a server would."""
+    def __init__(self, application, scope, *messages):
+        self.inbox = asyncio.Queue()
+        self.outbox = asyncio.Queue()
+        for message in messages:
+            self.inbox.put_nowait(message)
+        self.task = asyncio.ensure_future(
+            application(scope, self.inbox.get, self.outbox.put))
+
+    async def receive(self):
+        return await asyncio.wait_for(self.outbox.get(), 5)
+
+    async def close(self, message):
+        await self.inbox.put(message)
+        await asyncio.wait_for(self.task, 5)
+
+
+def parse_events(body):
+    """(event, id, data) of the Server-Sent Events of the body."""
+    events = []
+    for block in body.decode().split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in block.splitlines()
+                      if not line.startswith(':'))
+        if fields:
+            events.append((fields['event'], fields.get('id'),
+                           json.loads(fields['data'])))
+    return events
+
+
+@override_settings(PUSH_BACKEND='projects.push.LocalBackend')
+class PushTests(SoftDeskTestCase):
+    """/events/ streams the changes of the user's projects"""
+    def setUp(self):
+        super().setUp()
+        self.application = PushApplication(None)
+        self.token = AccessToken.for_user(self.member)
+
+    def scope(self, query='', token=True, **extra):
+        headers = [(b'authorization', f'Bearer {self.token}'.encode())] \
+            if token else []
+        return dict({'type': 'http', 'method': 'GET', 'path': '/events/',
+                     'query_string': query.encode(), 'headers': headers},
+                    **extra)
+
+    def connect(self, query=''):
+        return ASGIClient(self.application, self.scope(query),
+                          {'type': 'http.request'})
+
+    async def start(self, client):
+        start = await client.receive()
+        self.assertEqual(start['status'], 200)
+        self.assertEqual(parse_events((await client.receive())['body']), [])
+
+    async def read(self, client, count):
+        events = []
+        while len(events) < count:
+            events += parse_events((await client.receive())['body'])
+        return events
+
+    async def disconnect(self, client):
+        await client.close({'type': 'http.disconnect'})
+
+    def commit(self, function, *args):
+        """Runs function in the test thread and its on_commit callbacks."""
+        def run():
+            with self.captureOnCommitCallbacks(execute=True):
+                return function(*args)
+        return sync_to_async(run)()
+
+    def test_refused(self):
+        async def scenario():
+            for scope, status in (
+                    (self.scope(token=False), 401),
+                    (self.scope(query='access_token=wrong', token=False),
+                     401),
+                    (self.scope(query='since=last'), 400),
+                    (self.scope(query='projects=0'), 403),
+                    (self.scope(method='POST'), 405)):
+                client = ASGIClient(self.application, scope)
+                self.assertEqual((await client.receive())['status'], status)
+                await client.receive()
+                await asyncio.wait_for(client.task, 5)
+        async_to_sync(scenario)()
+
+    def test_stream(self):
+        async def scenario():
+            client = self.connect()
+            await self.start(client)
+            issue = await self.commit(self.create_issue, self.project)
+            [(event, id, data)] = await self.read(client, 1)
+            self.assertEqual(event, 'change')
+            self.assertEqual(data['project_id'], self.project.project_id)
+            self.assertEqual((data['type'], data['action'], data['id']),
+                             ('issue', 'created', issue.id))
+            self.assertEqual(data['data']['title'], issue.title)
+            self.assertEqual(int(id), data['seq'])
+            await self.disconnect(client)
+        async_to_sync(scenario)()
+
+    def test_token_parameter_and_since(self):
+        since = Change.objects.latest('seq').seq
+        issues = [self.create_issue(self.project) for _ in range(3)]
+
+        async def scenario():
+            client = ASGIClient(
+                self.application,
+                self.scope(query=f'access_token={self.token}&since={since}',
+                           token=False),
+                {'type': 'http.request'})
+            await self.start(client)
+            events = await self.read(client, 3)
+            self.assertEqual([data['id'] for _, _, data in events],
+                             [issue.id for issue in issues])
+            await self.disconnect(client)
+        async_to_sync(scenario)()
+
+    @override_settings(PUSH_BATCH=2, PUSH_BACKLOG=2)
+    def test_batches(self):
+        """A client takes PUSH_BATCH events at a time, from the log past
+        the backlog of the topic"""
+        async def scenario():
+            slow, fast = self.connect(), self.connect()
+            await self.start(slow)
+            await self.start(fast)
+            issues = [await self.commit(self.create_issue, self.project)
+                      for _ in range(5)]
+            await self.read(fast, 5)
+            sizes, events = [], []
+            while len(events) < 5:
+                batch = parse_events((await slow.receive())['body'])
+                sizes.append(len(batch))
+                events += batch
+            self.assertTrue(all(size <= 2 for size in sizes))
+            self.assertEqual([data['id'] for _, _, data in events],
+                             [issue.id for issue in issues])
+            await self.disconnect(slow)
+            await self.disconnect(fast)
+        async_to_sync(scenario)()
+
+    def test_revoked(self):
+        contributor = Contributor.objects.get(user_id=self.member)
+
+        async def scenario():
+            client = self.connect()
+            await self.start(client)
+            await self.commit(contributor.delete)
+            events = await self.read(client, 1)
+            self.assertEqual(events[-1], ('revoked', None,
+                                          {'project_id':
+                                           self.project.project_id}))
+            await self.commit(self.create_issue, self.project)
+            await self.disconnect(client)
+            self.assertEqual(parse_events(b''.join(
+                message.get('body', b'')
+                for message in client.outbox._queue)), [])
+        async_to_sync(scenario)()
+
+    @override_settings(PUSH_HEARTBEAT=0.01)
+    def test_heartbeat(self):
+        async def scenario():
+            client = self.connect()
+            await self.start(client)
+            self.assertEqual((await client.receive())['body'], b': ping\n\n')
+            await self.disconnect(client)
+        async_to_sync(scenario)()
+
+    def test_websocket(self):
+        async def scenario():
+            client = ASGIClient(self.application,
+                                self.scope(type='websocket'),
+                                {'type': 'websocket.connect'})
+            self.assertEqual((await client.receive())['type'],
+                             'websocket.accept')
+            issue = await self.commit(self.create_issue, self.project)
+            message = json.loads((await client.receive())['text'])
+            self.assertEqual(message['event'], 'change')
+            self.assertEqual(message['data']['id'], issue.id)
+            await client.close({'type': 'websocket.disconnect'})
+        async_to_sync(scenario)()
+
+    def test_other_requests(self):
+        scopes = []
+
+        async def application(scope, receive, send):
+            scopes.append(scope)
+        scope = self.scope(path='/projects/')
+        async_to_sync(PushApplication(application))(scope, None, None)
+        self.assertEqual(scopes, [scope])
+
+
+class BatchTests(SoftDeskTestCase):
+    """/batch/ answers several GET requests like the views would"""
+    def batch(self, *urls):
+        return self.client.post('/batch/',
+                                {'requests': [{'url': url} for url in urls]},
+                                format='json')
+
+    def test_issue_page(self):
+        project_url = f'/projects/{self.project.project_id}/'
+        issue_url = f'{project_url}issues/{self.issue.id}/'
+        urls = [project_url, issue_url, f'{issue_url}comments/?limit=5',
+                f'{project_url}contributors/']
+        response = self.batch(*urls)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['responses'],
+                         [{'status': 200, 'body': self.client.get(url).json()}
+                          for url in urls])
+
+    def test_memberships_loaded_once(self):
+        urls = [f'/projects/{self.project.project_id}/issues/'] * 3
+        with mock.patch.object(membership, 'load_memberships',
+                               wraps=membership.load_memberships) as load:
+            self.assertEqual(self.batch(*urls).status_code, 200)
+        load.assert_called_once_with(self.author.user_id)
+
+    def test_sub_request_errors(self):
+        other = Project.objects.create(title='Other', description='Other',
+                                       type='back-end',
+                                       author_user_id=self.member)
+        project_url = f'/projects/{self.project.project_id}/'
+        response = self.batch('/nowhere/', f'/projects/{other.project_id}/',
+                              f'{project_url}issues/bulk/', '/metrics')
+        self.assertEqual([answer['status']
+                          for answer in response.data['responses']],
+                         [404, 404, 400, 400])
+
+    @override_settings(BATCH_MAX_REQUESTS=2)
+    def test_limits(self):
+        url = f'/projects/{self.project.project_id}/'
+        self.assertEqual(self.batch(url, url, url).status_code, 400)
+        response = self.client.post('/batch/', {'requests': [
+            {'method': 'DELETE', 'url': url}]}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.client.force_authenticate(user=None)
+        self.assertEqual(self.batch(url).status_code, 401)
+
+
+class IssueStatsTests(SoftDeskTestCase):
+    """/projects/{id}/stats/ counts the issues whatever path wrote them"""
+    def setUp(self):
+        super().setUp()
+        self.populate()
+        self.url = f'/projects/{self.project.project_id}/stats/'
+        self.issues_url = f'/projects/{self.project.project_id}/issues/'
+
+    def assertCounts(self, project=None):
+        """Counts of the endpoint, checked against the issues"""
+        project = project or self.project
+        issues = Issue.objects.filter(project_id=project)
+        expected = {'issues': issues.count()}
+        for name, choices in (('status', Issue.Status),
+                              ('priority', Issue.Priority),
+                              ('tag', Issue.Tag)):
+            expected[name] = {value: issues.filter(**{name: value}).count()
+                              for value in choices.values}
+        response = self.client.get(f'/projects/{project.project_id}/stats/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, expected)
+        return response.data
+
+    def test_summary(self):
+        data = self.assertCounts()
+        self.assertEqual(data['issues'], 6)
+        self.assertEqual(data['status']['A faire'], 6)
+        self.client.force_authenticate(user=self.member)
+        other = Project.objects.get(title='Project 0')
+        response = self.client.get(f'/projects/{other.project_id}/stats/')
+        self.assertEqual(response.status_code, 403)
+
+    def test_api_writes(self):
+        issue = {'title': 'New', 'description': 'Counted', 'tag': 'TACHE',
+                 'priority': 'FAIBLE', 'status': 'A faire'}
+        issue_id = self.client.post(self.issues_url, issue).data['id']
+        self.assertCounts()
+        self.client.put(f'{self.issues_url}{issue_id}/',
+                        dict(issue, status='En cours', tag='BUG'))
+        self.assertCounts()
+        self.client.delete(f'{self.issues_url}{issue_id}/')
+        self.assertCounts()
+        with override_settings(FAST_DELETE=False):
+            self.client.delete(f'{self.issues_url}{self.issue.id}/')
+        self.assertCounts()
+
+    def test_update_of_deferred_issue(self):
+        issue = Issue.objects.only('id', 'title').get(pk=self.issue.pk)
+        issue.status = 'Terminé'
+        issue.save()
+        self.assertCounts()
+
+    def test_concurrent_updates(self):
+        """Both loaded before either is saved, as by two PUTs at once"""
+        first = Issue.objects.get(pk=self.issue.pk)
+        second = Issue.objects.get(pk=self.issue.pk)
+        first.status = 'En cours'
+        first.save()
+        second.status = 'Terminé'
+        second.save()
+        self.assertCounts()
+        first.delete()
+        self.assertCounts()
+        second.delete()
+        self.assertCounts()
+
+    def test_bulk_import(self):
+        issue = {'title': 'Imported', 'description': 'Counted',
+                 'tag': 'AMELIORER', 'priority': 'MOYENNE',
+                 'status': 'Terminé'}
+        response = self.client.post(
+            f'{self.issues_url}bulk/', '\n'.join([json.dumps(issue)] * 3),
+            content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.assertCounts()['status']['Terminé'], 3)
+
+    def test_contributor_delete(self):
+        for fast_delete in (True, False):
+            with self.subTest(fast_delete=fast_delete), \
+                    override_settings(FAST_DELETE=fast_delete):
+                user = User.objects.get(
+                    email=f'user{int(fast_delete)}@softdesk.fr')
+                Contributor.objects.get(user_id=user,
+                                        project_id=self.project).delete()
+                self.assertCounts()
+
+    def test_removal_worker(self):
+        Contributor.objects.get(user_id=self.member).schedule_removal()
+        self.create_issue(self.project, author=self.member)
+        call_command('process_removals', '--once', '--batch-size', '1',
+                     stdout=StringIO())
+        self.assertCounts()
+
+    def test_project_delete_forgets_counts(self):
+        for fast_delete in (True, False):
+            with self.subTest(fast_delete=fast_delete), \
+                    override_settings(FAST_DELETE=fast_delete):
+                project = Project.objects.create(title='Other',
+                                                 description='Deleted',
+                                                 type='iOS',
+                                                 author_user_id=self.author)
+                Contributor.objects.create(user_id=self.author,
+                                           project_id=project,
+                                           permission='Auteur',
+                                           role='Chef de projet')
+                self.create_issue(project)
+                self.client.delete(f'/projects/{project.project_id}/')
+                self.assertFalse(IssueStat.objects.filter(
+                    project_id=project.project_id).exists())
+
+    def test_reconcile(self):
+        IssueStat.objects.filter(project_id=self.project.project_id)\
+                         .update(count=99)
+        IssueStat.objects.create(project_id=self.project.project_id,
+                                 status='En cours', priority='FAIBLE',
+                                 tag='BUG', count=1)
+        out = StringIO()
+        call_command('reconcile_issue_stats', stdout=out)
+        self.assertIn(f"1 projects had wrong counts: "
+                      f"{self.project.project_id}", out.getvalue())
+        self.assertCounts()
+        out = StringIO()
+        call_command('reconcile_issue_stats', '--project',
+                     str(self.project.project_id), stdout=out)
+        self.assertIn("All counts were right.", out.getvalue())
+
+
+class ExplainEndpointsTests(SoftDeskTestCase):
+    def test_no_endpoint_scans_a_table(self):
+        output = StringIO()
+        call_command('explain_endpoints', fail_on_scan=True, stdout=output)
+        self.assertIn('No full scan found.', output.getvalue())
+        self.assertTrue(Project.objects.filter(pk=self.project.pk).exists())
+        self.assertEqual(Project.objects.count(), 1)
+
+
+class BulkIssueTests(SoftDeskTestCase):
+    def setUp(self):
+        super().setUp()
+        self.url = f'/projects/{self.project.project_id}/issues/bulk/'
+
+    def post_lines(self, lines):
+        body = '\n'.join(json.dumps(line) for line in lines)
+        return self.client.generic('POST', self.url, body,
+                                   content_type='application/x-ndjson')
+
+    def issue_line(self, **fields):
+        line = {'title': 'Imported', 'description': 'From the old tracker',
+                'tag': 'tache', 'priority': 'moyenne', 'status': 'en cours'}
+        line.update(fields)
+        return line
+
+    def test_import_creates_issues(self):
+        lines = [self.issue_line(assignee_email=self.member.email),
+                 self.issue_line()]
+        response = self.post_lines(lines)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data, {'created': 2})
+        imported = Issue.objects.filter(title='Imported').order_by('id')
+        self.assertEqual([issue.assignee_user_id for issue in imported],
+                         [self.member, self.author])
+        self.assertEqual(imported[0].status, 'En cours')
+
+    def test_import_reports_line_errors_and_writes_nothing(self):
+        lines = [self.issue_line(),
+                 self.issue_line(tag='feature'),
+                 self.issue_line(assignee_email='nobody@softdesk.fr')]
+        response = self.post_lines(lines)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([error['line'] for error in response.data['errors']],
+                         [2, 3])
+        self.assertFalse(Issue.objects.filter(title='Imported').exists())
+
+    def test_import_folds_case_and_accents(self):
+        response = self.post_lines([self.issue_line(status='TERMINE'),
+                                    self.issue_line(status=3)])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['errors'][0]['line'], 2)
+        response = self.post_lines([self.issue_line(status=' terminé ')])
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(Issue.objects.filter(status='Terminé').exists())
+
+    def test_import_reports_invalid_json(self):
+        response = self.client.generic('POST', self.url, '{"title": \n[]',
+                                       content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(len(response.data['errors']), 2)
+
+    def test_export_streams_issues_and_comments(self):
+        response = self.client.get(self.url)
+        self.assertTrue(response.streaming)
+        lines = [json.loads(line) for line
+                 in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual([line['type'] for line in lines],
+                         ['issue', 'comment'])
+        self.assertEqual(lines[0]['assignee_email'], self.member.email)
+        self.assertEqual(lines[1]['issue_id'], self.issue.id)
+
+    def test_outsider_can_not_import(self):
+        outsider = User.objects.create(email='outsider@softdesk.fr',
+                                       first_name='Grace',
+                                       last_name='Hopper')
+        self.client.force_authenticate(user=outsider)
+        self.assertEqual(self.post_lines([self.issue_line()]).status_code,
+                         403)
+
+
+class ContributorRemovalTests(SoftDeskTestCase):
+    def setUp(self):
+        super().setUp()
+        self.contributor = Contributor.objects.get(user_id=self.member)
+        self.url = (f'/projects/{self.project.project_id}/contributors/'
+                    f'{self.contributor.id}/')
+        member_issue = self.create_issue(self.project, author=self.member)
+        self.create_comment(member_issue, author=self.author)
+        for _ in range(3):
+            self.create_comment(self.issue)
+
+    def test_removal_is_scheduled_and_revokes_access(self):
+        response = self.client.delete(self.url)
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['status'], 'pending')
+        self.assertEqual(Comment.objects.count(), 5)
+        self.client.force_authenticate(user=self.member)
+        url = f'/projects/{self.project.project_id}/issues/'
+        self.assertEqual(self.client.get(url).status_code, 403)
+        self.assertEqual(self.client.get('/projects/').data['count'], 0)
+
+    def test_worker_cleans_up_by_batches(self):
+        self.client.delete(self.url)
+        call_command('process_removals', once=True, batch_size=2,
+                     stdout=StringIO())
+        removal = ContributorRemoval.objects.get()
+        self.assertEqual(removal.status, 'done')
+        self.assertEqual((removal.reassigned_issues,
+                          removal.deleted_issues,
+                          removal.deleted_comments), (1, 1, 5))
+        self.assertFalse(Contributor.objects.filter(user_id=self.member)
+                                            .exists())
+        self.assertEqual(Issue.objects.get().assignee_user_id, self.author)
+        self.assertFalse(Comment.objects.exists())
+
+    def test_stale_jobs_are_requeued(self):
+        self.client.delete(self.url)
+        ContributorRemoval.objects.update(status='running')
+        call_command('process_removals', once=True, stale_after=-1,
+                     stdout=StringIO())
+        self.assertEqual(ContributorRemoval.objects.get().status, 'done')
+
+
+class FastDeleteTests(SoftDeskTestCase):
+    def setUp(self):
+        super().setUp()
+        self.populate()
+
+    def delete_project(self, queries=None):
+        self.client.get(f'/projects/{self.project.project_id}/issues/')
+        url = f'/projects/{self.project.project_id}/'
+        if queries is None:
+            response = self.client.delete(url)
+        else:
+            with self.assertNumQueries(queries):
+                response = self.client.delete(url)
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(Issue.objects.filter(project_id=self.project.pk)
+                                      .exists())
+        self.assertFalse(Comment.objects.filter(project_id=self.project.pk)
+                                        .exists())
+        self.assertFalse(Contributor.objects.filter(project_id=self.project.pk)
+                                            .exists())
+        response = self.client.get(f'/projects/{self.project.project_id}/'
+                                   'issues/')
+        self.assertEqual(response.status_code, 403)
+
+    def test_project_delete_runs_one_delete_per_table(self):
+        """Project, contributors' user ids then 5 DELETE, the change log's
+        and the issue counts', in a savepoint of the test's transaction"""
+        self.delete_project(queries=11)
+
+    def test_failed_delete_deletes_nothing(self):
+        issues = Issue.objects.filter(project_id=self.project.pk).count()
+        url = f'/projects/{self.project.project_id}/'
+        with mock.patch('projects.stats.forget_project',
+                        side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                self.client.delete(url)
+        self.assertEqual(Issue.objects.filter(project_id=self.project.pk)
+                                      .count(), issues)
+        self.assertTrue(Project.objects.filter(pk=self.project.pk).exists())
+
+    @override_settings(FAST_DELETE=False)
+    def test_project_delete_with_collector(self):
+        self.delete_project()
+
+    def test_issue_delete_removes_comments(self):
+        url = f'/projects/{self.project.project_id}/issues/{self.issue.id}/'
+        response = self.client.delete(url)
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(Comment.objects.filter(issue_id=self.issue.id)
+                                        .exists())
+        self.assertEqual(Issue.objects.count(), 5)
+
+    def test_contributor_delete(self):
+        user = User.objects.get(email='user0@softdesk.fr')
+        Contributor.objects.get(user_id=user, project_id=self.project)\
+                           .delete()
+        self.assertFalse(Issue.objects.filter(author_user_id=user).exists())
+        self.assertFalse(Comment.objects.filter(author_user_id=user)
+                                        .exists())
+
+
+class ResponseCacheTests(SoftDeskTestCase):
+    def setUp(self):
+        super().setUp()
+        self.url = f'/projects/{self.project.project_id}/issues/'
+        self.detail_url = f'{self.url}{self.issue.id}/'
+
+    def test_cached_response_costs_no_query(self):
+        first = self.client.get(self.url)
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url)
+        self.assertEqual(first.data, second.data)
+        self.assertEqual(first['ETag'], second['ETag'])
+
+    def test_not_modified(self):
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.create_issue(self.project)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_zero_padded_id_is_invalidated(self):
+        url = f'/projects/0{self.project.project_id}/issues/'
+        self.assertEqual(self.client.get(url).data['count'], 1)
+        self.create_issue(self.project)
+        self.assertEqual(self.client.get(url).data['count'], 2)
+
+    def test_comment_invalidates_issue_detail(self):
+        self.assertEqual(self.client.get(self.detail_url).data['comments'],
+                         1)
+        self.create_comment(self.issue)
+        self.assertEqual(self.client.get(self.detail_url).data['comments'],
+                         2)
+
+    def test_responses_are_per_user(self):
+        self.client.get(self.url)
+        outsider = User.objects.create(email='outsider@softdesk.fr',
+                                       first_name='Grace',
+                                       last_name='Hopper')
+        self.client.force_authenticate(user=outsider)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+    def test_project_list_follows_memberships(self):
+        self.client.force_authenticate(user=self.member)
+        self.assertEqual(self.client.get('/projects/').data['count'], 1)
+        project = Project.objects.create(title='Other', description='',
+                                         type='iOS',
+                                         author_user_id=self.author)
+        Contributor.objects.create(user_id=self.member, project_id=project,
+                                   permission='Contributeur', role='Dev')
+        self.assertEqual(self.client.get('/projects/').data['count'], 2)
+        project.title = 'Renamed'
+        project.save()
+        titles = [project['title'] for project
+                  in self.client.get('/projects/').data['results']]
+        self.assertIn('Renamed', titles)
+
+    def test_user_rename_invalidates(self):
+        url = f'/projects/{self.project.project_id}/'
+        self.client.get(url)
+        self.author.first_name = 'Augusta'
+        self.author.save()
+        self.assertTrue(self.client.get(url).data['author']
+                        .startswith('Augusta'))
+
+    def test_rehash_on_login_keeps_versions(self):
+        self.author.set_password('Sof7Desk-passw0rd')
+        self.author.save()
+        versions = get_versions([self.project.project_id])
+        hashers = ['django.contrib.auth.hashers.ScryptPasswordHasher',
+                   'django.contrib.auth.hashers.PBKDF2PasswordHasher']
+        with override_settings(PASSWORD_HASHERS=hashers):
+            response = self.client.post('/login/', {
+                            'email': 'author@softdesk.fr',
+                            'password': 'Sof7Desk-passw0rd'})
+        self.assertEqual(response.status_code, 200)
+        self.author.refresh_from_db()
+        self.assertTrue(self.author.password.startswith('scrypt$'))
+        self.assertEqual(get_versions([self.project.project_id]), versions)
+
+    def test_bulk_import_invalidates(self):
+        count = self.client.get(self.url).data['count']
+        line = json.dumps({'title': 'Imported', 'description': 'Old',
+                           'tag': 'bug', 'priority': 'faible',
+                           'status': 'a faire'})
+        response = self.client.generic('POST', f'{self.url}bulk/', line,
+                                       content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.client.get(self.url).data['count'], count + 1)
+
+
+class AsyncEndpointTests(SoftDeskTestCase):
+    """The async endpoints answer like the viewsets"""
+    def setUp(self):
+        super().setUp()
+        self.populate()
+        token = AccessToken.for_user(self.author)
+        self.client.force_authenticate(user=None)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def assertSameResponse(self, url):
+        response = self.client.get(f'/async{url}')
+        self.assertEqual(response.status_code, 200)
+        expected = self.client.get(url).json()
+        if 'results' in expected:
+            key = next(iter(expected['results'][0]))
+            for data in (expected, response.json()):
+                data['results'].sort(key=lambda item: item[key])
+        self.assertEqual(response.json(), expected)
+
+    def test_projects(self):
+        self.assertSameResponse('/projects/')
+        self.assertSameResponse(f'/projects/{self.project.project_id}/')
+
+    def test_issues(self):
+        url = f'/projects/{self.project.project_id}/issues/'
+        self.assertSameResponse(url)
+        self.assertSameResponse(f'{url}{self.issue.id}/')
+
+    def test_comments(self):
+        url = (f'/projects/{self.project.project_id}/issues/'
+               f'{self.issue.id}/comments/')
+        self.assertSameResponse(url)
+        self.assertSameResponse(f'{url}{self.comment.comment_id}/')
+
+    def test_permissions(self):
+        outsider = User.objects.create(email='outsider@softdesk.fr',
+                                       first_name='Grace',
+                                       last_name='Hopper')
+        url = f'/async/projects/{self.project.project_id}/issues/'
+        token = AccessToken.for_user(outsider)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertEqual(self.client.get(url).status_code, 403)
+        self.client.credentials()
+        self.assertEqual(self.client.get(url).status_code, 401)
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer invalid')
+        self.assertEqual(self.client.get(url).status_code, 401)
+
+
+class DatabaseProfileTests(SoftDeskTestCase):
+    def test_sqlite_pragmas(self):
+        if connection.settings_dict.get('PRAGMAS') is None:
+            self.skipTest("Not the sqlite profile")
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)
+            cursor.execute('PRAGMA temp_store')
+            self.assertEqual(cursor.fetchone()[0], 2)
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRoutingTests(SoftDeskTestCase):
+    """The replica is a second, migrated SQLite database which never
+    receives the writes of the primary. It is added once the test runner
+    has checked the declared databases."""
+
+    @classmethod
+    def setUpClass(cls):
+        replica = deepcopy(connections.settings['default'])
+        replica['NAME'] = ''
+        replica['TEST'] = {**replica['TEST'], 'NAME': None}
+        connections.settings['replica'] = replica
+        cls.replica_name = connections['replica'].creation.create_test_db(
+            verbosity=0, serialize=False)
+        cls.databases = {'default', 'replica'}
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections['replica'].creation.destroy_test_db(cls.replica_name,
+                                                        verbosity=0)
+        del connections['replica']
+        del connections.settings['replica']
+
+    def setUp(self):
+        super().setUp()
+        caches['replication'].clear()
+        self.url = f'/projects/{self.project.project_id}/issues/'
+
+    def test_reads_go_to_the_replica(self):
+        self.assertEqual(self.client.get(self.url).data['count'], 0)
+        self.assertEqual(self.client.get('/projects/').data['count'], 0)
+
+    def test_writer_reads_the_primary(self):
+        response = self.client.post(self.url, {
+                        'title': 'New', 'description': 'Bug',
+                        'tag': 'bug', 'priority': 'faible',
+                        'status': 'a faire'})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.client.get(self.url).data['count'], 2)
+
+    def test_written_project_reads_the_primary(self):
+        self.create_issue(self.project)
+        self.client.force_authenticate(self.member)
+        self.assertEqual(self.client.get(self.url).data['count'], 2)
+        padded = f'/projects/0{self.project.project_id}/issues/'
+        self.assertEqual(self.client.get(padded).data['count'], 2)
+        caches['replication'].clear()
+        caches['responses'].clear()
+        self.assertEqual(self.client.get(self.url).data['count'], 0)
+
+
+class RendererTests(SoftDeskTestCase):
+    data = {'title': "Line\u2028separator", 'created_time': None,
+            'tags': ['bug', 'é'],
+            'times': [datetime(2022, 5, 1, 15, 20, 23, 689954,
+                               tzinfo=timezone.utc),
+                      datetime(2022, 5, 1, 15, 20), date(2022, 5, 1),
+                      time(15, 20, 23, 689954)]}
+
+    def test_same_bytes_as_drf(self):
+        self.assertEqual(FastJSONRenderer().render(self.data),
+                         JSONRenderer().render(self.data))
+
+    def test_without_orjson(self):
+        with mock.patch('projects.renderers.orjson', None):
+            self.assertEqual(FastJSONRenderer().render(self.data),
+                             JSONRenderer().render(self.data))
+            response = self.client.get('/projects/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content)['count'], 1)
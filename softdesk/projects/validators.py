@@ -0,0 +1,72 @@
+"""
+Validators shared by the serializers, the issue filters and the bulk
+import.
+
+Choices are matched on their folded form: case insensitive and without
+accents, so 'termine', 'TERMINÉ' and 'Terminé' all give 'Terminé'. The
+lookup table and the error message of a set of choices are built once
+and shared by every field and row using it.
+"""
+import unicodedata
+from functools import lru_cache
+from types import MappingProxyType
+from rest_framework.serializers import ValidationError
+
+
+def fold(value):
+    """Lower case form of `value` without accents."""
+    decomposed = unicodedata.normalize('NFKD', value.strip())
+    return ''.join(char for char in decomposed
+                   if not unicodedata.combining(char)).casefold()
+
+
+class ChoiceValidator:
+    """Returns the canonical choice matching a value, or raises the
+    ValidationError of the ChoiceField."""
+    __slots__ = ('lookup', 'keys', 'message')
+
+    def __init__(self, choices, field_name):
+        keys = [key for key, _ in choices]
+        lookup = {fold(key): key for key in keys}
+        lookup.update((key, key) for key in keys)
+        self.lookup = MappingProxyType(lookup)
+        self.keys = tuple(keys)
+        self.message = f"{field_name} must be one of the following: {keys}"
+
+    def get(self, value):
+        """The canonical choice, None if there is none."""
+        if not isinstance(value, str):
+            return None
+        key = self.lookup.get(value)
+        if key is None:
+            # ASCII input has no accent to fold
+            value = value.strip().casefold() if value.isascii() \
+                else fold(value)
+            key = self.lookup.get(value)
+        return key
+
+    def __call__(self, value):
+        key = self.get(value)
+        if key is None:
+            raise ValidationError({'ValueError': self.message})
+        return key
+
+
+@lru_cache(maxsize=None)
+def choice_validator(choices, field_name):
+    """Shared validator of a ((key, label), ...) tuple of choices."""
+    return ChoiceValidator(choices, field_name)
+
+
+class RowValidator:
+    """Validates dicts as serializer_class(data=row).is_valid() would, with
+    a single serializer instance, e.g. for every line of a bulk import."""
+    def __init__(self, serializer_class):
+        self.serializer = serializer_class()
+
+    def validate(self, data):
+        """Returns (validated_data, None) or (None, errors)."""
+        try:
+            return self.serializer.run_validation(data), None
+        except ValidationError as error:
+            return None, error.detail
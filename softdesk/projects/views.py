@@ -1,4 +1,10 @@
-from rest_framework.viewsets import ModelViewSet
+from django.conf import settings
+from django.db.models import Count, OuterRef, Prefetch, Subquery
+from django.db.models.functions import Coalesce
+from django.http import StreamingHttpResponse
+from rest_framework.decorators import action
+from rest_framework.mixins import ListModelMixin
+from rest_framework.viewsets import GenericViewSet, ModelViewSet
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
@@ -8,10 +14,25 @@ from projects.models import Project, Issue, Comment, Contributor
 from projects.serializers import ProjectSerializerSelector,\
                                  IssueSerializerSelector,\
                                  ContributorSerializerSelector,\
-                                 CommentSerializerSelector
+                                 CommentSerializerSelector,\
+                                 ContributorRemovalSerializer
+from projects.bulk import import_issues, export_project
+from projects import changes, stats
+from projects.cache import ProjectCachedResponseMixin,\
+                           ProjectChildCachedResponseMixin,\
+                           MembershipsCachedResponseMixin
+from projects.deletion import delete_project, delete_issue
+from projects.fields import SparseQuerysetMixin
+from projects.filters import IssueFilterBackend, MAX_ID
+from projects.membership import get_memberships
+from projects.pagination import OptionalCursorPagination, KeysetPagination
+from projects.parsers import NDJSONParser
 from projects.permissions import IsContributor,\
                                  IsAuthorOrReadOnly,\
                                  IsProjectAuthorOrReadOnly
+from projects.routing import ReplicaReadMixin
+from projects.rows import RowListMixin
+from softdesk.instrumentation import TimedPermissionsMixin
 
 
 class MultipleSerializerMixin:
@@ -25,11 +46,37 @@ class MultipleSerializerMixin:
         return self.serializer_class
 
 
-class ProjectViewSet(MultipleSerializerMixin, ModelViewSet):
+def count_subquery(model, field, outer_field='pk'):
+    """Correlated COUNT(*) on `model` rows pointing to the outer row, so a
+    counter can be annotated without joining and grouping the outer query."""
+    counts = model.objects.filter(**{field: OuterRef(outer_field)})\
+                          .order_by()\
+                          .values(field)\
+                          .annotate(total=Count('*'))\
+                          .values('total')
+    return Coalesce(Subquery(counts), 0)
+
+
+class ProjectChildMixin:
+    """For the viewsets nested under a project. IsContributor has already
+    checked the membership, so the project exists and is referenced by its
+    primary key instead of being fetched again."""
+    def get_project(self):
+        return Project(project_id=int(self.kwargs["projects_pk"]))
+
+
+class ProjectViewSet(ReplicaReadMixin,
+                     TimedPermissionsMixin,
+                     ProjectCachedResponseMixin,
+                     RowListMixin,
+                     SparseQuerysetMixin,
+                     MultipleSerializerMixin,
+                     ModelViewSet):
     serializer_class = ProjectSerializerSelector.list
     multi_serializer_class = ProjectSerializerSelector
     permission_classes = [IsAuthenticated, IsAuthorOrReadOnly]
     queryset = Project.objects.all()
+    related = {'author': 'author_user_id'}
 
     def perform_create(self, serializer):
         """
@@ -49,6 +96,9 @@ class ProjectViewSet(MultipleSerializerMixin, ModelViewSet):
         """This method is not implemented"""
         return Response(status=status.HTTP_405_METHOD_NOT_ALLOWED)
 
+    def perform_destroy(self, instance):
+        delete_project(instance)
+
     def get_queryset(self):
         """We filter the project list to show only the projects the user is
         contributor of."""
@@ -56,19 +106,47 @@ class ProjectViewSet(MultipleSerializerMixin, ModelViewSet):
         user = self.request.user
         user_id = getattr(user, 'user_id')
         if isinstance(user, User):
-            return queryset.filter(contributors__user_id=user_id)
+            queryset = queryset.filter(
+                                contributor_list__user_id=user_id,
+                                contributor_list__pending_removal=False
+                                )
+            return self.optimize_queryset(queryset)
         return None
 
+    def optimize_queryset(self, queryset):
+        """We load in the same round trip everything the serializer reads
+        for the selected fields: author, contributors and issue count.
+        Destroy only reads the author, for the object permission."""
+        if self.action == 'destroy':
+            return queryset.select_related('author_user_id')
+        return self.select_fields(queryset)
+
+    def get_prefetches(self):
+        contributors = Contributor.objects.filter(pending_removal=False)\
+                                          .select_related('user_id')
+        return {'contributor_list': Prefetch('contributor_list',
+                                             queryset=contributors)}
+
+    def get_annotations(self):
+        return {'issues': ('issue_count',
+                           count_subquery(Issue, 'project_id'))}
+
 
-class ContributorViewSet(ModelViewSet):
+class ContributorViewSet(ReplicaReadMixin,
+                         TimedPermissionsMixin,
+                         ProjectChildMixin,
+                         RowListMixin,
+                         SparseQuerysetMixin,
+                         ModelViewSet):
     serializer_class = ContributorSerializerSelector.list
     multi_serializer_class = ContributorSerializerSelector
     permission_classes = [IsAuthenticated,
                           IsProjectAuthorOrReadOnly,
                           IsContributor]
+    related = {'user': 'user_id'}
 
     def perform_create(self, serializer):
-        project = Project.objects.get(project_id=self.kwargs["projects_pk"])
+        project = self.get_project()
         try:
             new_email = serializer.initial_data['email']
             new_contributor = User.objects.get(email=new_email)
@@ -92,17 +170,21 @@ class ContributorViewSet(ModelViewSet):
     def destroy(self, request, *args, **kwargs):
         """We override the method to forbid the Author to delete it's
         contribution and create an orphean project.
-        The delete model method has been overridden to delete all
-        contribution to the project made by the deleted contributor."""
+        The contributor loses its access right away, its contributions are
+        deleted in the background by the process_removals worker, as in the
+        delete model method."""
         instance = self.get_object()
         if instance.permission == "Auteur":
             return Response(status=status.HTTP_401_UNAUTHORIZED)
-        instance.delete()
-        return Response(status=status.HTTP_204_NO_CONTENT)
+        removal = instance.schedule_removal()
+        serializer = ContributorRemovalSerializer(removal)
+        return Response(serializer.data, status=status.HTTP_202_ACCEPTED)
 
     def get_queryset(self):
         project_pk = self.kwargs['projects_pk']
-        return Contributor.objects.filter(project_id=project_pk)
+        queryset = Contributor.objects.filter(project_id=project_pk,
+                                              pending_removal=False)
+        return self.select_fields(queryset)
 
     def get_serializer_class(self):
         if self.detail:
@@ -112,19 +194,40 @@ class ContributorViewSet(ModelViewSet):
         return self.serializer_class
 
 
-class IssueViewSet(MultipleSerializerMixin, ModelViewSet):
+class IssueFieldsMixin(SparseQuerysetMixin):
+    related = {'author': 'author_user_id',
+               'assignee_email': 'assignee_user_id'}
+
+    def get_annotations(self):
+        return {'comments': ('comment_count',
+                             count_subquery(Comment, 'issue_id'))}
+
+
+class IssueViewSet(ReplicaReadMixin,
+                   TimedPermissionsMixin,
+                   ProjectChildMixin,
+                   ProjectChildCachedResponseMixin,
+                   RowListMixin,
+                   IssueFieldsMixin,
+                   MultipleSerializerMixin,
+                   ModelViewSet):
     serializer_class = IssueSerializerSelector.list
     multi_serializer_class = IssueSerializerSelector
     permission_classes = [IsAuthenticated, IsAuthorOrReadOnly, IsContributor]
+    pagination_class = OptionalCursorPagination
+    cursor_ordering = ('created_time', 'id')
+    filter_backends = [IssueFilterBackend]
 
     def perform_create(self, serializer):
-        project = Project.objects.get(project_id=self.kwargs["projects_pk"])
+        project = self.get_project()
         if 'assignee_email' in serializer.initial_data.keys():
             try:
-                assignee_email = serializer.initial_data['assignee_email']
-                assignee = User.objects.get(email=assignee_email)
-                Contributor.objects.get(user_id=assignee,
-                                        project_id=project)
+                email = serializer.initial_data['assignee_email']
+                assignee = Contributor.objects.select_related('user_id')\
+                                              .get(project_id=project,
+                                                   user_id__email=email,
+                                                   pending_removal=False)\
+                                              .user_id
             except Exception:
                 message = "assignee_email must be a valid contributor email"
                 raise ValidationError(message)
@@ -139,24 +242,56 @@ class IssueViewSet(MultipleSerializerMixin, ModelViewSet):
     def perform_update(self, serializer):
         self.perform_create(serializer)
 
+    def perform_destroy(self, instance):
+        delete_issue(instance)
+
+    @action(detail=False, methods=['get', 'post'], url_path='bulk',
+            parser_classes=[NDJSONParser])
+    def bulk(self, request, *args, **kwargs):
+        """GET streams the project's issues and comments as NDJSON.
+        POST creates one issue per NDJSON line of the body: same fields as
+        the issue creation, written in one transaction. Invalid lines are
+        reported by line number and nothing is created."""
+        project_id = int(self.kwargs["projects_pk"])
+        if request.method == 'GET':
+            return StreamingHttpResponse(export_project(project_id),
+                                         content_type=NDJSONParser.media_type)
+        created, errors = import_issues(request.data, project_id,
+                                        request.user)
+        if errors:
+            return Response({'errors': errors},
+                            status=status.HTTP_400_BAD_REQUEST)
+        return Response({'created': created}, status=status.HTTP_201_CREATED)
+
     def partial_update(self, *args, **kwargs):
         """This method is not implemented"""
         return Response(status=status.HTTP_405_METHOD_NOT_ALLOWED)
 
     def get_queryset(self):
         project_pk = self.kwargs["projects_pk"]
-        return Issue.objects.filter(project_id=project_pk)
+        queryset = Issue.objects.filter(project_id=project_pk)
+        return self.select_fields(queryset)
 
 
-class CommentViewSet(MultipleSerializerMixin, ModelViewSet):
+class CommentViewSet(ReplicaReadMixin,
+                     TimedPermissionsMixin,
+                     ProjectChildMixin,
+                     RowListMixin,
+                     SparseQuerysetMixin,
+                     MultipleSerializerMixin,
+                     ModelViewSet):
     serializer_class = CommentSerializerSelector.list
     multi_serializer_class = CommentSerializerSelector
     permission_classes = [IsAuthenticated, IsAuthorOrReadOnly, IsContributor]
+    pagination_class = OptionalCursorPagination
+    cursor_ordering = ('created_time', 'comment_id')
+    related = {'author': 'author_user_id'}
 
     def perform_create(self, serializer):
         current_user = self.request.user
-        project = Project.objects.get(project_id=self.kwargs["projects_pk"])
-        issue = Issue.objects.get(id=self.kwargs["issues_pk"])
+        project = self.get_project()
+        issue = Issue.objects.only('id').get(id=self.kwargs["issues_pk"],
+                                             project_id=project)
         serializer.save(
                         author_user_id=current_user,
                         project_id=project,
@@ -170,4 +305,108 @@ class CommentViewSet(MultipleSerializerMixin, ModelViewSet):
     def get_queryset(self):
         issue_pk = self.kwargs["issues_pk"]
         project_pk = self.kwargs["projects_pk"]
-        return Comment.objects.filter(issue_id=issue_pk, project_id=project_pk)
+        queryset = Comment.objects.filter(issue_id=issue_pk,
+                                          project_id=project_pk)
+        return self.select_fields(queryset)
+
+
+class MeIssueViewSet(ReplicaReadMixin,
+                     TimedPermissionsMixin,
+                     MembershipsCachedResponseMixin,
+                     RowListMixin,
+                     IssueFieldsMixin,
+                     ListModelMixin,
+                     GenericViewSet):
+    """Issues assigned to the user in all of their projects, in one query
+    on the (assignee, created_time, id) index. Accepts the filters of the
+    issue list."""
+    serializer_class = IssueSerializerSelector.list
+    permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
+    cursor_ordering = ('created_time', 'id')
+    filter_backends = [IssueFilterBackend]
+
+    def get_queryset(self):
+        queryset = Issue.objects.filter(
+                    assignee_user_id=self.request.user.user_id,
+                    project_id__in=list(get_memberships(self.request)))
+        return self.select_fields(queryset)
+
+
+class MeCommentViewSet(ReplicaReadMixin,
+                       TimedPermissionsMixin,
+                       MembershipsCachedResponseMixin,
+                       RowListMixin,
+                       SparseQuerysetMixin,
+                       ListModelMixin,
+                       GenericViewSet):
+    """Comments written by the user in all of their projects, in one query
+    on the (author, created_time, comment_id) index."""
+    serializer_class = CommentSerializerSelector.list
+    permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
+    cursor_ordering = ('created_time', 'comment_id')
+    related = {'author': 'author_user_id'}
+
+    def get_queryset(self):
+        queryset = Comment.objects.filter(
+                    author_user_id=self.request.user.user_id,
+                    project_id__in=list(get_memberships(self.request)))
+        return self.select_fields(queryset)
+
+
+class ChangeViewSet(ReplicaReadMixin,
+                    TimedPermissionsMixin,
+                    GenericViewSet):
+    """
+    Change log of the project, see projects/changes.py.
+    ?since=<seq> lists the changes after seq, up to ?limit=, with `more`
+    set if there are others. ?wait=<seconds> holds the request until a
+    change comes. Without `since`, only the last seq is returned: the
+    client lists the issues and comments then follows from there.
+    """
+    permission_classes = [IsAuthenticated, IsContributor]
+
+    def get_param(self, name, default, maximum):
+        value = self.request.query_params.get(name)
+        if value is None:
+            return default
+        try:
+            value = int(value)
+        except ValueError:
+            raise ValidationError({name: "must be an integer"})
+        if value < 0:
+            raise ValidationError({name: "must be positive"})
+        return min(value, maximum)
+
+    def list(self, request, *args, **kwargs):
+        project_id = int(self.kwargs["projects_pk"])
+        since = self.get_param('since', None, MAX_ID)
+        if since is None:
+            return Response({'changes': [],
+                             'last': changes.last_seq(project_id),
+                             'more': False})
+        limit = self.get_param('limit', 100, 1000)
+        wait = self.get_param('wait', 0, settings.CHANGES_MAX_WAIT)
+        found = changes.wait_for_changes(project_id, since, limit, wait)
+        found, more = found[:limit], len(found) > limit
+        return Response({'changes': changes.render(found),
+                         'last': found[-1].seq if found else since,
+                         'more': more})
+
+
+class StatsViewSet(ReplicaReadMixin,
+                   TimedPermissionsMixin,
+                   ProjectChildCachedResponseMixin,
+                   GenericViewSet):
+    """
+    Number of issues of the project, in all and per status, priority and
+    tag, read from the counts of projects/stats.py.
+    """
+    permission_classes = [IsAuthenticated, IsContributor]
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(self.summary, request, *args, **kwargs)
+
+    def summary(self, request, *args, **kwargs):
+        return Response(stats.summary(int(self.kwargs["projects_pk"])))
@@ -2,6 +2,8 @@
 ASGI config for softdesk project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Requests to /events/ and WebSockets are served by the push endpoint of
+projects/push.py, the others by Django.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/4.0/howto/deployment/asgi/
@@ -13,4 +15,9 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'softdesk.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Imports models: after get_asgi_application() has set Django up
+from projects.push import PushApplication  # noqa: E402
+
+application = PushApplication(django_application)
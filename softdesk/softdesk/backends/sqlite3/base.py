@@ -0,0 +1,13 @@
+"""SQLite backend running the PRAGMAS of its DATABASES entry on every
+new connection, e.g. {'journal_mode': 'WAL', 'synchronous': 'NORMAL'}.
+Django 4.0 has no init_command for SQLite, hence this thin subclass."""
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for pragma, value in self.settings_dict.get('PRAGMAS', {}).items():
+            conn.execute(f'PRAGMA {pragma} = {value}')
+        return conn
@@ -0,0 +1,108 @@
+"""
+Batched reads: POST /batch/ with
+
+    {"requests": [{"url": "/projects/1/"},
+                  {"url": "/projects/1/issues/2/comments/?limit=50"}]}
+
+answers {"responses": [{"status": 200, "body": {...}}, ...]} in the same
+order, as the API views would answer the GET requests one by one.
+
+The sub-requests run in this request, through the URL resolver but not
+through the middlewares. The token is checked and the user's memberships
+are loaded once for the whole batch, and all the sub-requests use the
+connection of this thread: the primary, or one replica picked for the
+batch. Only the GET requests of the API views can be batched, at most
+BATCH_MAX_REQUESTS of them; streaming responses, e.g. the bulk export, are
+answered 400.
+"""
+from django.conf import settings
+from django.http import HttpRequest, QueryDict
+from django.urls import Resolver404, resolve
+from rest_framework import serializers
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from projects.membership import get_memberships
+from projects.routing import batch_replica, choose_replica
+
+
+# Headers of the batch request which do not apply to its sub-requests
+BATCH_ONLY_META = ('CONTENT_LENGTH', 'CONTENT_TYPE', 'HTTP_IF_NONE_MATCH',
+                   'HTTP_IF_MODIFIED_SINCE')
+
+
+class SubRequestSerializer(serializers.Serializer):
+    method = serializers.ChoiceField(choices=['GET'], default='GET')
+    url = serializers.RegexField(r'^/', max_length=2000)
+
+
+class BatchSerializer(serializers.Serializer):
+    requests = SubRequestSerializer(many=True, allow_empty=False)
+
+    def validate_requests(self, value):
+        if len(value) > settings.BATCH_MAX_REQUESTS:
+            raise serializers.ValidationError(
+                f"At most {settings.BATCH_MAX_REQUESTS} requests per batch.")
+        return value
+
+
+class SubRequest(HttpRequest):
+    """GET request of a batch, authenticated as the batch."""
+    def __init__(self, batch, path, query):
+        super().__init__()
+        self.batch = batch
+        self.method = 'GET'
+        self.path = self.path_info = path
+        self.META = {key: value for key, value in batch.META.items()
+                     if key not in BATCH_ONLY_META}
+        self.META.update(REQUEST_METHOD='GET', PATH_INFO=path,
+                         QUERY_STRING=query)
+        self.GET = QueryDict(query)
+        self.COOKIES = batch.COOKIES
+        # Read by rest_framework.request.Request instead of authenticating
+        self._force_auth_user = batch.user
+        self._force_auth_token = batch.auth
+        # Read by projects.membership.get_memberships
+        self.memberships = get_memberships(batch)
+
+    def _get_scheme(self):
+        return self.batch.scheme
+
+
+def answer(status, body):
+    return {'status': status, 'body': body}
+
+
+def run(batch, url):
+    path, _, query = url.partition('?')
+    try:
+        match = resolve(path)
+    except Resolver404:
+        return answer(404, {'detail': "Not found."})
+    if getattr(match.func, 'cls', None) is None:
+        return answer(400, {'detail': "Not available in a batch."})
+    request = SubRequest(batch, path, query)
+    request.resolver_match = match
+    response = match.func(request, *match.args, **match.kwargs)
+    if response.streaming:
+        response.close()
+        return answer(400, {'detail': "Streaming responses are not "
+                                      "available in a batch."})
+    return answer(response.status_code, getattr(response, 'data', None))
+
+
+class BatchView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = BatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        token = batch_replica.set(
+            choose_replica() if settings.DATABASE_REPLICAS else None)
+        try:
+            responses = [run(request, sub_request['url'])
+                         for sub_request
+                         in serializer.validated_data['requests']]
+        finally:
+            batch_replica.reset(token)
+        return Response({'responses': responses})
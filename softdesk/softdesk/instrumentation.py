@@ -0,0 +1,279 @@
+"""
+Opt-in request metrics, enabled by SOFTDESK_INSTRUMENTATION=on.
+
+InstrumentationMiddleware measures each request and files it under its
+endpoint, the viewset and action serving it, e.g. 'IssueViewSet.list':
+- wall time;
+- number and time of the database queries;
+- time spent in the serializers and in the permission checks;
+- size of the response body.
+
+Responses carry these measures in a Server-Timing header. /metrics serves
+them as Prometheus histograms, per process: scrape each worker. Streaming
+responses, e.g. the bulk export, are measured up to their first byte.
+
+The phases are timed by `timed`, which does nothing outside an
+instrumented request, so the mixins below cost a context variable lookup
+when the middleware is off.
+"""
+import asyncio
+import threading
+from bisect import bisect_left
+from contextvars import ContextVar
+from time import perf_counter
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import Http404, HttpResponse, HttpResponseForbidden
+
+
+current = ContextVar('instrumentation', default=None)
+
+
+class Measure:
+    """Measures of the request being served."""
+    __slots__ = ('start', 'endpoint', 'queries', 'phases', 'running')
+
+    def __init__(self):
+        self.start = perf_counter()
+        self.endpoint = 'unresolved'
+        self.queries = 0
+        self.phases = {'db': 0.0, 'serializer': 0.0, 'permissions': 0.0}
+        self.running = set()
+
+
+class timed:
+    """Adds the time spent in the block to `phase`. Nested blocks of the
+    same phase, e.g. nested serializers, count once."""
+    __slots__ = ('phase', 'measure', 'start')
+
+    def __init__(self, phase):
+        self.phase = phase
+
+    def __enter__(self):
+        measure = current.get()
+        if measure is None or self.phase in measure.running:
+            self.measure = None
+            return
+        measure.running.add(self.phase)
+        self.measure = measure
+        self.start = perf_counter()
+
+    def __exit__(self, *exc_info):
+        measure = self.measure
+        if measure is not None:
+            measure.phases[self.phase] += perf_counter() - self.start
+            measure.running.discard(self.phase)
+
+
+def record_query(execute, sql, params, many, context):
+    """Execute wrapper counting the queries of the current request."""
+    measure = current.get()
+    if measure is None:
+        return execute(sql, params, many, context)
+    start = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        measure.queries += 1
+        measure.phases['db'] += perf_counter() - start
+
+
+def install(connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def endpoint_name(view_func, method):
+    """'ViewSet.action' of viewsets, 'View.method' of other class based
+    views, 'module.function' of function views."""
+    view_class = getattr(view_func, 'cls', None) or \
+        getattr(view_func, 'view_class', None)
+    if view_class is None:
+        module = view_func.__module__.rsplit('.', 1)[-1]
+        return f"{module}.{view_func.__name__}"
+    actions = getattr(view_func, 'actions', None) or {}
+    action = actions.get(method.lower(), method.lower())
+    return f"{view_class.__name__}.{action}"
+
+
+class Histogram:
+    """Prometheus histogram with one series per endpoint."""
+    def __init__(self, name, description, buckets):
+        self.name = name
+        self.description = description
+        self.buckets = tuple(buckets)
+        self.series = {}
+
+    def observe(self, endpoint, value):
+        series = self.series.get(endpoint)
+        if series is None:
+            series = self.series[endpoint] = [[0] * (len(self.buckets) + 1),
+                                              0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.description}",
+                 f"# TYPE {self.name} histogram"]
+        bounds = [repr(float(bound)) for bound in self.buckets] + ['+Inf']
+        for endpoint, (counts, total) in sorted(self.series.items()):
+            label = f'endpoint="{escape(endpoint)}"'
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{label},le="{bound}"}} '
+                             f'{cumulative}')
+            lines.append(f"{self.name}_sum{{{label}}} {total}")
+            lines.append(f"{self.name}_count{{{label}}} {cumulative}")
+        return lines
+
+
+def escape(value):
+    return value.replace('\\', r'\\').replace('"', r'\"')\
+                .replace('\n', r'\n')
+
+
+SECONDS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1,
+           2.5, 5, 10)
+
+
+class Registry:
+    """Histograms of the requests served by this process."""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        self.histograms = {
+            'wall': Histogram('softdesk_request_duration_seconds',
+                              "Wall time of the requests.", SECONDS),
+            'queries': Histogram('softdesk_db_queries',
+                                 "Database queries per request.",
+                                 (0, 1, 2, 3, 5, 10, 20, 50, 100)),
+            'db': Histogram('softdesk_db_duration_seconds',
+                            "Time spent in database queries per request.",
+                            SECONDS),
+            'serializer': Histogram('softdesk_serializer_duration_seconds',
+                                    "Time spent in serializers per request.",
+                                    SECONDS),
+            'permissions': Histogram(
+                'softdesk_permission_duration_seconds',
+                "Time spent checking permissions per request.", SECONDS),
+            'size': Histogram('softdesk_response_size_bytes',
+                              "Size of the response bodies.",
+                              (256, 1024, 4096, 16384, 65536, 262144,
+                               1048576, 4194304)),
+        }
+
+    def observe(self, endpoint, values):
+        with self.lock:
+            for name, value in values.items():
+                self.histograms[name].observe(endpoint, value)
+
+    def render(self):
+        with self.lock:
+            lines = [line for histogram in self.histograms.values()
+                     for line in histogram.render()]
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+
+class InstrumentationMiddleware:
+    """Measures the requests, see the module docstring. Goes first in
+    MIDDLEWARE to include the time of the other middlewares."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.server_timing = getattr(settings, 'SERVER_TIMING_HEADER', True)
+        self.async_mode = asyncio.iscoroutinefunction(get_response)
+        if self.async_mode:
+            # Marks the instance as a coroutine function, as Django 4.0
+            # does in MiddlewareMixin
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+        # Connections are per thread: the ones of the other threads are
+        # opened later, and get the wrapper on connection_created
+        for connection in connections.all():
+            install(connection)
+        connection_created.connect(install)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        measure = Measure()
+        token = current.set(measure)
+        try:
+            response = self.get_response(request)
+        finally:
+            current.reset(token)
+        return self.finish(response, measure)
+
+    async def __acall__(self, request):
+        measure = Measure()
+        token = current.set(measure)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current.reset(token)
+        return self.finish(response, measure)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        measure = current.get()
+        if measure is not None:
+            measure.endpoint = endpoint_name(view_func, request.method)
+
+    def finish(self, response, measure):
+        wall = perf_counter() - measure.start
+        values = dict(measure.phases, wall=wall, queries=measure.queries)
+        if not response.streaming:
+            values['size'] = len(response.content)
+        REGISTRY.observe(measure.endpoint, values)
+        if self.server_timing:
+            response['Server-Timing'] = server_timing(measure, wall)
+        return response
+
+
+def server_timing(measure, wall):
+    phases = measure.phases
+    return (f'total;dur={wall * 1000:.2f}, '
+            f'db;dur={phases["db"] * 1000:.2f};'
+            f'desc="{measure.queries} queries", '
+            f'serializer;dur={phases["serializer"] * 1000:.2f}, '
+            f'permissions;dur={phases["permissions"] * 1000:.2f}')
+
+
+def metrics(request):
+    """Prometheus metrics of this process, for METRICS_ALLOWED_IPS."""
+    if not getattr(settings, 'INSTRUMENTATION', False):
+        raise Http404()
+    if request.META.get('REMOTE_ADDR') not in settings.METRICS_ALLOWED_IPS:
+        return HttpResponseForbidden()
+    return HttpResponse(REGISTRY.render(),
+                        content_type='text/plain; version=0.0.4; '
+                                     'charset=utf-8')
+
+
+class TimedPermissionsMixin:
+    """For the views: times the permission checks."""
+    def check_permissions(self, request):
+        with timed('permissions'):
+            super().check_permissions(request)
+
+    def check_object_permissions(self, request, obj):
+        with timed('permissions'):
+            super().check_object_permissions(request, obj)
+
+
+class TimedSerializerMixin:
+    """For the serializers: times the rendering and the validation."""
+    def to_representation(self, instance):
+        with timed('serializer'):
+            return super().to_representation(instance)
+
+    def run_validation(self, *args, **kwargs):
+        with timed('serializer'):
+            return super().run_validation(*args, **kwargs)
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 from datetime import timedelta
 
@@ -54,6 +55,20 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Request metrics, see softdesk/instrumentation.py. With
+# SOFTDESK_INSTRUMENTATION=on responses carry a Server-Timing header and
+# /metrics serves the Prometheus histograms to METRICS_ALLOWED_IPS.
+
+INSTRUMENTATION = os.environ.get('SOFTDESK_INSTRUMENTATION') == 'on'
+
+if INSTRUMENTATION:
+    MIDDLEWARE.insert(0, 'softdesk.instrumentation.InstrumentationMiddleware')
+
+SERVER_TIMING_HEADER = True
+
+METRICS_ALLOWED_IPS = os.environ.get('SOFTDESK_METRICS_ALLOWED_IPS',
+                                     '127.0.0.1').split(',')
+
 ROOT_URLCONF = 'softdesk.urls'
 
 TEMPLATES = [
@@ -78,12 +93,70 @@ WSGI_APPLICATION = 'softdesk.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/4.0/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# SOFTDESK_DB_PROFILE picks the database: 'sqlite' (default) or 'postgres'.
+# benchmarks.databases compares the profiles under concurrent requests.
+
+DATABASE_PROFILE = os.environ.get('SOFTDESK_DB_PROFILE', 'sqlite')
+
+if DATABASE_PROFILE == 'postgres':
+    # Persistent connections, checked before reuse (CONN_HEALTH_CHECKS is
+    # read from Django 4.1 on). With SOFTDESK_DB_POOLER=pgbouncer, HOST and
+    # PORT point to a PgBouncer in transaction mode, which does not keep
+    # the server side cursors of QuerySet.iterator() between transactions.
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('SOFTDESK_DB_NAME', 'softdesk'),
+            'USER': os.environ.get('SOFTDESK_DB_USER', 'softdesk'),
+            'PASSWORD': os.environ.get('SOFTDESK_DB_PASSWORD', ''),
+            'HOST': os.environ.get('SOFTDESK_DB_HOST', 'localhost'),
+            'PORT': os.environ.get('SOFTDESK_DB_PORT', '5432'),
+            'CONN_MAX_AGE': int(os.environ.get('SOFTDESK_DB_CONN_MAX_AGE',
+                                               60)),
+            'CONN_HEALTH_CHECKS': True,
+            'DISABLE_SERVER_SIDE_CURSORS':
+                os.environ.get('SOFTDESK_DB_POOLER') == 'pgbouncer',
+            'OPTIONS': {'connect_timeout': 5},
+        }
+    }
+else:
+    # WAL lets readers run alongside the single writer, and writers wait
+    # up to `timeout` seconds for the lock instead of failing at once
+    # with "database is locked". See softdesk/backends/sqlite3.
+    DATABASES = {
+        'default': {
+            'ENGINE': 'softdesk.backends.sqlite3',
+            'NAME': os.environ.get('SOFTDESK_DB_NAME',
+                                   BASE_DIR / 'db.sqlite3'),
+            'OPTIONS': {'timeout': 20},
+            'PRAGMAS': {
+                'journal_mode': 'WAL',
+                'synchronous': 'NORMAL',
+                'temp_store': 'MEMORY',
+                'cache_size': -16000,
+            },
+        }
     }
-}
+
+# Read replicas, see projects/routing.py. SOFTDESK_DB_REPLICAS lists them
+# separated by commas: SQLite files or PostgreSQL hosts. Their test
+# databases mirror the default one.
+
+DATABASE_REPLICAS = []
+
+for index, replica in enumerate(
+        filter(None, os.environ.get('SOFTDESK_DB_REPLICAS', '').split(','))):
+    alias = f'replica_{index}'
+    location = 'HOST' if DATABASE_PROFILE == 'postgres' else 'NAME'
+    DATABASES[alias] = dict(DATABASES['default'], **{location: replica},
+                            TEST={'MIRROR': 'default'})
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['projects.routing.ReplicaRouter']
+
+# Seconds during which the reads of a user or a project go to the primary
+# after they write
+REPLICA_PIN_SECONDS = 5
 
 
 # Password validation
@@ -105,6 +178,35 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Password hashing
+# SOFTDESK_HASHER_PROFILE picks the hasher of new hashes. The others stay
+# listed to verify existing hashes, which are replaced on the next login.
+# The argon2 profile needs the argon2-cffi package.
+# benchmarks.hashers measures the logins per second and per core.
+
+PASSWORD_HASHER_PROFILES = {
+    'pbkdf2': 'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'argon2': 'authentication.hashers.TunedArgon2PasswordHasher',
+    'scrypt': 'django.contrib.auth.hashers.ScryptPasswordHasher',
+}
+
+PASSWORD_HASHER_PROFILE = os.environ.get('SOFTDESK_HASHER_PROFILE', 'pbkdf2')
+
+PASSWORD_HASHERS = [
+    PASSWORD_HASHER_PROFILES[PASSWORD_HASHER_PROFILE],
+    *(hasher for profile, hasher in PASSWORD_HASHER_PROFILES.items()
+      if profile != PASSWORD_HASHER_PROFILE),
+]
+
+AUTHENTICATION_BACKENDS = ['authentication.backends.PooledModelBackend']
+
+# Hashing thread pool, see authentication/hashing.py
+PASSWORD_HASHING_WORKERS = int(os.environ.get(
+    'SOFTDESK_HASHING_WORKERS', max(1, (os.cpu_count() or 2) // 2)))
+PASSWORD_HASHING_QUEUE = 64
+PASSWORD_HASHING_TIMEOUT = 5
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/4.0/topics/i18n/
 
@@ -129,15 +231,94 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # added settings
 
+# Redis URL of the cache of the responses, e.g. redis://localhost:6379/1.
+# Writes invalidate the cached responses of the other processes only
+# through a shared cache, so it is required with more than one worker.
+# Without it each process keeps its own responses for a few seconds.
+RESPONSES_CACHE = os.environ.get('SOFTDESK_RESPONSES_CACHE')
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Process-local LRU of {project_id: permission} per user,
+    # see projects/membership.py
+    'memberships': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'memberships',
+        'TIMEOUT': 300,
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+    # Users authenticated by their JWT, see authentication/authentication.py
+    'users': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'users',
+        'TIMEOUT': 300,
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+    # Users and projects reading from the primary after a write,
+    # see projects/routing.py
+    'replication': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'replication',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+    # Responses of the project and issue read endpoints,
+    # see projects/cache.py
+    'responses': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': RESPONSES_CACHE,
+        'TIMEOUT': 600,
+    } if RESPONSES_CACHE else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'responses',
+        'TIMEOUT': 5,
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    },
+}
+
 AUTH_USER_MODEL = 'authentication.User'
 
 REST_FRAMEWORK = {
     'DATETIME_FORMAT': "%Y-%m-%d %H:%M:%S",
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.LimitOffsetPagination',
     'PAGE_SIZE': 10,
-    'DEFAULT_AUTHENTICATION_CLASSES': ('rest_framework_simplejwt.authentication.JWTAuthentication',)
+    'DEFAULT_AUTHENTICATION_CLASSES': (
+        'authentication.authentication.CachedJWTAuthentication',
+    ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'projects.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
 }
 
+# Render the list endpoints from values() rows, see projects/rows.py
+FAST_LIST_SERIALIZATION = True
+
+# Delete projects and issues with set-based DELETEs, see projects/deletion.py
+FAST_DELETE = True
+
+# Change log, see projects/changes.py. Seconds a request may wait for
+# changes with ?wait=, and between two looks at the log while waiting.
+# CHANGES_SETTLE_SECONDS holds back the newest changes, for databases where
+# transactions commit out of seq order, e.g. 1 on PostgreSQL.
+CHANGES_MAX_WAIT = 25
+CHANGES_POLL_INTERVAL = 1
+CHANGES_SETTLE_SECONDS = 1 if DATABASE_PROFILE == 'postgres' else 0
+
+# Push endpoint of softdesk/asgi.py, see projects/push.py. DatabaseBackend
+# polls the change log every PUSH_POLL_INTERVAL seconds for the commits of
+# the other processes, LocalBackend only hears those of its own. Events
+# kept per project, events sent at a time and seconds between heartbeats.
+PUSH_BACKEND = 'projects.push.DatabaseBackend'
+PUSH_POLL_INTERVAL = 1
+PUSH_BACKLOG = 1000
+PUSH_BATCH = 100
+PUSH_HEARTBEAT = 15
+
+# Most sub-requests of a POST /batch/, see softdesk/batch.py
+BATCH_MAX_REQUESTS = 20
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(hours=2),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
@@ -16,22 +16,46 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 from rest_framework_nested import routers
-from projects.views import ProjectViewSet, ContributorViewSet, IssueViewSet, CommentViewSet
+from projects.views import ProjectViewSet, ContributorViewSet,\
+    IssueViewSet, CommentViewSet, MeIssueViewSet, MeCommentViewSet,\
+    ChangeViewSet, StatsViewSet
+from projects import async_views
+from softdesk import instrumentation
+from softdesk.batch import BatchView
 
 router = routers.SimpleRouter()
 router.register(r'projects', ProjectViewSet, basename='project')
+router.register(r'me/issues', MeIssueViewSet, basename='me-issues')
+router.register(r'me/comments', MeCommentViewSet, basename='me-comments')
 
 project_router = routers.NestedSimpleRouter(router, r'projects', lookup='projects')
 project_router.register(r'contributors', ContributorViewSet, basename='contributors')
 project_router.register(r'issues', IssueViewSet, basename='issues')
+project_router.register(r'changes', ChangeViewSet, basename='changes')
+project_router.register(r'stats', StatsViewSet, basename='stats')
 
 issue_router = routers.NestedSimpleRouter(project_router, r'issues', lookup='issues')
 issue_router.register(r'comments', CommentViewSet, basename='comments')
 
+async_urlpatterns = [
+    path('projects/', async_views.project_list),
+    path('projects/<int:projects_pk>/', async_views.project_detail),
+    path('projects/<int:projects_pk>/issues/', async_views.issue_list),
+    path('projects/<int:projects_pk>/issues/<int:pk>/',
+         async_views.issue_detail),
+    path('projects/<int:projects_pk>/issues/<int:issues_pk>/comments/',
+         async_views.comment_list),
+    path('projects/<int:projects_pk>/issues/<int:issues_pk>/comments/'
+         '<int:pk>/', async_views.comment_detail),
+]
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', include('authentication.urls')),
     path(r'', include(router.urls)),
     path(r'', include(project_router.urls)),
-    path(r'', include(issue_router.urls))
+    path(r'', include(issue_router.urls)),
+    path('async/', include(async_urlpatterns)),
+    path('metrics', instrumentation.metrics, name='metrics'),
+    path('batch/', BatchView.as_view(), name='batch'),
 ]